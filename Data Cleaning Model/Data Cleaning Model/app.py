@@ -1,14 +1,100 @@
-from flask import Flask, render_template, request, jsonify, send_file
+import os
+import sys
+
+# Modules shared with the other app live in vizpro_common at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import pandas as pd
 import numpy as np
-from io import BytesIO
 from utils.data_analysis import analyze_columns
+from utils.cleaning import compile_plan
+from utils.recipe import replay_to_path, validate_recipe
+from utils.dataset_store import DatasetStore, frame_nbytes
+from utils.ingest import (spool_upload, iter_csv_chunks, iter_parts, write_dataset,
+                          read_dataset, read_rows, read_schema, remove_dataset)
+from utils.json_utils import frame_to_columns, frame_to_records, serialize_numpy
+from utils.profiler import DatasetProfile, profile_chunks, profile_frame
+from utils.jobs import JobManager, FINISHED as JOB_FINISHED
+from utils.viz_cache import ResultCache, cache_key
+from vizpro_common.figures import compress_response
+from utils.excel import WorkbookCache, cache_sheet
+from vizpro_common.dtypes import column_nbytes, compact_frame, memory_summary
+from utils.export import EXPORT_FORMATS, validate_export, filter_chunks, stream_export
+from utils.report import once, describe_profile, run_sections, encode_events
+from utils.dedup import RowHashIndex, NEAR_THRESHOLD, count_duplicates, find_near_duplicates
+from utils.correlation import numeric_columns, streaming_correlation
+import shutil
 import logging
 
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024 * 1024  # 10GB, uploads are spooled to disk
+app.config['DATA_FOLDER'] = 'datasets'
+app.config['INGEST_CHUNK_ROWS'] = 100000
+app.config['DATASET_MEMORY_BUDGET'] = 1024 * 1024 * 1024  # 1GB across all datasets
+app.config['MAX_IN_MEMORY_DATASET'] = 256 * 1024 * 1024  # larger uploads stay on disk
+app.config['MAX_ROWS_PER_PAGE'] = 5000
+app.config['ANALYTICS_WORKERS'] = 2
+app.config['ANALYTICS_TIMEOUT'] = 120  # seconds before a heavy visualization is killed
+app.config['VISUALIZE_WAIT_SECONDS'] = 10  # longer jobs return a job id to poll
+app.config['REPLAY_TIMEOUT'] = 3600  # seconds before a recipe replay is killed
+app.config['MAX_PLOT_PIXELS'] = 4000  # bound on requested plot width/height
+app.config['MAX_CLUSTERS'] = 30
+app.config['VIZ_CACHE_FOLDER'] = os.path.join(app.config['DATA_FOLDER'], '_viz_cache')
+app.config['VIZ_CACHE_MEMORY'] = 128 * 1024 * 1024  # 128MB of cached plot JSON
+app.config['VIZ_CACHE_DISK'] = 1024 * 1024 * 1024  # 1GB of plot JSON kept on disk
+app.config['EXCEL_CACHE_FOLDER'] = os.path.join(app.config['DATA_FOLDER'], '_excel_cache')
+app.config['EXCEL_CACHE_DISK'] = 2 * 1024 * 1024 * 1024  # 2GB of workbooks and parsed sheets
+app.config['REPORT_WORKERS'] = 4  # export report sections built concurrently
 logging.basicConfig(level=logging.INFO)
 
+os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
+
+datasets = DatasetStore(app.config['DATASET_MEMORY_BUDGET'],
+                        app.config['DATA_FOLDER'],
+                        app.config['INGEST_CHUNK_ROWS'])
+
+# PCA, clustering, correlation and anomaly scans, Excel sheet parsing,
+# near-duplicate search and recipe replays run in worker processes so they
+# never stall the request threads. Workers only need the job modules, not
+# the web app that may be __main__
+HEAVY_VISUALIZATIONS = {'pca', 'cluster', 'correlation', 'anomalies'}
+jobs = JobManager(app.config['ANALYTICS_WORKERS'], app.config['ANALYTICS_TIMEOUT'],
+                  preload=['utils.visualization', 'utils.excel', 'utils.dedup', 'utils.recipe'])
+
+# Scatter plots and time series are downsampled and can be re-fetched via /zoom
+ZOOMABLE_VISUALIZATIONS = {'scatter', 'timeseries'}
+
+# Plot results keyed by dataset version, visualization type and parameters
+viz_cache = ResultCache(app.config['VIZ_CACHE_MEMORY'], app.config['VIZ_CACHE_FOLDER'],
+                        app.config['VIZ_CACHE_DISK'])
+
+# Parsed Excel sheets as Parquet, keyed by workbook content hash
+workbooks = WorkbookCache(app.config['EXCEL_CACHE_FOLDER'], app.config['EXCEL_CACHE_DISK'])
+
+def get_request_dataset(data, load=True):
+    """Look up the server-side dataset referenced by a request payload."""
+    if not data or not data.get('dataset_id'):
+        return None
+    return datasets.get(data['dataset_id'], load=load)
+
+def dataset_not_found():
+    return jsonify({'success': False, 'error': 'Dataset not found or expired, please upload again'}), 404
+
+def visualization_key(dataset, viz_type, params):
+    return cache_key(dataset.dataset_id, dataset.version, viz_type, params)
+
+def cached_plot(key, build):
+    """Return the plot cached under ``key``, building and storing it on a miss."""
+    plot = viz_cache.get(key)
+    if plot is None:
+        plot = viz_cache.put(key, serialize_numpy(build()))
+    return plot
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -23,140 +109,229 @@ def upload_file():
         if not file.filename:
             return jsonify({'success': False, 'error': 'No file selected'})
 
-        df = read_file(file)
-        if df is None:
+        dataset_id = datasets.new_id()
+        path = datasets.dataset_path(dataset_id)
+        df, head, profile, workbook = read_file(file, path, request.form.get('sheet'))
+        if head is None:
+            remove_dataset(path)
             return jsonify({'success': False, 'error': 'Unsupported file format'})
-
-        # Clean and prepare data
-        preview_data = clean_data_for_json(df.head())
-        
-        # Ensure analysis is not None
-        analysis = analyze_columns(df) or {
-            'data_types': {},
-            'missing_values': {},
-            'unique_counts': {},
-            'numeric_columns': [],
-            'categorical_columns': [],
-            'column_stats': {}
-        }
-        
-        if not preview_data:
-            return jsonify({'success': False, 'error': 'Error processing data'})
-
-        return jsonify({
-            'success': True,
-            'preview': preview_data,
-            'columns': df.columns.tolist(),
-            'analysis': analysis,
-            'total_rows': len(df),
-            'total_columns': len(df.columns)
-        })
+        return register_dataset(df, head, profile, file.filename, dataset_id, path, workbook)
         
     except Exception as e:
         logging.error(f"Error processing file: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
-def read_file(file):
+@app.route('/sheet', methods=['POST'])
+def open_sheet():
+    """Open another sheet of an uploaded workbook as a new dataset, from the Excel cache."""
+    try:
+        data = request.json or {}
+        digest = data.get('workbook')
+        sheets = workbooks.sheets(digest) if digest else None
+        if sheets is None:
+            return jsonify({'success': False, 'error': 'Workbook not found, please upload it again'}), 404
+        if data.get('sheet') not in sheets:
+            return jsonify({'success': False, 'error': 'Sheet not found'}), 404
+
+        dataset_id = datasets.new_id()
+        path = datasets.dataset_path(dataset_id)
+        df, head, profile = read_sheet(digest, sheets, data['sheet'], path)
+        workbook = {'workbook': digest, 'sheets': sheets, 'sheet': data['sheet']}
+        return register_dataset(df, head, profile, data.get('name') or data['sheet'], dataset_id, path,
+                                workbook)
+    except Exception as e:
+        logging.error(f"Error opening sheet: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+def register_dataset(df, head, profile, name, dataset_id, path, workbook=None):
+    """Compact and store an ingested dataset and build the upload response."""
+    # Clean and prepare data
+    preview_data = clean_data_for_json(head.head())
+
+    if not preview_data:
+        remove_dataset(path)
+        return jsonify({'success': False, 'error': 'Error processing data'})
+
+    # Shrink dtypes before the frame is stored; the parts on disk keep the originals
+    report = row_index = None
+    if df is not None:
+        df, report = compact_frame(df)
+        profile.retype(df)
+        row_index = RowHashIndex.from_frame(df)
+
+    # Profile was built in the same pass that ingested the file
+    analysis = profile.to_analysis()
+
+    datasets.add(df, name=name, path=path, dataset_id=dataset_id, profile=profile,
+                 memory_report=report, row_index=row_index)
+
+    return jsonify({
+        'success': True,
+        'dataset_id': dataset_id,
+        'preview': preview_data,
+        'columns': head.columns.tolist(),
+        'analysis': analysis,
+        'total_rows': profile.rows,
+        'total_columns': len(head.columns),
+        **(workbook or {})
+    })
+
+def read_file(file, path, sheet=None):
+    """Ingest an upload into Parquet parts under ``path``.
+
+    CSVs are spooled to disk and parsed in chunks of INGEST_CHUNK_ROWS rows,
+    so peak memory stays flat regardless of file size. Excel workbooks go
+    through the Excel cache (see ``read_sheet``) and ``sheet`` picks the
+    sheet to open, the first by default. Column statistics are profiled
+    from the same chunks. Returns ``(df, head, profile, workbook)`` where
+    ``df`` is None when the dataset is larger than MAX_IN_MEMORY_DATASET and
+    only lives on disk, ``head`` is the first chunk and ``workbook`` holds
+    the workbook digest and sheet names for Excel files. ``head`` is None
+    for unsupported formats or read errors.
+    """
     try:
+        chunk_rows = app.config['INGEST_CHUNK_ROWS']
         if file.filename.endswith('.csv'):
-            return pd.read_csv(file)
+            spool_path = os.path.join(path, 'upload.csv')
+            spool_upload(file, spool_path)
+            try:
+                df, head, profile = collect_chunks(iter_csv_chunks(spool_path, path, chunk_rows))
+            finally:
+                os.remove(spool_path)
+            return df, head, profile, None
         elif file.filename.endswith(('.xlsx', '.xls')):
-            return pd.read_excel(file)
-        return None
+            spool_path = os.path.join(path, 'upload' + os.path.splitext(file.filename)[1])
+            spool_upload(file, spool_path)
+            digest, sheets = workbooks.add(spool_path)
+            sheet = sheet if sheet in sheets else sheets[0]
+            df, head, profile = read_sheet(digest, sheets, sheet, path)
+            return df, head, profile, {'workbook': digest, 'sheets': sheets, 'sheet': sheet}
+        return None, None, None, None
     except Exception as e:
         logging.error(f"Error reading file: {str(e)}")
-        return None
+        return None, None, None, None
+
+def collect_chunks(chunks):
+    """Profile chunks and keep them as one frame while under MAX_IN_MEMORY_DATASET.
+
+    Returns ``(df, head, profile)``; ``df`` is None once the chunks outgrow
+    the limit.
+    """
+    kept = []
+    head = None
+    profile = DatasetProfile()
+    in_memory = 0
+    for chunk in chunks:
+        if head is None:
+            head = chunk
+        profile.update(chunk)
+        if kept is not None:
+            in_memory += frame_nbytes(chunk)
+            if in_memory <= app.config['MAX_IN_MEMORY_DATASET']:
+                kept.append(chunk)
+            else:
+                kept = None
+    df = pd.concat(kept, ignore_index=True) if kept else None
+    return df, head, profile
+
+def read_sheet(digest, sheets, sheet, path):
+    """Copy one sheet of a cached workbook into ``path`` and load it.
+
+    A sheet not yet in the Excel cache is parsed in a worker process when
+    it is first opened; other sheets wait until ``/sheet`` asks for them,
+    so a large workbook never queues its whole content ahead of other
+    analytics jobs. Reopening a sheet only reads Parquet. Returns
+    ``(df, head, profile)``.
+    """
+    index = sheets.index(sheet)
+    workbooks.touch(digest)
+    if not workbooks.is_cached(digest, index):
+        job = jobs.submit(cache_sheet, workbooks.source_path(digest), sheet, workbooks.sheet_path(digest, index),
+                          app.config['INGEST_CHUNK_ROWS'], key=f'excel:{digest}:{index}', kind='excel')
+        jobs.wait(job, app.config['ANALYTICS_TIMEOUT'])
+        if job.status != 'done':
+            raise ValueError(job.error or f'Parsing sheet {sheet} {job.status}')
+        # The cache only grows when a workbook or sheet is added
+        workbooks.prune()
+    shutil.copytree(workbooks.sheet_path(digest, index), path, dirs_exist_ok=True)
+    return collect_chunks(iter_parts(path))
 
 def clean_data_for_json(df):
     """Clean DataFrame to ensure JSON serialization."""
     try:
-        # Replace problematic values
-        df_clean = df.replace({
-            np.nan: None,
-            np.inf: None,
-            -np.inf: None
-        })
-        
-        # Convert to dictionary carefully
-        records = []
-        for _, row in df_clean.iterrows():
-            clean_row = {}
-            for column in df_clean.columns:
-                value = row[column]
-                if pd.isna(value):
-                    clean_row[column] = None
-                else:
-                    clean_row[column] = str(value) if isinstance(value, (np.generic, pd.Timestamp)) else value
-            records.append(clean_row)
-        
-        return records
+        return frame_to_records(df)
     except Exception as e:
         logging.error(f"Error in clean_data_for_json: {str(e)}")
         return []
 
+@app.route('/rows', methods=['GET'])
+def get_rows():
+    """Return a columnar window of rows from a stored dataset."""
+    try:
+        dataset = get_request_dataset(request.args, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 100, type=int), 0), app.config['MAX_ROWS_PER_PAGE'])
+
+        columns = request.args.get('columns')
+        if columns:
+            columns = [c for c in columns.split(',') if c]
+            missing = [c for c in columns if c not in dataset.columns]
+            if missing:
+                return jsonify({'success': False, 'error': f"Columns not found: {', '.join(missing)}"}), 400
+        else:
+            columns = dataset.columns
+
+        # Unloaded datasets are paged straight from their Parquet parts
+        df = dataset.df
+        if df is not None:
+            window = df.iloc[offset:offset + limit].rename(columns=str)[columns]
+        else:
+            window = read_rows(dataset.path, offset, limit, columns)
+
+        return jsonify({
+            'success': True,
+            'dataset_id': dataset.dataset_id,
+            'version': dataset.version,
+            'offset': offset,
+            'limit': limit,
+            'total_rows': dataset.total_rows,
+            'columns': [str(c) for c in window.columns],
+            'data': frame_to_columns(window)
+        })
+    except Exception as e:
+        logging.error(f"Error in get_rows: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/clean', methods=['POST'])
 def clean_data():
     try:
         data = request.json
-        if not data or 'data' not in data or 'operations' not in data:
+        if not data or 'operations' not in data:
             return jsonify({'error': 'Invalid request data'}), 400
 
-        # Convert to DataFrame and handle NaN values
-        df = pd.DataFrame(data['data']).replace(['NaN', 'null', ''], np.nan)
-        operations = data['operations']
-        
-        # Track failed operations
-        failed_operations = []
-        
-        for op in operations:
-            try:
-                # Validate operation before processing
-                if not all(key in op for key in ['type', 'column']):
-                    failed_operations.append({
-                        'type': op.get('type', 'unknown'),
-                        'error': 'Missing required parameters'
-                    })
-                    continue
-
-                # Validate column exists
-                if op['column'] not in df.columns:
-                    failed_operations.append({
-                        'type': op['type'],
-                        'column': op['column'],
-                        'error': 'Column not found'
-                    })
-                    continue
-
-                if op['type'] == 'fill_mean':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    mean_value = df[op['column']].mean()
-                    if pd.isna(mean_value):
-                        raise ValueError("Cannot calculate mean of non-numeric data")
-                    df[op['column']].fillna(mean_value, inplace=True)
-                elif op['type'] == 'fill_median':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    df[op['column']].fillna(df[op['column']].median(), inplace=True)
-                elif op['type'] == 'fill_mode':
-                    df[op['column']].fillna(df[op['column']].mode()[0], inplace=True)
-                elif op['type'] == 'fill_value':
-                    df[op['column']].fillna(op['value'], inplace=True)
-                elif op['type'] == 'remove_rows':
-                    df.dropna(subset=[op['column']], inplace=True)
-                elif op['type'] == 'ffill':
-                    df[op['column']].fillna(method='ffill', inplace=True)
-                elif op['type'] == 'bfill':
-                    df[op['column']].fillna(method='bfill', inplace=True)
-                elif op['type'] == 'interpolate':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    df[op['column']].interpolate(method='linear', inplace=True)
-            except Exception as e:
-                failed_operations.append({
-                    'type': op['type'],
-                    'column': op['column'],
-                    'error': str(e)
-                })
-                logging.error(f"Error in operation {op['type']}: {str(e)}")
-                continue
+        dataset = get_request_dataset(data, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
+        if dataset.out_of_core:
+            return clean_preview(dataset, data['operations'])
+
+        dataset = datasets.get(dataset.dataset_id)
+        original = dataset.df
+        # Validate, fuse and run the operations as one plan
+        plan = compile_plan(original, data['operations'])
+        df = plan.execute(original)
+
+        applied = [data['operations'][i] for i in plan.applied]
+        # Only rows the plan changed or dropped are refingerprinted
+        if dataset.row_index is not None:
+            dataset.row_index.update(original, df, {op['column'] for op in applied})
+        else:
+            dataset.row_index = RowHashIndex.from_frame(df)
+        dataset = datasets.replace(dataset.dataset_id, df, applied)
 
         # Clean data for JSON response
         cleaned_preview = clean_data_for_json(df.head())
@@ -164,83 +339,224 @@ def clean_data():
 
         return jsonify({
             'success': True,
+            'dataset_id': dataset.dataset_id,
+            'version': dataset.version,
             'preview': cleaned_preview,
             'analysis': analysis,
+            'total_rows': len(df),
             'missing_data': df.isnull().sum().to_dict(),
-            'duplicates': int(df.duplicated().sum()),
-            'failed_operations': failed_operations
+            'duplicates': dataset.row_index.duplicates,
+            'failed_operations': plan.failed,
+            'timings': plan.timings
         })
         
     except Exception as e:
         logging.error(f"Error in clean_data: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+def clean_preview(dataset, operations):
+    """Record operations for an out-of-core dataset and preview them on its first chunk.
+
+    The full dataset is only cleaned when the recipe is replayed via /replay.
+    """
+    head = read_rows(dataset.source_path, 0, app.config['INGEST_CHUNK_ROWS'])
+    head = compile_plan(head, dataset.recipe).execute(head)
+
+    failed = validate_recipe(operations, dataset.columns)
+    invalid = {error['index'] for error in failed}
+    valid = [op for i, op in enumerate(operations) if i not in invalid]
+    plan = compile_plan(head, valid)
+    head = plan.execute(head)
+
+    dataset = datasets.record(dataset.dataset_id, valid)
+
+    return jsonify({
+        'success': True,
+        'deferred': True,
+        'dataset_id': dataset.dataset_id,
+        'version': dataset.version,
+        'preview': clean_data_for_json(head.head()),
+        'analysis': analyze_columns(head),
+        'total_rows': dataset.total_rows,
+        'recipe': dataset.recipe,
+        'failed_operations': failed + plan.failed,
+        'timings': plan.timings
+    })
+
+@app.route('/replay', methods=['POST'])
+def replay():
+    """Replay a cleaning recipe over the full source file chunk by chunk, as a job.
+
+    Uses the dataset's recorded recipe unless ``operations`` is given. The
+    cleaned output is streamed to new Parquet parts in a worker process, so
+    memory stays constant regardless of file size, and registered as a new
+    dataset when the job finishes. Waits briefly like /visualize; longer
+    replays return a job id to poll on /jobs/<job_id>.
+    """
+    try:
+        data = request.json
+        dataset = get_request_dataset(data, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
+        operations = data.get('operations', dataset.recipe)
+        errors = validate_recipe(operations, dataset.columns)
+        if errors:
+            return jsonify({'success': False, 'error': 'Invalid recipe', 'failed_operations': errors}), 400
+
+        dataset_id = datasets.new_id()
+        path = datasets.dataset_path(dataset_id)
+
+        def register(result):
+            # The profile stays server-side; the rest of the result is the response
+            profile, stats, seconds = result.pop('profile'), result.pop('stats'), result.pop('seconds')
+            datasets.add(name=f'{dataset.name} (cleaned)', path=path, dataset_id=dataset_id,
+                         profile=profile, out_of_core=dataset.out_of_core)
+            result.update({
+                'dataset_id': dataset_id,
+                'source_dataset_id': dataset.dataset_id,
+                'total_rows': profile.rows,
+                'statistics': [{'index': i, 'type': operations[i]['type'], 'column': operations[i]['column'],
+                                'value': serialize_numpy(value)} for i, value in sorted(stats.items())],
+                'seconds': round(seconds, 3),
+                'rows_per_second': int(profile.rows / seconds) if seconds else None
+            })
+
+        # The same replay of the same dataset version shares one running job
+        key = cache_key(dataset.dataset_id, dataset.version, 'replay', {'operations': operations})
+        job = jobs.submit(replay_to_path, dataset.source_path, operations, path, key=key,
+                          timeout=app.config['REPLAY_TIMEOUT'], on_done=register,
+                          on_fail=lambda job: remove_dataset(path), kind='replay')
+        return job_response(job, app.config['VISUALIZE_WAIT_SECONDS'])
+    except Exception as e:
+        logging.error(f"Error in replay: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/download', methods=['POST'])
 def download():
+    """Stream the dataset as CSV, gzip/zstd CSV, Parquet or Feather.
+
+    Optional ``columns`` projects the output and ``filters`` (a list of
+    ``{column, op, value}``) keeps only matching rows. Unloaded datasets
+    read just the needed columns of one Parquet part at a time.
+    """
     try:
         data = request.json
-        df = pd.DataFrame(data['data'])
-        output = BytesIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
-        return send_file(
-            output,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name='cleaned_data.csv'
-        )
+        dataset = get_request_dataset(data, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
+        fmt = data.get('format') or 'csv'
+        columns = data.get('columns') or None
+        filters = data.get('filters') or []
+        validate_export(columns, dataset.columns, filters, fmt)
+        needed = None
+        if columns is not None:
+            needed = list(dict.fromkeys(columns + [f['column'] for f in filters]))
+        chunks = filter_chunks(dataset_chunks(dataset, needed)(), filters, columns)
+        schema = dataset_schema(dataset)
+        if columns is not None:
+            schema = schema[columns]
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        return Response(stream_with_context(stream_export(chunks, schema, fmt)),
+                        mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=cleaned_data{extension}'})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 from utils.visualization import (create_correlation_matrix, create_scatter_plot,
-                               perform_pca_visualization, detect_anomalies,
+                               perform_pca_visualization,
                                create_time_series, create_missing_data_matrix,
-                               create_cluster_visualization)
-from utils.json_utils import serialize_numpy
+                               create_cluster_visualization, run_visualization,
+                               plot_correlation, plot_nullity, MISSING_MATRIX_BLOCKS)
+from utils.nullity import summarize_nullity
 import json
 
 @app.route('/visualize', methods=['POST'])
 def visualize_data():
+    return render_visualization(request.json)
+
+@app.route('/zoom', methods=['POST'])
+def zoom():
+    """Re-render a scatter or time series at full detail for a zoomed-in range.
+
+    Takes the same fields as /visualize plus ``x_range`` and, for scatter
+    plots, an optional ``y_range``, each a ``[low, high]`` pair in data units.
+    """
+    data = request.json
+    if not data or data.get('type') not in ZOOMABLE_VISUALIZATIONS:
+        return jsonify({'success': False, 'error': 'Only scatter and timeseries plots can be zoomed'}), 400
+    for name in ('x_range', 'y_range'):
+        value = data.get(name)
+        if value is not None and (not isinstance(value, list) or len(value) != 2):
+            return jsonify({'success': False, 'error': f'{name} must be a [low, high] pair'}), 400
+    if data.get('x_range') is None and data.get('y_range') is None:
+        return jsonify({'success': False, 'error': 'No zoom range provided'}), 400
+    return render_visualization(data)
+
+def plot_size(data):
+    """Requested plot size in pixels, clamped to what a screen can show."""
+    width = min(max(int(data.get('width') or 900), 100), app.config['MAX_PLOT_PIXELS'])
+    height = min(max(int(data.get('height') or 600), 100), app.config['MAX_PLOT_PIXELS'])
+    return width, height
+
+def dataset_frame(dataset, columns):
+    """Return only ``columns`` of a dataset, reading them from disk if it is unloaded."""
+    df = dataset.df
+    if df is not None:
+        return df[columns]
+    return read_dataset(datasets.persist(dataset.dataset_id), columns)
+
+def render_visualization(data):
     try:
-        data = request.json
-        if not data or 'data' not in data or 'type' not in data:
+        if not data or 'type' not in data:
             return jsonify({'error': 'Invalid request data'}), 400
 
-        df = pd.DataFrame(data['data'])
+        dataset = get_request_dataset(data, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
         viz_type = data['type']
-        
-        result = None
+        params = {k: v for k, v in data.items() if k not in ('dataset_id', 'type')}
+        key = visualization_key(dataset, viz_type, params)
+        cached = viz_cache.get(key)
+        if cached is not None:
+            return jsonify({'success': True, 'cached': True, 'plot': cached})
+
+        if viz_type in HEAVY_VISUALIZATIONS:
+            return visualize_in_worker(dataset, viz_type, data, key)
+
         error = None
 
         try:
-            if viz_type == 'correlation':
-                result = create_correlation_matrix(df)
-            elif viz_type == 'scatter':
+            width, height = plot_size(data)
+            if viz_type == 'scatter':
                 x_col = data.get('x_column')
                 y_col = data.get('y_column')
+                color_col = data.get('color_column')
                 if not x_col or not y_col:
                     raise ValueError("Both x and y columns must be specified")
-                result = create_scatter_plot(df, x_col, y_col, data.get('color_column'))
-            elif viz_type == 'pca':
-                result = perform_pca_visualization(df)
-            elif viz_type == 'anomalies':
-                column = data.get('column')
-                result = detect_anomalies(df, column)
+                df = dataset_frame(dataset, list(dict.fromkeys(c for c in (x_col, y_col, color_col) if c)))
+                result = create_scatter_plot(df, x_col, y_col, color_col, width, height,
+                                             data.get('x_range'), data.get('y_range'))
             elif viz_type == 'timeseries':
                 time_col = data.get('time_column')
                 value_col = data.get('value_column')
-                result = create_time_series(df, time_col, value_col)
+                df = dataset_frame(dataset, list(dict.fromkeys([time_col, value_col])))
+                result = create_time_series(df, time_col, value_col, width, data.get('x_range'))
             elif viz_type == 'missing_matrix':
-                result = create_missing_data_matrix(df)
-            elif viz_type == 'cluster':
-                columns = data.get('columns', [])
-                n_clusters = data.get('n_clusters', 3)
-                result = create_cluster_visualization(df, columns, n_clusters)
+                # Unloaded datasets are summarized part by part from disk
+                df = dataset.df
+                if df is not None:
+                    result = create_missing_data_matrix(df)
+                else:
+                    result = plot_nullity(summarize_nullity(iter_parts(dataset.path), dataset.columns,
+                                                            dataset.total_rows, MISSING_MATRIX_BLOCKS))
             else:
                 raise ValueError('Unsupported visualization type')
 
             # Serialize numpy arrays and other objects
-            serialized_result = serialize_numpy(result)
+            serialized_result = viz_cache.put(key, serialize_numpy(result))
             
         except Exception as e:
             error = str(e)
@@ -267,35 +583,253 @@ def visualize_data():
         logging.error(f"Error in visualization endpoint: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
-@app.route('/export_report', methods=['POST'])
-def export_report():
+def visualize_in_worker(dataset, viz_type, data, key):
+    """Run a heavy visualization as a job, waiting briefly for it to finish.
+
+    The result is stored in the visualization cache under ``key``.
+    """
+    width, height = plot_size(data)
+    columns = data.get('columns') or []
+    if viz_type == 'anomalies' and not columns and data.get('column'):
+        columns = [data['column']]
+    params = {
+        'columns': columns,
+        'multivariate': bool(data.get('multivariate', False)),
+        'n_clusters': data.get('n_clusters', 3),
+        'k_range': data.get('k_range'),
+        'scale': data.get('scale', True),
+        'method': data.get('method', 'pearson'),
+        'precision': data.get('precision', 'float64'),
+        'width': width,
+        'height': height
+    }
+    if viz_type == 'cluster':
+        error = validate_cluster_params(params)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+    if params['method'] not in ('pearson', 'spearman') or params['precision'] not in ('float32', 'float64'):
+        return jsonify({'success': False, 'error': 'Unsupported correlation method or precision'}), 400
+    missing = [c for c in params['columns'] if c not in dataset.columns]
+    if missing:
+        return jsonify({'success': False, 'error': f"Columns not found: {', '.join(missing)}"}), 400
+    path = datasets.persist(dataset.dataset_id)
+    # Identical requests share a running job; its result is cached when it finishes
+    job = jobs.submit(run_visualization, path, viz_type, params, key=key,
+                      on_done=lambda plot: viz_cache.put(key, plot), kind='visualization')
+    return job_response(job, app.config['VISUALIZE_WAIT_SECONDS'])
+
+def validate_cluster_params(params):
+    if not params['columns']:
+        return 'Select at least one column to cluster'
+    n_clusters = params['n_clusters']
+    if n_clusters != 'auto' and not (isinstance(n_clusters, int) and n_clusters >= 2):
+        return "n_clusters must be an integer of at least 2 or 'auto'"
+    k_range = params['k_range']
+    if k_range is not None and not (isinstance(k_range, list) and len(k_range) == 2
+                                    and all(isinstance(k, int) for k in k_range)
+                                    and 2 <= k_range[0] <= k_range[1] <= app.config['MAX_CLUSTERS']):
+        return f"k_range must be [low, high] with 2 <= low <= high <= {app.config['MAX_CLUSTERS']}"
+    return None
+
+def job_response(job, wait=0):
+    if wait:
+        jobs.wait(job, wait)
+    if job.status == 'done':
+        field = 'plot' if job.kind == 'visualization' else 'result'
+        return jsonify({'success': True, 'job_id': job.job_id, 'status': job.status, field: job.result})
+    if job.status in JOB_FINISHED:
+        return jsonify({
+            'success': False,
+            'job_id': job.job_id,
+            'status': job.status,
+            'error': job.error or f'Job {job.status}'
+        }), 400
+    return jsonify({'success': True, 'pending': True, 'job_id': job.job_id, 'status': job.status}), 202
+
+@app.route('/duplicates', methods=['POST'])
+def find_duplicates():
+    """Count duplicate rows, exactly or approximately.
+
+    ``mode`` ``exact`` (the default) counts rows identical to an earlier
+    row over ``columns`` (all by default), straight from the dataset's row
+    fingerprint index when no columns are given. ``near`` groups rows whose
+    words in ``columns`` have Jaccard similarity of at least ``threshold``
+    using MinHash/LSH; it runs as a job like the heavy visualizations.
+    """
     try:
         data = request.json
-        df = pd.DataFrame(data['data'])
-        
-        # Generate summary statistics
-        summary = {
-            'basic_stats': df.describe().to_dict(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'duplicates': int(df.duplicated().sum()),
-            'data_types': df.dtypes.astype(str).to_dict()
-        }
-        
-        # Create visualizations
-        visualizations = {
-            'correlation': create_correlation_matrix(df),
-            'missing_matrix': create_missing_data_matrix(df)
-        }
-        
-        return jsonify({
-            'success': True,
-            'summary': summary,
-            'visualizations': {k: v.to_json() for k, v in visualizations.items()}
-        })
+        dataset = get_request_dataset(data, load=False)
+        if dataset is None:
+            return dataset_not_found()
+
+        mode = data.get('mode', 'exact')
+        columns = data.get('columns') or None
+        missing = [col for col in columns or [] if col not in dataset.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+
+        if mode == 'exact':
+            if columns is None and dataset.row_index is not None:
+                duplicates = dataset.row_index.duplicates
+            else:
+                duplicates = count_duplicates(dataset_chunks(dataset, columns)())
+            return jsonify({'success': True, 'mode': mode, 'columns': columns or dataset.columns,
+                            'duplicates': duplicates})
+        if mode != 'near':
+            raise ValueError(f"Unsupported duplicate mode: {mode}")
+
+        threshold = float(data.get('threshold', NEAR_THRESHOLD))
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        columns = columns or dataset.columns
+        params = {'columns': columns, 'threshold': threshold}
+        key = visualization_key(dataset, 'near_duplicates', params)
+        cached = viz_cache.get(key)
+        if cached is not None:
+            return jsonify({'success': True, 'cached': True, 'result': cached})
+        path = datasets.persist(dataset.dataset_id)
+        job = jobs.submit(find_near_duplicates, path, columns, threshold, key=key,
+                          on_done=lambda result: viz_cache.put(key, result), kind='duplicates')
+        return job_response(job, app.config['VISUALIZE_WAIT_SECONDS'])
+    except Exception as e:
+        logging.error(f"Error finding duplicates: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    job = jobs.cancel(job_id) if request.method == 'DELETE' else jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    if request.method == 'DELETE':
+        jobs.wait(job, 1)
+    return job_response(job)
+
+def dataset_chunks(dataset, columns=None):
+    """Chunk source over a dataset: slices of the loaded frame, or its Parquet parts."""
+    df = dataset.df
+    if df is not None:
+        if columns is not None:
+            df = df[columns]
+        rows = app.config['INGEST_CHUNK_ROWS']
+        return lambda: (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+    path = datasets.persist(dataset.dataset_id)
+    return lambda: iter_parts(path, columns)
 
+def dataset_schema(dataset):
+    """An empty frame with the dataset's columns and dtypes."""
+    df = dataset.df
+    return df.iloc[:0] if df is not None else read_schema(datasets.persist(dataset.dataset_id))
+
+def report_sections(dataset):
+    """Zero-argument builders for each export report section.
+
+    The summary sections share one profile pass, reusing the profile kept
+    from ingestion when there is one. Plots go through the visualization
+    cache, so a report built after /visualize reuses its results.
+    """
+    chunk_source = dataset_chunks(dataset)
+    df = dataset.df
+    schema = dataset_schema(dataset)
+
+    @once
+    def profile():
+        if dataset.profile is None:
+            dataset.profile = profile_frame(df) if df is not None else profile_chunks(chunk_source())
+        return dataset.profile
+
+    return {
+        'data_types': lambda: schema.dtypes.astype(str).to_dict(),
+        'basic_stats': lambda: describe_profile(profile()),
+        'missing_values': lambda: {col: p.missing for col, p in profile().columns.items()},
+        'duplicates': lambda: (dataset.row_index.duplicates if dataset.row_index is not None
+                               else count_duplicates(chunk_source())),
+        'correlation': lambda: cached_plot(
+            visualization_key(dataset, 'correlation', {}),
+            lambda: plot_correlation(streaming_correlation(chunk_source, numeric_columns(schema)))),
+        'missing_matrix': lambda: cached_plot(
+            visualization_key(dataset, 'missing_matrix', {}),
+            lambda: plot_nullity(summarize_nullity(chunk_source(), list(schema.columns),
+                                                   dataset.total_rows, MISSING_MATRIX_BLOCKS)))
+    }
+
+@app.route('/export_report', methods=['POST'])
+def export_report():
+    """Stream report sections as they finish.
+
+    Sections are built concurrently and written as newline-delimited JSON,
+    or as Server-Sent Events when the client accepts ``text/event-stream``
+    or passes ``?format=sse``. Each event carries the section name, its data
+    or error and the seconds elapsed; a final ``done`` event closes the stream.
+    """
+    try:
+        dataset = get_request_dataset(request.json, load=False)
+        if dataset is None:
+            return dataset_not_found()
+        sections = report_sections(dataset)
     except Exception as e:
         logging.error(f"Error generating report: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+    sse = request.args.get('format') == 'sse' or request.accept_mimetypes.best == 'text/event-stream'
+    events = encode_events(run_sections(sections, app.config['REPORT_WORKERS']),
+                           'sse' if sse else 'ndjson')
+    return Response(stream_with_context(events),
+                    mimetype='text/event-stream' if sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/datasets/<dataset_id>', methods=['GET', 'DELETE'])
+def dataset_info(dataset_id):
+    if request.method == 'DELETE':
+        if not datasets.remove(dataset_id):
+            return dataset_not_found()
+        viz_cache.invalidate(dataset_id)
+        return jsonify({'success': True})
+
+    dataset = datasets.get(dataset_id, load=False)
+    if dataset is None:
+        return dataset_not_found()
+    return jsonify({'success': True, **dataset.info()})
+
+@app.route('/memory', methods=['GET'])
+def memory_report():
+    """Memory use of the stored datasets, or per column for one ``dataset_id``.
+
+    Per-column reports give the dtype and bytes at ingest, before and after
+    compaction, next to the dtype and bytes currently held in memory.
+    """
+    dataset_id = request.args.get('dataset_id')
+    if dataset_id is None:
+        summaries = [{
+            'dataset_id': dataset.dataset_id,
+            'name': dataset.name,
+            'in_memory': dataset.loaded,
+            'memory_bytes': dataset.nbytes,
+            'compaction': memory_summary(dataset.memory_report) if dataset.memory_report else None
+        } for dataset in datasets.list()]
+        return jsonify({'success': True, **datasets.stats(), 'datasets': summaries})
+
+    dataset = datasets.get(dataset_id, load=False)
+    if dataset is None:
+        return dataset_not_found()
+    columns = {col: dict(entry) for col, entry in (dataset.memory_report or {}).items()}
+    df = dataset.df
+    if df is not None:
+        for col in df.columns:
+            entry = columns.setdefault(str(col), {})
+            entry['dtype'] = str(df[col].dtype)
+            entry['bytes'] = column_nbytes(df[col])
+    return jsonify({
+        'success': True,
+        'dataset_id': dataset_id,
+        'in_memory': dataset.loaded,
+        'memory_bytes': dataset.nbytes,
+        'compaction': memory_summary(dataset.memory_report) if dataset.memory_report else None,
+        'columns': columns
+    })
+
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    return jsonify({'success': True, **viz_cache.stats()})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
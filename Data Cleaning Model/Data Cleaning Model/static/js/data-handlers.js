@@ -18,6 +18,7 @@ async function handleFileUpload(file) {
         
         // Ensure data structure
         const processedData = {
+            dataset_id: data.dataset_id,
             preview: sanitizeData(data.preview || []),
             columns: data.columns || [],
             analysis: data.analysis || {},
@@ -51,5 +52,22 @@ function sanitizeData(data) {
     });
 }
 
+// Fetch a window of rows from the server-side dataset as column arrays
+async function fetchRows(offset, limit, columns = []) {
+    if (!currentData?.dataset_id) return null;
+
+    const params = new URLSearchParams({
+        dataset_id: currentData.dataset_id,
+        offset: offset,
+        limit: limit
+    });
+    if (columns.length) params.set('columns', columns.join(','));
+
+    const response = await fetch(`/rows?${params.toString()}`);
+    const data = await response.json();
+    if (!data.success) throw new Error(data.error || 'Failed to fetch rows');
+    return data;
+}
+
 // Move all your data operation functions here (applyMissingDataOperation, removeDuplicates, changeDataType, etc.)
 // ...existing code for data operations...
@@ -41,6 +41,7 @@ async function handleFileUpload(file) {
         originalData = {...data};
         
         updateUI(data);
+        updateSheetSelector(data);
         showSuccess('File uploaded and analyzed successfully');
     } catch (error) {
         showError(error.message);
@@ -48,6 +49,44 @@ async function handleFileUpload(file) {
     }
 }
 
+// Workbooks with several sheets can switch between them from the Excel cache
+function updateSheetSelector(data) {
+    const select = document.getElementById('sheetSelect');
+    if (!select) return;
+
+    const sheets = data.sheets || [];
+    select.classList.toggle('hidden', sheets.length < 2);
+    select.innerHTML = sheets.map(sheet =>
+        `<option value="${sheet}" ${sheet === data.sheet ? 'selected' : ''}>${sheet}</option>`
+    ).join('');
+}
+
+async function switchSheet(sheet) {
+    if (!currentData?.workbook) return;
+
+    showLoadingState(`Opening sheet ${sheet}...`);
+
+    try {
+        const response = await fetch('/sheet', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ workbook: currentData.workbook, sheet })
+        });
+        const data = await response.json();
+
+        if (!data.success) throw new Error(data.error);
+
+        currentData = data;
+        originalData = {...data};
+
+        updateUI(data);
+        updateSheetSelector(data);
+    } catch (error) {
+        showError(error.message);
+        console.error('Sheet error:', error);
+    }
+}
+
 // UI Update Functions
 function updateUI(data) {
     if (!data?.preview) {
@@ -278,22 +317,13 @@ async function applyMissingDataOperation() {
     }
 
     try {
-        // Sanitize data before sending
-        const cleanData = currentData.preview.map(row => {
-            const cleanRow = {};
-            for (const [key, value] of Object.entries(row)) {
-                cleanRow[key] = value === "NaN" || value === null ? null : value;
-            }
-            return cleanRow;
-        });
-
         const response = await fetch('/clean', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: cleanData,
+                dataset_id: currentData.dataset_id,
                 operations: [{
                     type: operation,
                     column: column,
@@ -359,7 +389,7 @@ async function removeDuplicates() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview,
+                dataset_id: currentData.dataset_id,
                 operations: operations
             })
         });
@@ -418,7 +448,7 @@ async function changeDataType() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview,
+                dataset_id: currentData.dataset_id,
                 operations: operations
             })
         });
@@ -468,7 +498,7 @@ async function downloadData() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview
+                dataset_id: currentData.dataset_id
             })
         });
 
@@ -477,7 +507,9 @@ async function downloadData() {
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.href = url;
-            a.download = 'cleaned_data.csv';
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const match = disposition.match(/filename=([^;]+)/);
+            a.download = match ? match[1] : 'cleaned_data.csv';
             document.body.appendChild(a);
             a.click();
             window.URL.revokeObjectURL(url);
@@ -46,7 +46,7 @@ function generateVisualization() {
     // Prepare visualization request
     const request = {
         type: visType,
-        data: currentData.preview,
+        dataset_id: currentData.dataset_id,
         column: selectedColumn
     };
 
@@ -59,6 +59,7 @@ function generateVisualization() {
         body: JSON.stringify(request)
     })
     .then(response => response.json())
+    .then(result => result.pending ? pollJob(result.job_id) : result)
     .then(result => {
         if (result.success && result.plot) {
             // Clear previous visualization
@@ -77,6 +78,16 @@ function generateVisualization() {
     });
 }
 
+// Poll a background visualization job until it finishes
+async function pollJob(jobId, interval = 1000) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        const response = await fetch(`/jobs/${jobId}`);
+        const result = await response.json();
+        if (!result.pending) return result;
+    }
+}
+
 function updateVisualizationColumns(columns) {
     const columnSelect = document.getElementById('visualizationColumn');
     columnSelect.innerHTML = '<option value="">Select Column</option>';
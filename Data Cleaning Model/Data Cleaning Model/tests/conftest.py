@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+# The repository root, for the modules the apps share
+sys.path.insert(0, os.path.dirname(os.path.dirname(APP_DIR)))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The cleaning app, running with its folders in a scratch directory."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(cwd)
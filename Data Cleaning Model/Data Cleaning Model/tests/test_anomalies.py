@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from utils.anomalies import MAD_THRESHOLD, isolation_forest, scan_anomalies
+from utils.visualization import detect_anomalies
+
+
+def _frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'normal': rng.normal(size=rows), 'skewed': rng.lognormal(size=rows),
+                       'flat': np.ones(rows)})
+    df.loc[df.index[::97], 'normal'] = rng.normal(scale=20, size=len(df.index[::97]))
+    df.loc[df.index[::13], 'skewed'] = np.nan
+    return df
+
+
+def _chunks(df, rows=700):
+    return lambda: (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def _exact(series):
+    series = series.dropna()
+    q1, median, q3 = series.quantile([0.25, 0.5, 0.75])
+    mad = (series - median).abs().median()
+    iqr = ((series < q1 - 1.5 * (q3 - q1)) | (series > q3 + 1.5 * (q3 - q1))).sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (0.6745 * (series - median).abs() / (mad or np.nan)).to_numpy()
+    return {'median': median, 'mad': mad, 'iqr': iqr, 'mad_count': int((z > MAD_THRESHOLD).sum())}
+
+
+def test_small_columns_match_pandas_exactly():
+    df = _frame(2000)
+    passes = []
+
+    def chunk_source():
+        passes.append(1)
+        return _chunks(df)()
+
+    results = scan_anomalies(chunk_source, list(df.columns))
+    assert len(passes) == 2
+    for column in df.columns:
+        exact = _exact(df[column])
+        result = results[column]
+        assert np.isclose(result['median'], exact['median']) and np.isclose(result['mad'], exact['mad'])
+        assert result['iqr_outliers']['count'] == exact['iqr']
+        assert result['mad_outliers']['count'] == exact['mad_count']
+    # Row positions point at the flagged values
+    rows = results['normal']['iqr_outliers']['rows']
+    assert len(rows) == min(results['normal']['iqr_outliers']['count'], 100)
+    np.testing.assert_array_equal(df['normal'].to_numpy()[rows], results['normal']['iqr_outliers']['values'])
+    assert results['flat']['mad_outliers']['count'] == 0
+
+
+def test_sketched_fences_are_close_and_counts_are_exact_for_them():
+    df = _frame(60000, seed=1)
+    results = scan_anomalies(_chunks(df, 5000), ['normal', 'skewed'])
+    for column in ('normal', 'skewed'):
+        values = df[column].dropna().to_numpy()
+        result = results[column]
+        ranks = np.searchsorted(np.sort(values), [result['q1'], result['median'], result['q3']]) / len(values)
+        np.testing.assert_allclose(ranks, [0.25, 0.5, 0.75], atol=0.01)
+        deviations = np.abs(values - result['median'])
+        assert abs(np.mean(deviations <= result['mad']) - 0.5) < 0.02
+        lower, upper = result['iqr_outliers']['lower'], result['iqr_outliers']['upper']
+        assert result['iqr_outliers']['count'] == ((values < lower) | (values > upper)).sum()
+        assert result['mad_outliers']['count'] == (0.6745 * deviations / result['mad'] > MAD_THRESHOLD).sum()
+
+
+def test_isolation_forest_flags_the_planted_rows():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(5000, 3)), columns=list('abc'))
+    df.loc[[10, 2000, 4000], ['a', 'b', 'c']] = 12.0
+    result = isolation_forest(_chunks(df), list('abc'), len(df), sample_rows=5000)
+    assert result['sampled_rows'] == 5000 and set(result['rows'][:3]) == {10, 2000, 4000}
+
+
+def test_chart_carries_the_full_results():
+    df = _frame(2000)
+    plot = detect_anomalies(df, ['normal', 'skewed'])
+    meta = plot['layout']['meta']
+    assert meta['rows'] == 2000 and meta['columns']['normal']['iqr_outliers']['count'] == _exact(df['normal'])['iqr']
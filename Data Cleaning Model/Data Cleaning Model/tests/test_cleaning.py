@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from utils.cleaning import compile_plan
+from vizpro_common.dtypes import compact_frame
+from utils.visualization import create_scatter_plot
+
+
+def _raw():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.random(200), 'y': rng.random(200), 'n': rng.random(200).astype(str),
+                       'g': rng.choice(['a', 'b', 'c'], 200)})
+    for col, step in (('x', 3), ('y', 5), ('n', 7), ('g', 4)):
+        df.loc[df.index[::step], col] = None
+    return df
+
+
+def test_plan_matches_running_operations_one_by_one():
+    df = _raw()
+    operations = [
+        {'type': 'fill_median', 'column': 'x'},
+        {'type': 'interpolate', 'column': 'n'},
+        {'type': 'fill_mode', 'column': 'g'},
+        {'type': 'remove_rows', 'column': 'y'},
+        {'type': 'fill_mean', 'column': 'x'},
+        {'type': 'bfill', 'column': 'n'},
+    ]
+    expected = df.copy()
+    expected['x'] = expected['x'].fillna(expected['x'].median())
+    expected['n'] = pd.to_numeric(expected['n'], errors='coerce').interpolate(method='linear')
+    expected['g'] = expected['g'].fillna(expected['g'].mode()[0])
+    expected = expected.dropna(subset=['y'])
+    expected['n'] = expected['n'].bfill()
+
+    plan = compile_plan(df, operations)
+    assert [kind for kind, _ in plan.stages] == ['columns', 'rows', 'columns']
+    pd.testing.assert_frame_equal(plan.execute(df), expected)
+    assert plan.failed == [] and [t['index'] for t in plan.timings] == list(range(len(operations)))
+    # The stored frame is never modified
+    pd.testing.assert_frame_equal(df, _raw())
+
+
+def test_operations_on_one_column_are_fused_into_one_step():
+    plan = compile_plan(_raw(), [{'type': 'fill_mean', 'column': 'x'}, {'type': 'ffill', 'column': 'y'},
+                                 {'type': 'fill_value', 'column': 'x', 'value': 0}])
+    assert len(plan.stages) == 1 and [i for i, _ in plan.stages[0][1]['x']] == [0, 2]
+
+
+def test_invalid_operations_are_reported():
+    df = _raw()
+    plan = compile_plan(df, [{'type': 'fill_mean'}, {'type': 'fill_mean', 'column': 'nope'},
+                             {'type': 'explode', 'column': 'x'}, {'type': 'fill_mean', 'column': 'g'}])
+    plan.execute(df)
+    assert [f['error'] for f in plan.failed[:3]] == ['Missing required parameters', 'Column not found',
+                                                      'Unsupported operation']
+    assert plan.failed[3] == {'type': 'fill_mean', 'column': 'g', 'error': 'Cannot calculate mean of non-numeric data'}
+
+
+def _frame():
+    df = pd.DataFrame({'x': np.arange(100.0), 'y': np.arange(100.0) * 2, 'c': ['a', 'b', None, 'a'] * 25})
+    df, _ = compact_frame(df)
+    assert isinstance(df['c'].dtype, pd.CategoricalDtype)
+    return df
+
+
+def test_fill_value_drops_unused_new_category():
+    df = _frame()
+    plan = compile_plan(df, [{'type': 'fill_mode', 'column': 'c'},
+                             {'type': 'fill_value', 'column': 'c', 'value': 'new'}])
+    cleaned = plan.execute(df)
+    assert plan.failed == []
+    assert list(cleaned['c'].cat.categories) == ['a', 'b']
+    assert create_scatter_plot(cleaned, 'x', 'y', 'c')['data']
+
+
+def test_remove_rows_drops_unused_categories():
+    df = _frame()
+    df.loc[df['c'] == 'b', 'c'] = None
+    cleaned = compile_plan(df, [{'type': 'remove_rows', 'column': 'c'}]).execute(df)
+    assert list(cleaned['c'].cat.categories) == ['a']
+
+
+def test_zoomed_scatter_with_missing_category():
+    df = _frame()
+    # Only rows with category 'a' fall into the window
+    assert create_scatter_plot(df, 'x', 'y', 'c', x_range=[0, 0])['data']
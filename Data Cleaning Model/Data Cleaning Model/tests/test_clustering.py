@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+from utils import clustering
+from utils.clustering import assign, best_k, evaluate_k, fit_model
+from utils.visualization import create_cluster_visualization
+
+
+def _blobs(rows):
+    return make_blobs(n_samples=rows, centers=4, cluster_std=0.5, random_state=0)
+
+
+def test_silhouette_picks_the_true_number_of_clusters():
+    values, _ = _blobs(3000)
+    scores = evaluate_k(values, range(2, 8))
+    assert [score['k'] for score in scores] == list(range(2, 8))
+    inertias = [score['inertia'] for score in scores]
+    assert inertias == sorted(inertias, reverse=True)
+    assert best_k(scores) == 4
+
+
+def test_large_inputs_are_fit_on_a_sample_and_assigned_in_batches(monkeypatch):
+    monkeypatch.setattr(clustering, 'FULL_FIT_ROWS', 1000)
+    monkeypatch.setattr(clustering, 'SAMPLE_ROWS', 2000)
+    values, truth = _blobs(12000)
+    model = fit_model(values, 4)
+    labels = assign(model, values, batch_rows=1000)
+    assert len(labels) == len(values)
+    np.testing.assert_array_equal(labels, model.predict(values))
+    assert adjusted_rand_score(truth, labels) > 0.99
+
+
+def test_cluster_plot_reports_sizes_and_scores():
+    values, _ = _blobs(600)
+    df = pd.DataFrame(values, columns=['a', 'b'])
+    df.loc[0, 'a'] = None
+    layout = create_cluster_visualization(df, ['a', 'b'], n_clusters='auto', k_range=[2, 5])['layout']
+    assert layout['meta']['rows'] == 599 and layout['meta']['n_clusters'] == 4
+    assert sum(layout['meta']['cluster_sizes']) == 599 and len(layout['meta']['k_scores']) == 4
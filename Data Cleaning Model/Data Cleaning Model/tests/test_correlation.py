@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from vizpro_common.correlation import CorrelationStats, frame_correlation
+from utils.correlation import streaming_correlation
+
+
+def _frame(missing=True):
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=2000)
+    df = pd.DataFrame({
+        'a': base * 1000 + 5e6,
+        'b': base + rng.normal(scale=0.5, size=2000),
+        'c': -base + rng.normal(scale=2, size=2000),
+        'd': rng.exponential(size=2000),
+        'e': rng.normal(size=2000),
+        'constant': np.ones(2000)
+    })
+    if missing:
+        df = df.mask(rng.random(df.shape) < 0.15)
+    return df
+
+
+def _chunks(df, rows=301):
+    return lambda: (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def test_blocked_chunked_pearson_matches_pandas_pairwise():
+    df = _frame()
+    stats = CorrelationStats(df.columns, block=4)
+    for chunk in _chunks(df)():
+        stats.update_frame(chunk)
+    np.testing.assert_allclose(stats.matrix(), df.corr().to_numpy(), atol=1e-9, equal_nan=True)
+    assert np.isnan(stats.frame()['constant']).all()
+
+
+def test_float32_products_stay_close():
+    df = _frame()
+    result = frame_correlation(df, dtype=np.float32).matrix()
+    np.testing.assert_allclose(result, df.corr().to_numpy(), atol=1e-4, equal_nan=True)
+
+
+def test_spearman_in_memory_and_streaming():
+    df = _frame(missing=False).drop(columns='constant')
+    expected = df.corr(method='spearman').to_numpy()
+    np.testing.assert_allclose(frame_correlation(df, 'spearman').matrix(), expected, atol=1e-12)
+    streamed = streaming_correlation(_chunks(df), list(df.columns), 'spearman').matrix()
+    np.testing.assert_allclose(streamed, expected, atol=0.01)
+
+
+def test_streaming_pearson_and_top_pairs():
+    df = _frame()
+    stats = streaming_correlation(_chunks(df), list(df.columns))
+    expected = df.corr()
+    np.testing.assert_allclose(stats.matrix(), expected.to_numpy(), atol=1e-9, equal_nan=True)
+
+    pairs = [(i, j, expected.loc[i, j]) for n, i in enumerate(df.columns) for j in df.columns[n + 1:]
+             if not np.isnan(expected.loc[i, j])]
+    pairs.sort(key=lambda pair: -abs(pair[2]))
+    top = stats.top_pairs(3)
+    assert [(p['column_1'], p['column_2']) for p in top] == [(i, j) for i, j, _ in pairs[:3]]
+    np.testing.assert_allclose([p['correlation'] for p in top], [r for _, _, r in pairs[:3]], atol=1e-9)
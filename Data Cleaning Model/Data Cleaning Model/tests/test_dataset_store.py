@@ -0,0 +1,82 @@
+import io
+import os
+import threading
+import pandas as pd
+from utils import dataset_store
+from utils.dataset_store import DatasetStore, frame_nbytes
+
+
+def _frame(seed, rows=1000):
+    return pd.DataFrame({'x': range(seed, seed + rows), 's': [f'v{i % 7}' for i in range(rows)]})
+
+
+def _same_rows(df, expected):
+    assert df['x'].tolist() == expected['x'].tolist() and df['s'].astype(str).tolist() == expected['s'].tolist()
+
+
+def test_least_recently_used_datasets_spill_and_reload(tmp_path):
+    frames = [_frame(i) for i in range(3)]
+    store = DatasetStore(2 * frame_nbytes(frames[0]) + 1, str(tmp_path), chunk_rows=300)
+    first, second = store.add(frames[0]), store.add(frames[1])
+    store.get(first)
+    third = store.add(frames[2])
+    assert not store.get(second, load=False).loaded and store.stats()['loaded'] == 2
+    assert len([name for name in os.listdir(store.get(second, load=False).path) if name.endswith('.parquet')]) == 4
+    # Reloading the spilled dataset unloads the least recently used one again
+    _same_rows(store.get(second).df, frames[1])
+    assert not store.get(first, load=False).loaded and store.get(third, load=False).loaded
+
+
+def test_newest_dataset_is_kept_over_budget(tmp_path):
+    store = DatasetStore(0, str(tmp_path), chunk_rows=300)
+    dataset_id = store.add(_frame(0))
+    assert store.get(dataset_id, load=False).loaded and store.stats()['datasets'] == 1
+
+
+def test_replace_bumps_the_version(tmp_path):
+    store = DatasetStore(1 << 30, str(tmp_path), chunk_rows=300)
+    dataset_id = store.add(_frame(0), name='a.csv')
+    cleaned = _frame(1, rows=10)
+    dataset = store.replace(dataset_id, cleaned)
+    assert dataset.version == 2 and dataset.df is cleaned and dataset.info()['rows'] == 10
+
+
+
+def test_reload_does_not_hold_the_lock_and_yields_to_a_replace(tmp_path, monkeypatch):
+    store = DatasetStore(0, str(tmp_path), chunk_rows=300)
+    first = store.add(_frame(0))
+    store.add(_frame(1))
+    assert not store.get(first, load=False).loaded
+    cleaned = _frame(2, rows=10)
+    read_dataset = dataset_store.read_dataset
+
+    def slow_read(path):
+        # Another request replaces the dataset while its parts are being read
+        worker = threading.Thread(target=store.replace, args=(first, cleaned))
+        worker.start()
+        worker.join(5)
+        assert not worker.is_alive()
+        return read_dataset(path)
+
+    monkeypatch.setattr(dataset_store, 'read_dataset', slow_read)
+    dataset = store.get(first)
+    assert dataset.df is cleaned and dataset.version == 2
+
+def test_remove_deletes_the_parts(tmp_path):
+    store = DatasetStore(0, str(tmp_path), chunk_rows=300)
+    first = store.add(_frame(0))
+    store.add(_frame(1))
+    path = store.get(first, load=False).path
+    assert os.path.exists(path)
+    assert store.remove(first) and not os.path.exists(path) and store.get(first) is None
+
+
+def test_clean_works_on_the_stored_dataset(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'x': [1.0, None, 3.0] * 10, 'g': list('abc') * 10})
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')}).get_json()
+    assert upload['total_rows'] == 30
+    cleaned = client.post('/clean', json={'dataset_id': upload['dataset_id'],
+                                          'operations': [{'type': 'fill_value', 'column': 'x', 'value': 0}]}).get_json()
+    assert cleaned['version'] == 2 and cleaned['missing_data']['x'] == 0
+    assert client.post('/clean', json={'dataset_id': 'missing', 'operations': []}).status_code == 404
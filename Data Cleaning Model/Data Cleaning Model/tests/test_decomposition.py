@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+from utils.decomposition import fit_in_memory, fit_incremental, project_chunks
+from utils.downsample import GridDensity
+
+
+def _low_rank(rows, columns, rank=3, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(rows, rank)) * [4, 2, 1][:rank] @ rng.normal(size=(rank, columns))
+    return values + rng.normal(scale=0.1, size=(rows, columns))
+
+
+def _exact(values, n_components):
+    return PCA(n_components=n_components, svd_solver='full').fit(StandardScaler().fit_transform(values))
+
+
+def test_wide_data_uses_randomized_svd_with_the_same_variance():
+    values = _low_rank(2000, 150)
+    pca, projected = fit_in_memory(values)
+    assert pca.svd_solver == 'randomized' and projected.shape == (2000, 10)
+    np.testing.assert_allclose(pca.explained_variance_ratio_, _exact(values, 10).explained_variance_ratio_, atol=1e-3)
+
+
+def test_incomplete_rows_are_skipped():
+    values = _low_rank(500, 6)
+    values[::10, 2] = np.nan
+    pca, projected = fit_in_memory(values)
+    complete = values[~np.isnan(values).any(axis=1)]
+    assert pca.svd_solver == 'full' and len(projected) == len(complete)
+    np.testing.assert_allclose(pca.explained_variance_ratio_, _exact(complete, 6).explained_variance_ratio_)
+
+
+def test_incremental_fit_over_chunks_matches_pca():
+    values = _low_rank(6000, 20)
+    values[::50, 0] = np.nan
+    df = pd.DataFrame(values, columns=[f'c{i}' for i in range(20)])
+    # Chunks smaller than the number of components are carried into the next one
+    sizes = [5, 995, 3, 997] + [1000] * 4
+    bounds = np.cumsum([0] + sizes)
+    chunks = lambda: (df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]))
+    scaler, pca = fit_incremental(chunks, list(df.columns))
+    complete = values[~np.isnan(values).any(axis=1)]
+    exact = _exact(complete, 10)
+    np.testing.assert_allclose(scaler.mean_, complete.mean(axis=0))
+    np.testing.assert_allclose(pca.explained_variance_ratio_[:3], exact.explained_variance_ratio_[:3], atol=1e-3)
+    projected = np.vstack(list(project_chunks(chunks, list(df.columns), scaler, pca)))
+    assert projected.shape == (len(complete), 2)
+    # Principal axes are only defined up to sign
+    expected = exact.transform(StandardScaler().fit_transform(complete))[:, :2]
+    np.testing.assert_allclose(np.abs(projected), np.abs(expected), atol=0.05)
+
+
+def test_grid_density_counts_every_point_and_keeps_outliers():
+    rng = np.random.default_rng(0)
+    grid = GridDensity((-1, 1), (-1, 1), 20, 10, max_outliers=50)
+    total = 0
+    for _ in range(5):
+        x, y = rng.normal(scale=0.6, size=(2, 3000))
+        grid.update(x, y)
+        total += len(x)
+    result = grid.result()
+    kept = (result['count'] == 1) & ((result['x'].abs() > 1) | (result['y'].abs() > 1))
+    assert grid.outlier_count > 50 and kept.sum() == 50
+    assert result['count'].sum() == total - grid.outlier_count + 50
+    assert (result.loc[~kept, ['x', 'y']].abs() <= 1).all().all()
@@ -0,0 +1,77 @@
+import io
+import time
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from utils.dedup import RowHashIndex, count_duplicates, near_duplicates
+
+
+def _frame(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'a': rng.integers(0, 4, n), 'b': rng.choice(['x', 'y', None], n),
+                         'c': rng.integers(0, 3, n).astype(float)})
+
+
+def test_duplicate_counts_match_pandas():
+    df = _frame()
+    assert RowHashIndex.from_frame(df).duplicates == df.duplicated().sum()
+    assert count_duplicates(df.iloc[i:i + 70] for i in range(0, len(df), 70)) == df.duplicated().sum()
+    assert count_duplicates(df[['a']].iloc[i:i + 70] for i in range(0, len(df), 70)) == df.duplicated(['a']).sum()
+    assert count_duplicates([]) == 0
+
+
+def test_update_matches_a_fresh_index():
+    old = _frame(seed=1)
+    index = RowHashIndex.from_frame(old)
+    new = old[old['a'] != 0].copy()
+    new['b'] = new['b'].fillna('x')
+    new.loc[new.index[::5], 'c'] = 9.0
+    index.update(old, new, {'b', 'c'})
+    fresh = RowHashIndex.from_frame(new)
+    assert index.duplicates == fresh.duplicates == new.duplicated().sum()
+    np.testing.assert_array_equal(index.keys, fresh.keys)
+    np.testing.assert_array_equal(index.counts, fresh.counts)
+    pd.testing.assert_series_equal(index.hashes, fresh.hashes)
+
+
+def _jaccard(a, b):
+    a, b = set(a.lower().split()), set(b.lower().split())
+    return len(a & b) / len(a | b)
+
+
+def test_near_duplicates_match_exact_jaccard():
+    rng = np.random.default_rng(2)
+    words = [f'w{i}' for i in range(5000)]
+    texts = [' '.join(rng.choice(words, 30, replace=False)) for _ in range(300)]
+    for i in range(0, 60, 3):
+        # One copy differs only in case, another in one word out of 30
+        texts[i + 1] = texts[i].upper()
+        changed = texts[i].split()
+        changed[0] = 'other'
+        texts[i + 2] = ' '.join(changed)
+    df = pd.DataFrame({'text': texts})
+    result = near_duplicates(lambda: (df.iloc[i:i + 50] for i in range(0, len(df), 50)), ['text'])
+
+    pairs = [(i, j) for i, j in combinations(range(len(texts)), 2) if _jaccard(texts[i], texts[j]) >= 0.8]
+    exact = {row for pair in pairs for row in pair}
+    assert result['rows_scanned'] == result['rows_compared'] == 300
+    assert result['groups'] == 20 and result['duplicate_rows'] == len(exact) - 20
+    assert all(group['size'] == 3 for group in result['sample_groups'])
+    assert {row for group in result['sample_groups'] for row in group['rows']} == exact
+
+
+def test_duplicates_route(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'name': ['Ann Lee', 'ann lee', 'Bob Ray', 'Ann Lee'], 'n': [1, 2, 3, 1]})
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    dataset_id = upload.get_json()['dataset_id']
+    exact = client.post('/duplicates', json={'dataset_id': dataset_id}).get_json()
+    assert exact['duplicates'] == df.duplicated().sum() == 1
+    subset = client.post('/duplicates', json={'dataset_id': dataset_id, 'columns': ['n']}).get_json()
+    assert subset['duplicates'] == df.duplicated(['n']).sum()
+    body = client.post('/duplicates', json={'dataset_id': dataset_id, 'mode': 'near', 'columns': ['name']}).get_json()
+    while body.get('pending'):
+        time.sleep(0.05)
+        body = client.get(f"/jobs/{body['job_id']}").get_json()
+    assert body['result']['groups'] == 1 and body['result']['sample_groups'][0]['rows'] == [0, 1, 3]
+    assert client.post('/duplicates', json={'dataset_id': dataset_id, 'columns': ['zzz']}).status_code == 400
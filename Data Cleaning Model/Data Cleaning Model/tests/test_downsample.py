@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from utils.downsample import density_bins, filter_range, lttb
+
+
+def _reference_lttb(x, y, threshold):
+    """The original per-point Largest-Triangle-Three-Buckets loop."""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[end:next_end]) / (next_end - end)
+        avg_y = sum(y[end:next_end]) / (next_end - end)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(0)
+    for n, threshold in [(1000, 50), (997, 101), (30, 7), (10, 3)]:
+        x = np.sort(rng.random(n))
+        y = np.cumsum(rng.normal(size=n))
+        assert lttb(x, y, threshold).tolist() == _reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+def test_short_series_and_datetimes():
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    x = pd.Series(pd.date_range('2024-01-01', periods=500, freq='h'))
+    y = pd.Series(np.sin(np.arange(500) / 10))
+    indices = lttb(x, y, 40)
+    assert len(indices) == 40 and indices[0] == 0 and indices[-1] == 499
+    assert (np.diff(indices) > 0).all()
+    assert indices.tolist() == lttb(x.astype('int64').to_numpy(), y.to_numpy(), 40).tolist()
+
+
+def test_density_bins_keep_every_point_and_the_outliers():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'x': rng.normal(size=20000), 'y': rng.normal(size=20000),
+                       'g': rng.choice(['a', 'b'], 20000)})
+    df.loc[0, ['x', 'y']] = [40.0, -40.0]
+    binned = density_bins(df, 'x', 'y', 400, 300, color='g')
+    assert binned['count'].sum() == len(df) and len(binned) <= 2 * (400 // 4) * (300 // 4)
+    assert ((binned['x'] == 40.0) & (binned['y'] == -40.0) & (binned['count'] == 1)).any()
+    for group, rows in df.groupby('g'):
+        assert binned.loc[binned['color'] == group, 'count'].sum() == len(rows)
+
+
+def test_filter_range_is_inclusive():
+    df = pd.DataFrame({'x': [0.5, 1.0, 2.0, 3.0, 'n/a'], 't': pd.date_range('2024-01-01', periods=5)})
+    assert filter_range(df, 'x', [1, 2]).index.tolist() == [1, 2]
+    assert filter_range(df, 't', ['2024-01-02', '2024-01-03']).index.tolist() == [1, 2]
+    assert filter_range(df, 'x', None) is df
@@ -0,0 +1,49 @@
+import io
+import numpy as np
+import pandas as pd
+from vizpro_common.dtypes import compact_column, compact_frame, memory_summary
+
+
+def test_columns_shrink_without_losing_values():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'small_int': rng.integers(0, 100, 1000),
+        'half': rng.integers(0, 8, 1000) / 2,
+        'precise': rng.random(1000),
+        'label': rng.choice(['red', 'green', None], 1000),
+        'text': [f'row {i}' for i in range(1000)],
+        'date': pd.date_range('2024-01-01', periods=1000).strftime('%Y-%m-%d'),
+        'mixed': [1, 'a'] * 500,
+        'flag': [True, False] * 500
+    })
+    original = df.copy()
+    compacted, report = compact_frame(df.copy())
+    dtypes = compacted.dtypes.astype(str).to_dict()
+    assert dtypes == {'small_int': 'int8', 'half': 'float32', 'precise': 'float64', 'label': 'category',
+                      'text': 'string', 'date': 'datetime64[ns]', 'mixed': 'object', 'flag': 'bool'}
+    for col in ['small_int', 'half', 'precise', 'flag', 'mixed']:
+        assert (compacted[col].to_numpy() == original[col].to_numpy()).all()
+    for col in ['label', 'text']:
+        assert compacted[col].astype(object).where(compacted[col].notna(), None).tolist() == original[col].tolist()
+    assert (compacted['date'] == pd.to_datetime(original['date'])).all()
+    assert report['small_int']['bytes_after'] < report['small_int']['bytes_before']
+    assert report['mixed']['bytes_after'] == report['mixed']['bytes_before']
+    assert memory_summary(report)['saved_bytes'] > 0
+
+
+def test_options_keep_dates_and_free_text():
+    text = pd.Series([f'row {i}' for i in range(10)])
+    assert compact_column(text, arrow_strings=False) is text
+    dates = pd.Series(['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01'])
+    assert compact_column(dates, parse_dates=False).dtype == 'string'
+    assert compact_column(pd.Series(['2024-01-01', 'not a date', 'x', 'y'])).dtype != 'datetime64[ns]'
+
+
+def test_memory_report_lists_every_column(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'n': range(100), 'g': ['a', 'b'] * 50})
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    report = client.get(f"/memory?dataset_id={upload.get_json()['dataset_id']}").get_json()
+    assert report['columns']['n']['dtype'] == 'int8' and report['columns']['g']['dtype'] == 'category'
+    assert report['columns']['n']['dtype_before'] == 'int64'
+    assert report['compaction']['bytes_after'] < report['compaction']['bytes_before']
@@ -0,0 +1,101 @@
+import io
+import os
+import re
+import time
+import zipfile
+import openpyxl
+import pandas as pd
+from utils.excel import MIN_IDLE_SECONDS, WorkbookCache, cache_sheet, folder_size, iter_sheet_chunks
+from utils.ingest import read_dataset
+
+
+def _book(path, sheets):
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def _workbook(path, rows, dimensions=True):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+    if not dimensions:
+        # Some writers leave out <dimension>, so openpyxl reads rows at their own width
+        with zipfile.ZipFile(path) as z:
+            files = {name: z.read(name) for name in z.namelist()}
+        sheet = 'xl/worksheets/sheet1.xml'
+        files[sheet] = re.sub(rb'<dimension[^>]*/>', b'', files[sheet])
+        with zipfile.ZipFile(path, 'w') as z:
+            for name, data in files.items():
+                z.writestr(name, data)
+    return str(path)
+
+
+def _read(path, chunk_rows=2):
+    return pd.concat(list(iter_sheet_chunks(path, 'Sheet', chunk_rows)), ignore_index=True)
+
+
+def test_header_only_sheet_keeps_its_columns(tmp_path):
+    chunks = list(iter_sheet_chunks(_workbook(tmp_path / 'w.xlsx', [['a', 'b']]), 'Sheet', 2))
+    assert len(chunks) == 1 and list(chunks[0].columns) == ['a', 'b'] and len(chunks[0]) == 0
+
+
+def test_cells_beyond_the_header_are_kept(tmp_path):
+    rows = [['a', 'b'], [1, 2, 3], [4, 5], [None, None], [6, 7, 8, 9]]
+    for dimensions in (True, False):
+        df = _read(_workbook(tmp_path / f'w{dimensions}.xlsx', rows, dimensions))
+        expected = pd.read_excel(tmp_path / f'w{dimensions}.xlsx').dropna(how='all').reset_index(drop=True)
+        assert list(df.columns) == ['a', 'b', 'Unnamed: 2', 'Unnamed: 3']
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_prune_drops_least_recently_used_idle_workbooks(tmp_path):
+    cache = WorkbookCache(str(tmp_path / 'cache'))
+    digests = [cache.add(_workbook(tmp_path / f'w{i}.xlsx', [['a'], [i]]))[0] for i in range(3)]
+    idle = time.time() - MIN_IDLE_SECONDS - 60
+    for age, digest in enumerate(digests[:2]):
+        os.utime(cache.workbook_path(digest), (idle - age, idle - age))
+    cache.disk_budget = folder_size(cache.cache_folder) - 1
+    assert cache.prune() == 1
+    assert cache.sheets(digests[1]) is None and cache.sheets(digests[0]) is not None
+    # Recently used workbooks are kept even over budget
+    cache.disk_budget = 0
+    assert cache.prune() == 1 and cache.sheets(digests[2]) is not None
+
+
+def _rows(n):
+    return [['id', 'value', 'label', 'value']] + [[i, i / 4, f'l{i % 3}', -i] for i in range(n)]
+
+
+def test_sheets_stream_in_chunks_like_read_excel(tmp_path):
+    path = _book(tmp_path / 'w.xlsx', {'data': _rows(25)})
+    chunks = list(iter_sheet_chunks(path, 'data', 10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_excel(path, sheet_name='data'))
+
+
+def test_workbooks_are_cached_by_content(tmp_path):
+    cache = WorkbookCache(str(tmp_path / 'cache'))
+    sheets = {'first': _rows(5), 'second': _rows(8)}
+    digest, names = cache.add(_book(tmp_path / 'a.xlsx', sheets))
+    again, _ = cache.add(_book(tmp_path / 'b.xlsx', sheets))
+    assert names == ['first', 'second'] and again == digest and not (tmp_path / 'b.xlsx').exists()
+    assert not cache.is_cached(digest, 1)
+    cache_sheet(cache.source_path(digest), 'second', cache.sheet_path(digest, 1), 3)
+    assert cache.is_cached(digest, 1) and len(read_dataset(cache.sheet_path(digest, 1))) == 8
+
+
+def test_switching_sheets_reads_the_cache(app_module, tmp_path):
+    client = app_module.app.test_client()
+    with open(_book(tmp_path / 'w.xlsx', {'first': _rows(5), 'second': _rows(8)}), 'rb') as f:
+        upload = client.post('/upload', data={'file': (io.BytesIO(f.read()), 'w.xlsx')}).get_json()
+    assert upload['sheets'] == ['first', 'second'] and upload['sheet'] == 'first' and upload['total_rows'] == 5
+    other = client.post('/sheet', json={'workbook': upload['workbook'], 'sheet': 'second'}).get_json()
+    assert other['success'] and other['total_rows'] == 8 and other['dataset_id'] != upload['dataset_id']
+    assert client.post('/sheet', json={'workbook': upload['workbook'], 'sheet': 'third'}).status_code == 404
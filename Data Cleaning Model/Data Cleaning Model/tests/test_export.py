@@ -0,0 +1,94 @@
+import io
+import gzip
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from utils.export import filter_chunks, stream_export, validate_export
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'a': np.arange(250), 'f': rng.random(250), 's': rng.choice(['x', 'y', None], 250)})
+
+
+def _chunks(df, rows=60):
+    return (df.iloc[start:start + rows] for start in range(0, len(df), rows))
+
+
+def _read(data, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    if fmt == 'csv.gz':
+        return pd.read_csv(io.BytesIO(gzip.decompress(data)))
+    if fmt == 'csv.zst':
+        return pd.read_csv(pa.CompressedInputStream(pa.BufferReader(data), 'zstd'))
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_feather(io.BytesIO(data))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz', 'csv.zst', 'parquet', 'feather'])
+def test_every_format_round_trips(fmt):
+    df = _frame()
+    filters = [{'column': 'f', 'op': '<', 'value': 0.5}, {'column': 's', 'op': 'notnull'}]
+    data = b''.join(stream_export(filter_chunks(_chunks(df), filters, ['s', 'a']), df[['s', 'a']].iloc[:0], fmt))
+    expected = df[(df['f'] < 0.5) & df['s'].notna()][['s', 'a']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(_read(data, fmt), expected)
+
+
+def test_chunks_are_encoded_one_at_a_time():
+    df = _frame()
+    parts = list(stream_export(_chunks(df), df.iloc[:0], 'csv'))
+    assert len(parts) >= 5 and parts[0].startswith(b'a,f,s\n')
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_schema_does_not_depend_on_the_first_chunk(fmt):
+    df = _frame()
+    # The first chunk keeps no rows, so its object column has no values to type it by
+    data = b''.join(stream_export(filter_chunks(_chunks(df), [{'column': 'a', 'op': '>', 'value': 100}]),
+                                  df.iloc[:0], fmt))
+    pd.testing.assert_frame_equal(_read(data, fmt), df[df['a'] > 100].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'feather'])
+def test_exports_with_no_rows_keep_their_columns(fmt):
+    df = _frame()
+    data = b''.join(stream_export(filter_chunks(_chunks(df), [{'column': 'a', 'op': '<', 'value': 0}]),
+                                  df.iloc[:0], fmt))
+    assert list(_read(data, fmt).columns) == ['a', 'f', 's'] and len(_read(data, fmt)) == 0
+
+
+def test_requests_are_validated():
+    columns = ['a', 'f', 's']
+    validate_export(['a'], columns, [{'column': 's', 'op': 'in', 'value': ['x']}], 'parquet')
+    for args in ((['nope'], columns, [], 'csv'), (None, columns, [], 'xlsx'),
+                 (None, columns, [{'column': 'a', 'op': '~', 'value': 1}], 'csv'),
+                 (None, columns, [{'column': 'a', 'op': 'in', 'value': 1}], 'csv')):
+        with pytest.raises(ValueError):
+            validate_export(*args)
+
+
+def test_download_streams_the_stored_dataset(app_module):
+    client = app_module.app.test_client()
+    df = _frame()
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    response = client.post('/download', json={'dataset_id': upload.get_json()['dataset_id'], 'format': 'parquet',
+                                              'columns': ['a'], 'filters': [{'column': 'a', 'op': '<', 'value': 5}]})
+    assert response.headers['Content-Disposition'] == 'attachment; filename=cleaned_data.parquet'
+    assert pd.read_parquet(io.BytesIO(response.data))['a'].tolist() == [0, 1, 2, 3, 4]
+    assert client.post('/download', json={'dataset_id': upload.get_json()['dataset_id'],
+                                          'format': 'xlsx'}).status_code == 400
+
+
+def test_download_of_an_out_of_core_dataset_with_empty_parts(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'INGEST_CHUNK_ROWS', 60)
+    monkeypatch.setitem(app_module.app.config, 'MAX_IN_MEMORY_DATASET', 0)
+    client = app_module.app.test_client()
+    df = _frame()
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    for fmt in ('parquet', 'feather', 'csv'):
+        response = client.post('/download', json={'dataset_id': upload.get_json()['dataset_id'], 'format': fmt,
+                                                  'filters': [{'column': 'a', 'op': '>', 'value': 240}]})
+        pd.testing.assert_frame_equal(_read(response.data, fmt), df[df['a'] > 240].reset_index(drop=True))
@@ -0,0 +1,79 @@
+import io
+import gzip
+import json
+import base64
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from vizpro_common.figures import MIN_TYPED_ARRAY, encode_arrays, figure_payload
+from utils.nullity import summarize_nullity
+from utils.visualization import plot_nullity
+
+
+def _decode(encoded):
+    values = np.frombuffer(base64.b64decode(encoded['bdata']), dtype=np.dtype(encoded['dtype']).newbyteorder('<'))
+    return values.reshape([int(n) for n in encoded['shape'].split(',')]) if 'shape' in encoded else values
+
+
+def test_numeric_arrays_round_trip_as_typed_arrays():
+    floats = np.linspace(0, 1, 50)
+    floats[3] = np.nan
+    encoded = encode_arrays({'x': floats, 'small': np.int64([2 ** 40] * MIN_TYPED_ARRAY),
+                             'n': list(range(MIN_TYPED_ARRAY)), 'z': np.arange(40).reshape(4, 10)})
+    np.testing.assert_array_equal(_decode(encoded['x']), floats)
+    assert encoded['small']['dtype'] == 'f8' and encoded['n']['dtype'] == 'i4'
+    assert _decode(encoded['n']).tolist() == list(range(MIN_TYPED_ARRAY))
+    assert encoded['z']['shape'] == '4,10'
+    np.testing.assert_array_equal(_decode(encoded['z']), np.arange(40).reshape(4, 10))
+
+
+def test_short_and_non_numeric_values_stay_plain():
+    short = list(range(MIN_TYPED_ARRAY - 1))
+    assert encode_arrays({'a': short, 'b': np.array(['x'] * 20, dtype=object), 'c': [True] * 20}) == \
+        {'a': short, 'b': ['x'] * 20, 'c': [True] * 20}
+    dates = np.array(['2024-01-01', '2024-01-02'], dtype='datetime64[D]')
+    assert encode_arrays(dates) == ['2024-01-01', '2024-01-02']
+
+
+def test_figure_payload_is_json_ready():
+    x = np.arange(100)
+    payload = figure_payload(go.Figure(go.Scatter(x=x, y=x * 0.5)).update_layout(title='t'))
+    trace = json.loads(json.dumps(payload))['data'][0]
+    np.testing.assert_array_equal(_decode(trace['x']), x)
+    np.testing.assert_array_equal(_decode(trace['y']), x * 0.5)
+    assert payload['layout']['title']['text'] == 't'
+
+
+def test_json_responses_are_compressed(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame(np.random.default_rng(0).random((500, 2)), columns=['x', 'y'])
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    request = {'dataset_id': upload.get_json()['dataset_id'], 'type': 'scatter', 'x_column': 'x', 'y_column': 'y'}
+    plain = client.post('/visualize', json=request)
+    response = client.post('/visualize', json=request, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers and response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['plot'] == plain.get_json()['plot']
+
+
+def test_nested_numeric_lists_become_one_2d_typed_array():
+    z = np.arange(40.0).reshape(4, 10)
+    encoded = encode_arrays({'z': z.tolist()})['z']
+    assert encoded['shape'] == '4,10'
+    np.testing.assert_array_equal(_decode(encoded), z)
+
+
+def test_nested_lists_with_gaps_or_ragged_rows_stay_plain():
+    with_gaps = [[None] + [1.0] * MIN_TYPED_ARRAY, [0.5] * (MIN_TYPED_ARRAY + 1)]
+    assert encode_arrays(with_gaps) == with_gaps
+    ragged = [[1.0] * MIN_TYPED_ARRAY, [2.0] * (MIN_TYPED_ARRAY + 1)]
+    assert encode_arrays(ragged) == ragged
+
+
+def test_nullity_heatmap_with_many_columns():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((300, 20)), columns=[f'c{i}' for i in range(20)])
+    df = df.mask(rng.random(df.shape) < 0.2)
+    summary = summarize_nullity([df], list(df.columns), len(df), blocks=10)
+    fractions, correlation = plot_nullity(summary)['data'][:2]
+    np.testing.assert_allclose(_decode(fractions['z']), summary.block_fractions())
+    np.testing.assert_allclose(_decode(correlation['z']), np.round(summary.correlation(), 4))
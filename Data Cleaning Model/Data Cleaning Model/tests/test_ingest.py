@@ -0,0 +1,72 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from utils.ingest import (iter_csv_chunks, read_dataset, read_meta, read_rows, read_schema, write_chunks,
+                          write_dataset)
+
+
+def _csv(tmp_path, rows=95):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'i': range(rows), 'f': rng.random(rows), 's': rng.choice(['a', 'b', None], rows)})
+    path = tmp_path / 'in.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_csv_is_written_as_parts_while_it_is_parsed(tmp_path):
+    src = _csv(tmp_path)
+    chunks = list(iter_csv_chunks(src, str(tmp_path / 'ds'), 20))
+    meta = read_meta(str(tmp_path / 'ds'))
+    assert [len(c) for c in chunks] == [p['rows'] for p in meta['parts']] == [20, 20, 20, 20, 15]
+    assert meta['total_rows'] == 95 and meta['columns'] == ['i', 'f', 's']
+    pd.testing.assert_frame_equal(read_dataset(str(tmp_path / 'ds')), pd.read_csv(src))
+
+
+def test_parts_share_one_schema_when_chunks_infer_different_types(tmp_path):
+    # 'n' reads as int64 in the first chunk, float64 in the second and text in the third;
+    # 'm' is empty in the first chunk only
+    src = tmp_path / 'drift.csv'
+    n = [str(i) for i in range(20)] + [''] * 20 + ['x'] * 20
+    m = [''] * 20 + [str(i) for i in range(40)]
+    pd.DataFrame({'n': n, 'm': m}).to_csv(src, index=False)
+    path = str(tmp_path / 'ds')
+    assert [str(c['n'].dtype) for c in iter_csv_chunks(str(src), path, 20)] == ['int64', 'float64', 'object']
+
+    meta = read_meta(path)
+    schemas = {str(pq.read_schema(os.path.join(path, part['file']))) for part in meta['parts']}
+    assert len(schemas) == 1 and 'schema' in meta
+    assert read_schema(path).dtypes.astype(str).to_dict() == {'n': 'object', 'm': 'float64'}
+    stored = read_dataset(path)
+    assert stored['n'].tolist()[:2] == ['0', '1'] and stored['n'].iloc[20:40].isna().all()
+    assert stored['n'].iloc[40] == 'x' and stored['m'].tolist()[20:] == list(range(40))
+
+
+def test_write_chunks_widens_integer_columns(tmp_path):
+    chunks = [pd.DataFrame({'a': [1, 2]}), pd.DataFrame({'a': [2.5, None]}), pd.DataFrame({'a': [None, None]})]
+    meta = write_chunks(chunks, str(tmp_path / 'ds'))
+    assert meta['total_rows'] == 6
+    assert read_schema(str(tmp_path / 'ds'))['a'].dtype == 'float64'
+    assert read_dataset(str(tmp_path / 'ds'))['a'].tolist()[:3] == [1.0, 2.0, 2.5]
+
+
+def test_read_rows_spans_part_boundaries(tmp_path):
+    df = pd.read_csv(_csv(tmp_path))
+    write_dataset(df, str(tmp_path / 'ds'), 20)
+    window = read_rows(str(tmp_path / 'ds'), 35, 30, columns=['i', 's'])
+    pd.testing.assert_frame_equal(window, df[['i', 's']].iloc[35:65].reset_index(drop=True))
+    assert len(read_rows(str(tmp_path / 'ds'), 200, 10)) == 0
+
+
+def test_large_uploads_stay_on_disk(app_module, monkeypatch, tmp_path):
+    monkeypatch.setitem(app_module.app.config, 'INGEST_CHUNK_ROWS', 20)
+    monkeypatch.setitem(app_module.app.config, 'MAX_IN_MEMORY_DATASET', 0)
+    client = app_module.app.test_client()
+    src = _csv(tmp_path)
+    with open(src, 'rb') as f:
+        upload = client.post('/upload', data={'file': (io.BytesIO(f.read()), 'big.csv')}).get_json()
+    assert upload['total_rows'] == 95
+    assert not app_module.datasets.get(upload['dataset_id'], load=False).loaded
+    page = client.get(f"/rows?dataset_id={upload['dataset_id']}&offset=15&limit=10&columns=i").get_json()
+    assert page['total_rows'] == 95 and page['data'] == {'i': list(range(15, 25))}
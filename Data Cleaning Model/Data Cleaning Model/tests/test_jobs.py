@@ -0,0 +1,47 @@
+import io
+import math
+import operator
+import time
+import numpy as np
+import pandas as pd
+from utils.jobs import JobManager
+
+
+def test_jobs_run_in_worker_processes():
+    jobs = JobManager(max_workers=2, timeout=60)
+    job = jobs.submit(math.factorial, 20)
+    failed = jobs.submit(operator.truediv, 1, 0)
+    assert jobs.wait(job, 60) and job.status == 'done' and job.result == math.factorial(20)
+    assert jobs.wait(failed, 60) and failed.status == 'failed' and 'division' in failed.error
+
+
+def test_overrunning_jobs_are_terminated():
+    jobs = JobManager(max_workers=1, timeout=60)
+    job = jobs.submit(time.sleep, 60, timeout=0.5)
+    assert jobs.wait(job, 60) and job.status == 'timeout'
+
+
+def test_cancel_stops_running_and_queued_jobs():
+    jobs = JobManager(max_workers=1, timeout=60)
+    running = jobs.submit(time.sleep, 60)
+    queued = jobs.submit(time.sleep, 60)
+    while running.status != 'running':
+        time.sleep(0.01)
+    jobs.cancel(queued.job_id)
+    jobs.cancel(running.job_id)
+    assert jobs.wait(running, 10) and running.status == 'cancelled'
+    assert jobs.wait(queued, 10) and queued.status == 'cancelled' and queued.started is None
+
+
+def test_heavy_visualizations_run_as_jobs(app_module):
+    client = app_module.app.test_client()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((200, 3)), columns=['a', 'b', 'c'])
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    body = client.post('/visualize', json={'dataset_id': upload.get_json()['dataset_id'], 'type': 'correlation',
+                                           'columns': ['a', 'b', 'c']}).get_json()
+    while body.get('pending'):
+        time.sleep(0.05)
+        body = client.get(f"/jobs/{body['job_id']}").get_json()
+    assert body['success'] and body['status'] == 'done' and body['plot']
+    assert client.get('/jobs/missing').status_code == 404
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from utils.nullity import summarize_nullity
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((1003, 6)), columns=list('abcdef'))
+    df = df.mask(rng.random(df.shape) < [0.1, 0.3, 0.5, 0.0, 0.05, 0.2])
+    # 'f' tends to be missing where 'b' is, and 'd' is never missing
+    df.loc[df['b'].isna() & (rng.random(len(df)) < 0.6), 'f'] = np.nan
+    return df
+
+
+def test_counts_and_correlation_match_pandas():
+    df = _frame()
+    chunks = [df.iloc[start:start + 97] for start in range(0, len(df), 97)]
+    summary = summarize_nullity(chunks, list(df.columns), len(df), blocks=10)
+    mask = df.isna()
+
+    np.testing.assert_array_equal(summary.missing, mask.sum().to_numpy())
+    blocks = np.minimum(np.arange(len(df)) * 10 // len(df), 9)
+    np.testing.assert_allclose(summary.block_fractions(), mask.groupby(blocks).mean().to_numpy())
+    assert summary.block_ranges()[0] == (0, 100) and summary.block_ranges()[-1][1] == len(df) - 1
+
+    expected = mask.astype(float).corr().to_numpy()
+    np.testing.assert_allclose(summary.correlation(), expected, equal_nan=True)
+    assert np.isnan(summary.correlation()[3]).all()
+
+
+def test_chunking_does_not_change_the_summary():
+    df = _frame()
+    whole = summarize_nullity([df], list(df.columns), len(df), blocks=7)
+    chunked = summarize_nullity([df.iloc[i:i + 13] for i in range(0, len(df), 13)], list(df.columns), len(df), blocks=7)
+    np.testing.assert_array_equal(whole.block_missing, chunked.block_missing)
+    np.testing.assert_array_equal(whole.both_missing, chunked.both_missing)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from utils.profiler import DistinctCounter, HeavyHitters, QuantileSketch, profile_chunks, profile_frame
+
+
+def _rank_error(values, estimate, q):
+    return abs(np.searchsorted(np.sort(values), estimate) / len(values) - q)
+
+
+def test_quantile_sketch_is_exact_while_small_and_close_after():
+    rng = np.random.default_rng(0)
+    small = rng.normal(size=500)
+    sketch = QuantileSketch()
+    sketch.update(small)
+    assert sketch.quantile(0.5) == np.quantile(small, 0.5)
+
+    values = rng.lognormal(size=200000)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 7):
+        partial = QuantileSketch()
+        partial.update(part)
+        merged.merge(partial)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert _rank_error(values, merged.quantile(q), q) < 0.01
+
+
+
+def test_deviation_quantile_is_exact_while_small_and_close_after():
+    rng = np.random.default_rng(3)
+    small = rng.normal(size=500)
+    sketch = QuantileSketch()
+    sketch.update(small)
+    assert sketch.deviation_quantile(0.2, 0.5) == np.median(np.abs(small - 0.2))
+
+    values = rng.lognormal(size=200000)
+    sketch = QuantileSketch()
+    for part in np.array_split(values, 20):
+        sketch.update(part)
+    median = sketch.quantile(0.5)
+    mad = sketch.deviation_quantile(median, 0.5)
+    assert abs(np.mean(np.abs(values - median) <= mad) - 0.5) < 0.02
+
+def test_distinct_counter_is_exact_then_within_a_few_percent():
+    rng = np.random.default_rng(1)
+    small = pd.Series(rng.integers(0, 5000, 20000))
+    counter = DistinctCounter()
+    counter.update(small)
+    assert counter.count() == small.nunique()
+
+    values = pd.Series(rng.integers(0, 10 ** 9, 120000))
+    left, right = DistinctCounter(), DistinctCounter()
+    left.update(values[:60000])
+    right.update(values[60000:])
+    left.merge(right)
+    assert left.exact is None
+    assert abs(left.count() - values.nunique()) / values.nunique() < 0.03
+
+
+def test_heavy_hitters_find_the_most_frequent_values():
+    rng = np.random.default_rng(2)
+    values = pd.Series(rng.zipf(1.5, 100000).astype(str))
+    hitters = HeavyHitters(capacity=100)
+    for part in np.array_split(values, 10):
+        hitters.update(part)
+    exact = values.value_counts()
+    top = hitters.top(5)
+    assert list(top) == list(exact.index[:5])
+    # Misra-Gries undercounts by at most n / (capacity + 1)
+    for value, count in top.items():
+        assert 0 <= exact[value] - count <= len(values) / 101
+
+    few = pd.Series(list('aabbbc'))
+    exact_hitters = HeavyHitters()
+    exact_hitters.update(few)
+    assert exact_hitters.top(2) == {'b': 3, 'a': 2}
+
+
+def test_profile_matches_pandas():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'x': rng.normal(10, 2, 3000), 'n': rng.integers(0, 50, 3000),
+                       's': rng.choice(['a', 'b', 'c'], 3000, p=[0.5, 0.3, 0.2])})
+    df.loc[::7, 'x'] = np.nan
+    df.loc[::11, 's'] = None
+    chunked = profile_chunks(np.array_split(df, 4)).to_analysis()
+    partitioned = profile_frame(df, partition_rows=700).to_analysis()
+    for analysis in (chunked, partitioned):
+        assert analysis['missing_values'] == df.isna().sum().to_dict()
+        assert analysis['unique_counts'] == df.nunique().to_dict()
+        assert analysis['numeric_columns'] == ['x', 'n'] and analysis['categorical_columns'] == ['s']
+        stats = analysis['column_stats']['x']
+        assert np.isclose(stats['mean'], df['x'].mean()) and np.isclose(stats['std'], df['x'].std())
+        assert stats['min'] == df['x'].min() and stats['max'] == df['x'].max()
+        assert _rank_error(df['x'].dropna(), stats['median'], 0.5) < 0.01
+        assert analysis['column_stats']['s']['top_values'] == df['s'].value_counts().to_dict()
@@ -0,0 +1,79 @@
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from utils.cleaning import compile_plan
+from utils.recipe import replay_recipe, validate_recipe
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.random(300), 'b': rng.random(300), 'c': rng.random(300),
+                       'd': rng.random(300), 'g': rng.choice(['x', 'y', 'y', 'z'], 300)})
+    for col, step in (('a', 4), ('b', 3), ('c', 5), ('d', 7), ('g', 6)):
+        df.loc[df.index[::step], col] = None
+    # Long gaps that span chunk boundaries
+    df.loc[45:130, 'b'] = None
+    df.loc[280:, 'c'] = None
+    return df
+
+
+def test_replay_matches_cleaning_in_memory():
+    df = _frame()
+    operations = [
+        {'type': 'ffill', 'column': 'a'},
+        {'type': 'interpolate', 'column': 'b'},
+        {'type': 'bfill', 'column': 'c'},
+        {'type': 'fill_mode', 'column': 'g'},
+        {'type': 'remove_rows', 'column': 'c'},
+        {'type': 'fill_mean', 'column': 'd'},
+        {'type': 'fill_median', 'column': 'd'},
+    ]
+    chunks, stats = replay_recipe(lambda: (df.iloc[i:i + 40] for i in range(0, len(df), 40)), operations)
+    replayed = pd.concat(list(chunks), ignore_index=True)
+    expected = compile_plan(df, operations).execute(df).reset_index(drop=True)
+    pd.testing.assert_frame_equal(replayed, expected)
+    assert stats[3] == df['g'].mode()[0]
+
+
+def test_invalid_recipes_are_rejected():
+    errors = validate_recipe([{'type': 'fill_value', 'column': 'a'}, {'type': 'drop', 'column': 'a'},
+                              {'type': 'ffill', 'column': 'nope'}], ['a'])
+    assert [e['index'] for e in errors] == [0, 1, 2]
+
+
+def _poll(client, response):
+    body = response.get_json()
+    while body.get('pending'):
+        time.sleep(0.05)
+        body = client.get(f"/jobs/{body['job_id']}").get_json()
+    return body
+
+
+def test_replay_runs_as_a_job_and_registers_the_dataset(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'x': [1.0, np.nan, 3.0, np.nan], 'c': ['a', None, 'b', 'a']})
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    dataset_id = upload.get_json()['dataset_id']
+    operations = [{'type': 'fill_mean', 'column': 'x'}, {'type': 'fill_value', 'column': 'c', 'value': 'z'}]
+
+    body = _poll(client, client.post('/replay', json={'dataset_id': dataset_id, 'operations': operations}))
+    assert body['success'] and body['status'] == 'done' and 'job_id' in body
+    result = body['result']
+    assert result['source_dataset_id'] == dataset_id and result['total_rows'] == 4
+    assert result['statistics'][0]['value'] == 2.0
+    cleaned = client.get(f"/datasets/{result['dataset_id']}").get_json()
+    assert cleaned['success'] and cleaned['rows'] == 4
+
+
+def test_failed_replay_leaves_no_parts(app_module):
+    client = app_module.app.test_client()
+    upload = client.post('/upload', data={'file': (io.BytesIO(b'x\n1\n2\n'), 'd.csv')})
+    dataset_id = upload.get_json()['dataset_id']
+    app_module.datasets.get(dataset_id, load=False).source_path = os.path.join('missing', 'parts')
+    before = set(os.listdir(app_module.app.config['DATA_FOLDER']))
+    body = _poll(client, client.post('/replay', json={'dataset_id': dataset_id,
+                                                      'operations': [{'type': 'fill_mean', 'column': 'x'}]}))
+    assert body['status'] == 'failed'
+    assert set(os.listdir(app_module.app.config['DATA_FOLDER'])) == before
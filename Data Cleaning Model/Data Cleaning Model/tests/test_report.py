@@ -0,0 +1,41 @@
+import io
+import json
+import time
+import numpy as np
+import pandas as pd
+from utils.profiler import profile_frame
+from utils.report import describe_profile, encode_events, once, run_sections
+
+def test_describe_profile_matches_pandas_describe():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.normal(size=800), 'n': rng.integers(0, 9, 800), 's': ['a'] * 800})
+    df.loc[::9, 'x'] = np.nan
+    stats = describe_profile(profile_frame(df))
+    expected = df.describe().to_dict()
+    assert set(stats) == {'x', 'n'}
+    for col in stats:
+        for key, value in expected[col].items():
+            assert np.isclose(stats[col][key], value), (col, key)
+
+def test_sections_stream_in_completion_order():
+    calls = []
+    shared = once(lambda: calls.append(1) or len(calls))
+    events = list(run_sections({'slow': lambda: time.sleep(0.3) or shared(), 'fast': shared,
+                                'broken': lambda: 1 / 0}))
+    assert [name for name, _, _ in events][-1] == 'slow' and calls == [1]
+    lines = [json.loads(line) for line in encode_events(events)]
+    assert lines[-1] == {**lines[-1], 'section': 'done', 'success': False, 'failed': 1}
+    assert {line['section']: line['data'] for line in lines[:-1]} == {'slow': 1, 'fast': 1, 'broken': None}
+    sse = ''.join(encode_events([('fast', 1, None)], 'sse'))
+    assert sse.startswith('event: fast\ndata: ') and '\n\nevent: done\n' in sse
+
+def test_export_report_streams_every_section(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'x': [1.0, 2.0, None, 2.0], 'y': [3, 1, 2, 1], 's': ['a', 'b', 'b', 'b']})
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    response = client.post('/export_report', json={'dataset_id': upload.get_json()['dataset_id']})
+    assert response.mimetype == 'application/x-ndjson'
+    events = {event['section']: event for event in map(json.loads, response.data.decode().splitlines())}
+    assert events['done']['success'] and events['duplicates']['data'] == 1
+    assert events['missing_values']['data'] == {'x': 1, 'y': 0, 's': 0}
+    assert {'data_types', 'basic_stats', 'correlation', 'missing_matrix'} <= set(events)
@@ -0,0 +1,23 @@
+import io
+import numpy as np
+import pandas as pd
+from utils.json_utils import column_to_json, frame_to_records
+
+
+def test_columns_convert_to_json_safe_values():
+    assert column_to_json(pd.Series([1.5, np.nan, np.inf, -np.inf])) == [1.5, None, None, None]
+    assert column_to_json(pd.Series([1, None], dtype='Int64')) == [1, None]
+    assert column_to_json(pd.Series(pd.to_datetime(['2024-01-02', None]))) == ['2024-01-02', None]
+    assert column_to_json(pd.Series(['a', None, np.float64(2.5), float('nan')], dtype=object)) == ['a', None, '2.5', None]
+    assert frame_to_records(pd.DataFrame({'a': [1, 2], 'b': ['x', None]})) == [{'a': 1, 'b': 'x'}, {'a': 2, 'b': None}]
+
+
+def test_rows_returns_a_columnar_window(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'x': range(50), 'y': [i / 2 for i in range(50)], 's': [f'r{i}' for i in range(50)]})
+    dataset_id = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')}).get_json()['dataset_id']
+    page = client.get(f'/rows?dataset_id={dataset_id}&offset=45&limit=10&columns=s,x').get_json()
+    assert page['total_rows'] == 50 and page['columns'] == ['s', 'x']
+    assert page['data'] == {'s': ['r45', 'r46', 'r47', 'r48', 'r49'], 'x': [45, 46, 47, 48, 49]}
+    assert client.get(f'/rows?dataset_id={dataset_id}&columns=nope').status_code == 400
+    assert client.get('/rows?dataset_id=missing').status_code == 404
@@ -0,0 +1,71 @@
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from utils.viz_cache import ResultCache, cache_key
+
+
+def _key(dataset_id, n, version=1):
+    return cache_key(dataset_id, version, 'histogram', {'n': n})
+
+
+def test_keys_ignore_parameter_order():
+    assert cache_key('a', 1, 'pca', {'x': 1, 'y': [2]}) == cache_key('a', 1, 'pca', {'y': [2], 'x': 1})
+    assert cache_key('a', 1, 'pca', {'x': 1}) != cache_key('a', 2, 'pca', {'x': 1})
+
+
+def test_results_evicted_from_memory_are_read_from_disk(tmp_path):
+    value = {'data': 'x' * 1000}
+    cache = ResultCache(2500, str(tmp_path))
+    for n in range(3):
+        cache.put(_key('a', n), value)
+    assert cache.stats()['entries'] == 2 and cache.stats()['memory_bytes'] <= 2500
+    assert cache.get(_key('a', 2)) == value and cache.get(_key('a', 0)) == value
+    assert cache.get(_key('a', 9)) is None
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_disk_tier_drops_least_recently_used_files(tmp_path):
+    value = {'data': 'x' * 1000}
+    cache = ResultCache(0, str(tmp_path), disk_budget=3500)
+    for n in range(3):
+        cache.put(_key('a', n), value)
+        time.sleep(0.02)
+    # Reading the oldest entry from disk makes it the most recently used
+    assert cache.get(_key('a', 0)) == value
+    time.sleep(0.02)
+    cache.put(_key('b', 0), value)
+    assert cache.stats()['disk_bytes'] <= 3500
+    assert cache.get(_key('a', 1)) is None
+    assert cache.get(_key('a', 0)) == value and cache.get(_key('b', 0)) == value
+
+
+def test_budget_applies_to_files_from_earlier_runs(tmp_path):
+    ResultCache(0, str(tmp_path)).put(_key('old', 0), {'data': 'x' * 5000})
+    cache = ResultCache(0, str(tmp_path), disk_budget=1000)
+    assert cache.stats()['disk_bytes'] == 0
+    assert not os.path.exists(tmp_path / 'old')
+
+
+def test_invalidate_and_newer_versions_remove_files(tmp_path):
+    cache = ResultCache(1 << 20, str(tmp_path))
+    cache.put(_key('a', 0), [1])
+    cache.put(_key('a', 0, version=2), [2])
+    assert os.listdir(tmp_path / 'a') == [os.path.basename(_key('a', 0, version=2)) + '.json']
+    cache.invalidate('a')
+    assert cache.get(_key('a', 0, version=2)) is None and not os.path.exists(tmp_path / 'a')
+
+
+def test_repeated_visualizations_are_served_from_the_cache(app_module):
+    client = app_module.app.test_client()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((100, 2)), columns=['a', 'b'])
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'd.csv')})
+    request = {'dataset_id': upload.get_json()['dataset_id'], 'type': 'scatter', 'x_column': 'a', 'y_column': 'b'}
+    first = client.post('/visualize', json=request).get_json()
+    hits = client.get('/cache').get_json()['memory_hits']
+    second = client.post('/visualize', json=request).get_json()
+    assert second['cached'] and second['plot'] == first['plot']
+    assert client.get('/cache').get_json()['memory_hits'] == hits + 1
@@ -0,0 +1,119 @@
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from utils.profiler import QuantileSketch
+
+IQR_FACTOR = 1.5
+# Modified z-score threshold of Iglewicz and Hoaglin
+MAD_THRESHOLD = 3.5
+MAX_ROWS = 100
+FOREST_SAMPLE_ROWS = 20000
+
+
+class _ColumnScan:
+    def __init__(self):
+        self.sketch = QuantileSketch(k=2048)
+        self.q1 = self.median = self.q3 = self.mad = None
+        self.counts = {'iqr': 0, 'mad': 0}
+        self.rows = {'iqr': [], 'mad': []}
+        self.values = {'iqr': [], 'mad': []}
+
+    def fences(self):
+        iqr = self.q3 - self.q1
+        return self.q1 - IQR_FACTOR * iqr, self.q3 + IQR_FACTOR * iqr
+
+    def flag(self, rule, mask, values, offset, max_rows):
+        hits = np.flatnonzero(mask)
+        self.counts[rule] += len(hits)
+        room = max_rows - len(self.rows[rule])
+        if room > 0:
+            self.rows[rule].extend((hits[:room] + offset).tolist())
+            self.values[rule].extend(values[hits[:room]].tolist())
+
+    def summary(self):
+        lower, upper = self.fences() if self.q1 is not None else (None, None)
+        return {
+            'q1': self.q1, 'median': self.median, 'q3': self.q3, 'mad': self.mad,
+            'iqr_outliers': {'lower': lower, 'upper': upper, 'count': self.counts['iqr'],
+                             'rows': self.rows['iqr'], 'values': self.values['iqr']},
+            'mad_outliers': {'threshold': MAD_THRESHOLD, 'count': self.counts['mad'],
+                             'rows': self.rows['mad'], 'values': self.values['mad']}
+        }
+
+
+def _matrix(chunk, columns):
+    return chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def scan_anomalies(chunk_source, columns, max_rows=MAX_ROWS):
+    """Flag outliers in every column with the IQR and MAD rules.
+
+    ``chunk_source`` is a callable returning a fresh iterator of chunks.
+    The first pass sketches each column; the quartiles, median and MAD all
+    come from that sketch. The second pass applies the IQR fences and the
+    modified z-score rule together. Each pass handles all columns of a
+    chunk at once. Up to ``max_rows`` row positions are kept per column and
+    rule, with their values; counts are exact for the sketched fences.
+    """
+    scans = [_ColumnScan() for _ in columns]
+    for chunk in chunk_source():
+        values = _matrix(chunk, columns)
+        for scan, column in zip(scans, values.T):
+            scan.sketch.update(column[np.isfinite(column)])
+    for scan in scans:
+        quartiles = scan.sketch.quantiles([0.25, 0.5, 0.75])
+        if quartiles is not None:
+            scan.q1, scan.median, scan.q3 = (float(q) for q in quartiles)
+            scan.mad = scan.sketch.deviation_quantile(scan.median, 0.5)
+    active = [i for i, scan in enumerate(scans) if scan.q1 is not None]
+    medians = np.array([scans[i].median for i in active])
+    fences = np.array([scans[i].fences() for i in active]).reshape(-1, 2)
+    lower, upper = fences[:, 0], fences[:, 1]
+    # A zero MAD leaves the modified z-score undefined, so that rule flags nothing
+    mads = np.array([scans[i].mad or np.nan for i in active])
+
+    offset = 0
+    for chunk in chunk_source():
+        values = _matrix(chunk, columns)[:, active]
+        outside = (values < lower) | (values > upper)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            flagged = 0.6745 * np.abs(values - medians) / mads > MAD_THRESHOLD
+        for j, i in enumerate(active):
+            scans[i].flag('iqr', outside[:, j], values[:, j], offset, max_rows)
+            scans[i].flag('mad', flagged[:, j], values[:, j], offset, max_rows)
+        offset += len(values)
+
+    return {column: scan.summary() for column, scan in zip(columns, scans)}
+
+
+def isolation_forest(chunk_source, columns, total_rows, sample_rows=FOREST_SAMPLE_ROWS,
+                     max_rows=MAX_ROWS, seed=0):
+    """Multivariate outliers from an isolation forest fit on a row sample.
+
+    Rows are sampled uniformly in one pass; only complete rows are used.
+    Returns the number of sampled rows flagged and up to ``max_rows`` of
+    their row positions, most anomalous first.
+    """
+    rng = np.random.default_rng(seed)
+    fraction = min(sample_rows / max(total_rows, 1), 1.0)
+    samples, positions = [], []
+    offset = 0
+    for chunk in chunk_source():
+        values = _matrix(chunk, columns)
+        keep = (rng.random(len(values)) < fraction) & np.isfinite(values).all(axis=1)
+        samples.append(values[keep])
+        positions.append(np.flatnonzero(keep) + offset)
+        offset += len(values)
+    sample = np.vstack(samples) if samples else np.empty((0, len(columns)))
+    if len(sample) < 10:
+        raise ValueError("Not enough complete rows for an isolation forest")
+    positions = np.concatenate(positions)
+    forest = IsolationForest(n_estimators=100, random_state=seed).fit(sample)
+    scores = forest.decision_function(sample)
+    flagged = np.flatnonzero(scores < 0)
+    order = flagged[np.argsort(scores[flagged])]
+    return {
+        'sampled_rows': int(len(sample)),
+        'count': int(len(flagged)),
+        'fraction': float(len(flagged) / len(sample)),
+        'rows': positions[order[:max_rows]].tolist()
+    }
@@ -0,0 +1,156 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+NUMERIC_OPERATIONS = {'fill_mean', 'fill_median', 'interpolate'}
+COLUMN_OPERATIONS = {'fill_mean', 'fill_median', 'fill_mode', 'fill_value', 'ffill', 'bfill', 'interpolate'}
+ROW_OPERATIONS = {'remove_rows'}
+
+
+def _fill_mean(series, op):
+    mean_value = series.mean()
+    if pd.isna(mean_value):
+        raise ValueError("Cannot calculate mean of non-numeric data")
+    return series.fillna(mean_value)
+
+
+def _fill_median(series, op):
+    return series.fillna(series.median())
+
+
+def _fill_mode(series, op):
+    mode = series.mode()
+    if mode.empty:
+        raise ValueError("Cannot calculate mode of an empty column")
+    return series.fillna(mode[0])
+
+
+def _fill_value(series, op):
+    if op.get('value') is None:
+        raise ValueError("No fill value provided")
+    if isinstance(series.dtype, pd.CategoricalDtype) and op['value'] not in series.cat.categories:
+        series = series.cat.add_categories([op['value']])
+    return series.fillna(op['value'])
+
+
+def drop_unused_categories(df):
+    """Drop categories no row uses any more, e.g. after fills or row removal.
+
+    Plotly express fails on empty category groups, so cleaned frames only
+    keep observed categories.
+    """
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype) \
+                and len(series.cat.categories) > series.cat.codes[series.cat.codes >= 0].nunique():
+            df[column] = series.cat.remove_unused_categories()
+    return df
+
+
+COLUMN_HANDLERS = {
+    'fill_mean': _fill_mean,
+    'fill_median': _fill_median,
+    'fill_mode': _fill_mode,
+    'fill_value': _fill_value,
+    'ffill': lambda series, op: series.ffill(),
+    'bfill': lambda series, op: series.bfill(),
+    'interpolate': lambda series, op: series.interpolate(method='linear')
+}
+
+
+class CleaningPlan:
+    """A validated operations list split into stages of fused per-column steps.
+
+    Row operations (``remove_rows``) change the row set and act as stage
+    barriers. Within a stage all operations on the same column are fused into
+    one step, and steps on different columns are independent so they run in
+    parallel. After execution ``applied`` holds the indices of the operations
+    that succeeded.
+    """
+
+    def __init__(self, stages, failed):
+        self.stages = stages
+        self.failed = failed
+        self.timings = []
+        self.applied = []
+
+    def execute(self, df, max_workers=None):
+        """Run the plan and return the cleaned DataFrame; ``df`` is not modified."""
+        df = df.copy(deep=False)
+        coerced = set()
+        for kind, payload in self.stages:
+            if kind == 'rows':
+                df = self._run_row_op(df, payload)
+                continue
+            steps = list(payload.items())
+            if len(steps) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers or min(len(steps), 8)) as executor:
+                    results = list(executor.map(lambda step: self._run_column(df[step[0]], step[1], coerced),
+                                                steps))
+            else:
+                results = [self._run_column(df[column], ops, coerced) for column, ops in steps]
+            for (column, _), series in zip(steps, results):
+                df[column] = series
+        self.timings.sort(key=lambda timing: timing['index'])
+        self.applied.sort()
+        return drop_unused_categories(df)
+
+    def _run_column(self, series, ops, coerced):
+        for index, op in ops:
+            start = time.perf_counter()
+            try:
+                if op['type'] in NUMERIC_OPERATIONS and op['column'] not in coerced:
+                    series = pd.to_numeric(series, errors='coerce')
+                    coerced.add(op['column'])
+                series = COLUMN_HANDLERS[op['type']](series, op)
+                self.applied.append(index)
+            except Exception as e:
+                self._fail(op, e)
+            self._time(index, op, start)
+        return series
+
+    def _run_row_op(self, df, step):
+        index, op = step
+        start = time.perf_counter()
+        try:
+            df = df.dropna(subset=[op['column']])
+            self.applied.append(index)
+        except Exception as e:
+            self._fail(op, e)
+        self._time(index, op, start)
+        return df
+
+    def _fail(self, op, error):
+        self.failed.append({'type': op['type'], 'column': op['column'], 'error': str(error)})
+        logging.error(f"Error in operation {op['type']}: {str(error)}")
+
+    def _time(self, index, op, start):
+        self.timings.append({
+            'index': index,
+            'type': op['type'],
+            'column': op['column'],
+            'ms': round((time.perf_counter() - start) * 1000, 3)
+        })
+
+
+def compile_plan(df, operations):
+    """Validate an operations list against ``df`` and compile it into a CleaningPlan."""
+    failed = []
+    stages = []
+    for index, op in enumerate(operations):
+        if not all(key in op for key in ['type', 'column']):
+            failed.append({'type': op.get('type', 'unknown'), 'error': 'Missing required parameters'})
+            continue
+        if op['column'] not in df.columns:
+            failed.append({'type': op['type'], 'column': op['column'], 'error': 'Column not found'})
+            continue
+        if op['type'] in ROW_OPERATIONS:
+            stages.append(('rows', (index, op)))
+        elif op['type'] in COLUMN_OPERATIONS:
+            if not stages or stages[-1][0] != 'columns':
+                stages.append(('columns', {}))
+            stages[-1][1].setdefault(op['column'], []).append((index, op))
+        else:
+            failed.append({'type': op['type'], 'column': op['column'], 'error': 'Unsupported operation'})
+    return CleaningPlan(stages, failed)
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+# Above this many rows clustering switches to mini-batch k-means on a sample
+FULL_FIT_ROWS = 50000
+SAMPLE_ROWS = 100000
+EVALUATION_ROWS = 20000
+SILHOUETTE_ROWS = 5000
+ASSIGN_BATCH_ROWS = 100000
+
+
+def _sample(values, rows, seed=0):
+    if len(values) <= rows:
+        return values
+    index = np.random.default_rng(seed).choice(len(values), rows, replace=False)
+    return values[np.sort(index)]
+
+
+def fit_model(values, n_clusters, seed=0):
+    """Fit k-means, using mini-batch k-means on a sample for large inputs."""
+    if len(values) <= FULL_FIT_ROWS:
+        return KMeans(n_clusters=n_clusters, n_init=3, random_state=seed).fit(values)
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3, random_state=seed)
+    return model.fit(_sample(values, SAMPLE_ROWS, seed))
+
+
+def assign(model, values, batch_rows=ASSIGN_BATCH_ROWS):
+    """Label every row with its nearest centroid, ``batch_rows`` rows at a time."""
+    labels = np.empty(len(values), dtype=np.int32)
+    for start in range(0, len(values), batch_rows):
+        labels[start:start + batch_rows] = model.predict(values[start:start + batch_rows])
+    return labels
+
+
+def _score(values, k, seed):
+    model = MiniBatchKMeans(n_clusters=k, batch_size=2048, n_init=3, random_state=seed).fit(values)
+    silhouette = None
+    if len(set(model.labels_)) > 1:
+        silhouette = float(silhouette_score(values, model.labels_,
+                                            sample_size=min(SILHOUETTE_ROWS, len(values)),
+                                            random_state=seed))
+    return {'k': k, 'inertia': float(model.inertia_), 'silhouette': silhouette}
+
+
+def evaluate_k(values, ks, seed=0, max_workers=None):
+    """Inertia (for an elbow plot) and silhouette score for each candidate k.
+
+    Every k is fit on the same subsample, in parallel.
+    """
+    sample = _sample(values, EVALUATION_ROWS, seed)
+    ks = [k for k in ks if 2 <= k < len(sample)]
+    if not ks:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(ks), 4)) as executor:
+        return list(executor.map(lambda k: _score(sample, k, seed), ks))
+
+
+def best_k(scores):
+    """The k with the highest silhouette score, or None."""
+    scored = [score for score in scores if score['silhouette'] is not None]
+    return max(scored, key=lambda score: score['silhouette'])['k'] if scored else None
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from vizpro_common.correlation import CorrelationStats, numeric_columns, frame_correlation
+from utils.profiler import QuantileSketch
+
+RANK_GRID = 1024
+
+
+def streaming_correlation(chunk_source, columns, method='pearson', dtype=np.float64):
+    """CorrelationStats for ``columns`` of a chunked dataset.
+
+    ``chunk_source`` is a callable returning a fresh iterator of chunks.
+    Pearson takes one pass. Spearman takes two: the first builds a quantile
+    sketch per column, the second replaces each value with its approximate
+    rank from the sketch before accumulating.
+    """
+    stats = CorrelationStats(columns, dtype)
+    if method == 'pearson':
+        for chunk in chunk_source():
+            stats.update_frame(chunk)
+        return stats
+    if method != 'spearman':
+        raise ValueError(f'Unsupported correlation method: {method}')
+
+    sketches = {col: QuantileSketch() for col in columns}
+    for chunk in chunk_source():
+        for col in columns:
+            values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+            sketches[col].update(values[np.isfinite(values)])
+    grid = np.linspace(0, 1, RANK_GRID + 1)
+    edges = {col: sketch.quantiles(grid) for col, sketch in sketches.items()}
+    for chunk in chunk_source():
+        ranks = np.full((len(chunk), len(columns)), np.nan)
+        for index, col in enumerate(columns):
+            if edges[col] is None:
+                continue
+            values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+            # Midrank within the sketch grid so ties share one rank
+            low = np.searchsorted(edges[col], values, side='left')
+            high = np.searchsorted(edges[col], values, side='right')
+            ranks[:, index] = np.where(np.isfinite(values), (low + high) / 2, np.nan)
+        stats.update(ranks)
+    return stats
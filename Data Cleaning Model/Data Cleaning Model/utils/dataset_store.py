@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from utils.ingest import read_dataset, read_meta, write_dataset, remove_dataset
+from vizpro_common.dtypes import compact_frame
+
+
+def frame_nbytes(df):
+    """Return the in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class Dataset:
+    """A dataset held server-side under a dataset id.
+
+    The frame lives in memory (``df``), on disk as Parquet parts (``path``),
+    or both. A dataset whose in-memory frame has changed since it was last
+    written to disk is ``dirty`` and must be spilled before it is unloaded.
+    ``source_path`` keeps the parts as originally ingested so the recorded
+    cleaning ``recipe`` can be replayed against the full file. Datasets that
+    were too large to load at ingest are ``out_of_core``. ``memory_report``
+    records each column's dtype and size before and after dtype compaction,
+    and ``row_index`` fingerprints the rows of in-memory datasets.
+    """
+
+    def __init__(self, dataset_id, df=None, name=None, path=None, profile=None, out_of_core=None,
+                 memory_report=None, row_index=None):
+        self.dataset_id = dataset_id
+        self.df = df
+        self.name = name
+        self.path = path
+        self.source_path = path
+        self.profile = profile
+        self.memory_report = memory_report
+        self.row_index = row_index
+        self.recipe = []
+        self.out_of_core = df is None if out_of_core is None else out_of_core
+        self.version = 1
+        self.dirty = path is None
+        self.nbytes = frame_nbytes(df) if df is not None else 0
+        self.created = time.time()
+        self.last_access = self.created
+
+    @property
+    def loaded(self):
+        return self.df is not None
+
+    @property
+    def total_rows(self):
+        if self.df is not None:
+            return len(self.df)
+        return read_meta(self.path)['total_rows']
+
+    @property
+    def columns(self):
+        if self.df is not None:
+            return [str(c) for c in self.df.columns]
+        return read_meta(self.path)['columns']
+
+    def info(self):
+        return {
+            'dataset_id': self.dataset_id,
+            'name': self.name,
+            'version': self.version,
+            'rows': self.total_rows,
+            'columns': len(self.columns),
+            'in_memory': self.loaded,
+            'out_of_core': self.out_of_core,
+            'memory_bytes': self.nbytes,
+            'recipe': self.recipe
+        }
+
+
+class DatasetStore:
+    """Thread-safe LRU store of uploaded datasets bounded by a memory budget.
+
+    Once the in-memory frames exceed ``memory_budget`` bytes, the least
+    recently used datasets are unloaded. Datasets with an on-disk copy keep
+    it and are reloaded on demand; in-memory-only datasets are spilled to
+    ``data_folder`` first. The most recently used dataset is never unloaded,
+    even if it alone exceeds the budget.
+    """
+
+    def __init__(self, memory_budget, data_folder, chunk_rows):
+        self.memory_budget = memory_budget
+        self.data_folder = data_folder
+        self.chunk_rows = chunk_rows
+        self._datasets = OrderedDict()
+        self._lock = threading.RLock()
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def dataset_path(self, dataset_id):
+        return os.path.join(self.data_folder, dataset_id)
+
+    def add(self, df=None, name=None, path=None, dataset_id=None, profile=None, out_of_core=None,
+            memory_report=None, row_index=None):
+        """Store a new dataset and return its dataset id."""
+        dataset_id = dataset_id or self.new_id()
+        dataset = Dataset(dataset_id, df, name, path, profile, out_of_core, memory_report, row_index)
+        with self._lock:
+            self._datasets[dataset_id] = dataset
+            self._evict()
+        return dataset_id
+
+    def get(self, dataset_id, load=True):
+        """Return the Dataset for ``dataset_id`` or None if unknown.
+
+        With ``load`` the frame is read back from disk if it was unloaded,
+        and compacted again since source parts keep the ingested dtypes.
+        The read runs outside the store lock; if the dataset was replaced,
+        reloaded or removed meanwhile, the read is dropped and the current
+        state wins.
+        """
+        while True:
+            with self._lock:
+                dataset = self._datasets.get(dataset_id)
+                if dataset is None:
+                    return None
+                self._datasets.move_to_end(dataset_id)
+                dataset.last_access = time.time()
+                if not load or dataset.loaded:
+                    return dataset
+                path, version = dataset.path, dataset.version
+            try:
+                df, report = compact_frame(read_dataset(path))
+            except Exception:
+                # A concurrent replace or remove may have deleted the parts being read
+                with self._lock:
+                    if self._datasets.get(dataset_id) is dataset and (dataset.path, dataset.version) == (path, version):
+                        raise
+                continue
+            with self._lock:
+                if (self._datasets.get(dataset_id) is not dataset or dataset.loaded
+                        or (dataset.path, dataset.version) != (path, version)):
+                    continue
+                dataset.df = df
+                dataset.memory_report = dataset.memory_report or report
+                # Frames come back from disk with fresh row labels
+                if dataset.row_index is not None:
+                    dataset.row_index.relabel(dataset.df.index)
+                dataset.nbytes = frame_nbytes(dataset.df)
+                self._evict()
+                return dataset
+
+    def replace(self, dataset_id, df, operations=()):
+        """Swap in a new DataFrame for an existing dataset and bump its version.
+
+        ``operations`` are the cleaning operations that produced ``df`` and are
+        appended to the dataset's recipe.
+        """
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                raise KeyError(dataset_id)
+            dataset.recipe.extend(operations)
+            dataset.df = df
+            dataset.nbytes = frame_nbytes(df)
+            dataset.profile = None
+            dataset.version += 1
+            dataset.dirty = True
+            dataset.last_access = time.time()
+            self._datasets.move_to_end(dataset_id)
+            self._evict()
+            return dataset
+
+    def persist(self, dataset_id):
+        """Make sure a dataset's current version is on disk and return its path."""
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                raise KeyError(dataset_id)
+            if dataset.dirty:
+                self._spill(dataset)
+            return dataset.path
+
+    def record(self, dataset_id, operations):
+        """Append operations to an out-of-core dataset's recipe without touching its data."""
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                raise KeyError(dataset_id)
+            dataset.recipe.extend(operations)
+            dataset.version += 1
+            return dataset
+
+    def remove(self, dataset_id):
+        with self._lock:
+            dataset = self._datasets.pop(dataset_id, None)
+        if dataset is None:
+            return False
+        for path in {dataset.path, dataset.source_path} - {None}:
+            remove_dataset(path)
+        return True
+
+    def list(self):
+        """Snapshot of the stored datasets, least recently used first."""
+        with self._lock:
+            return list(self._datasets.values())
+
+    def memory_bytes(self):
+        with self._lock:
+            return sum(d.nbytes for d in self._datasets.values() if d.loaded)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'datasets': len(self._datasets),
+                'loaded': sum(1 for d in self._datasets.values() if d.loaded),
+                'memory_bytes': self.memory_bytes(),
+                'memory_budget': self.memory_budget
+            }
+
+    def _evict(self):
+        total = self.memory_bytes()
+        candidates = [d for d in list(self._datasets.values())[:-1] if d.loaded]
+        for dataset in candidates:
+            if total <= self.memory_budget:
+                break
+            if dataset.dirty:
+                self._spill(dataset)
+            total -= dataset.nbytes
+            dataset.df = None
+            dataset.nbytes = 0
+            logging.info(f"Unloaded dataset {dataset.dataset_id} to {dataset.path}")
+
+    def _spill(self, dataset):
+        """Write a modified frame to disk next to, never over, its source parts."""
+        path = self.dataset_path(f'{dataset.dataset_id}-v{dataset.version}')
+        write_dataset(dataset.df, path, self.chunk_rows)
+        if dataset.path and dataset.path != dataset.source_path:
+            remove_dataset(dataset.path)
+        dataset.path = path
+        dataset.dirty = False
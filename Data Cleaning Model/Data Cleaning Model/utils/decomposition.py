@@ -0,0 +1,77 @@
+import numpy as np
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.preprocessing import StandardScaler
+
+# Components fitted for the explained-variance report; only two are plotted
+REPORT_COMPONENTS = 10
+# Above this many columns the randomized SVD solver is used
+WIDE_COLUMNS = 100
+# Datasets with more cells than this are fitted incrementally from chunks
+IN_MEMORY_CELLS = 50_000_000
+
+
+def _components(width):
+    return max(min(REPORT_COMPONENTS, width), 2)
+
+
+def fit_in_memory(values, seed=0):
+    """Standardize and fit PCA on a numeric matrix, skipping incomplete rows.
+
+    Wide matrices use randomized SVD, which only has to find the leading
+    components instead of decomposing the full covariance.
+    """
+    values = values[np.isfinite(values).all(axis=1)]
+    if len(values) < 2:
+        raise ValueError("Not enough complete rows for PCA")
+    scaled = StandardScaler().fit_transform(values)
+    n_components = min(_components(values.shape[1]), len(values))
+    solver = 'randomized' if values.shape[1] > WIDE_COLUMNS else 'full'
+    pca = PCA(n_components=n_components, svd_solver=solver, random_state=seed)
+    return pca, pca.fit_transform(scaled)
+
+
+def _complete_rows(chunk, columns):
+    values = chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values).all(axis=1)]
+
+
+def fit_incremental(chunk_source, columns):
+    """Fit a scaler and IncrementalPCA over a chunked dataset in two passes.
+
+    ``chunk_source`` is a callable returning a fresh iterator of chunks.
+    Rows with any missing value are skipped. Memory is bounded by the chunk
+    size; chunks smaller than the number of components are merged into the
+    next one.
+    """
+    scaler = StandardScaler()
+    for chunk in chunk_source():
+        values = _complete_rows(chunk, columns)
+        if len(values):
+            scaler.partial_fit(values)
+    if not hasattr(scaler, 'scale_'):
+        raise ValueError("Not enough complete rows for PCA")
+    pca = IncrementalPCA(n_components=_components(len(columns)))
+    pending = None
+    for chunk in chunk_source():
+        values = _complete_rows(chunk, columns)
+        if len(values) == 0:
+            continue
+        values = scaler.transform(values)
+        if pending is not None:
+            values = np.vstack([pending, values])
+            pending = None
+        if len(values) < pca.n_components:
+            pending = values
+            continue
+        pca.partial_fit(values)
+    if not hasattr(pca, 'components_'):
+        raise ValueError("Not enough complete rows for PCA")
+    return scaler, pca
+
+
+def project_chunks(chunk_source, columns, scaler, pca, components=2):
+    """Yield the first ``components`` principal coordinates of each chunk's complete rows."""
+    for chunk in chunk_source():
+        values = _complete_rows(chunk, columns)
+        if len(values):
+            yield pca.transform(scaler.transform(values))[:, :components]
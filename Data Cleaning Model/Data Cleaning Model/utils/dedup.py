@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from utils.ingest import iter_parts
+
+# MinHash signature length and LSH banding; 8 bands of 4 rows make pairs
+# with Jaccard similarity 0.8 candidates about 98% of the time
+MINHASH_PERMUTATIONS = 32
+LSH_BANDS = 8
+MINHASH_PRIME = 4294967291  # largest prime below 2 ** 32
+NEAR_THRESHOLD = 0.8
+SAMPLE_GROUPS = 20
+SAMPLE_GROUP_ROWS = 10
+
+
+def row_hashes(df):
+    """64-bit fingerprint of every row, indexed like ``df``.
+
+    Hashes depend only on the values, so a row hashes the same whether it
+    is fingerprinted alone or as part of the whole frame.
+    """
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+class RowHashIndex:
+    """Row fingerprints of an in-memory dataset with the count of each distinct one.
+
+    ``hashes`` maps each row label to its fingerprint; ``keys`` and
+    ``counts`` are the sorted distinct fingerprints and their multiplicity,
+    so the number of duplicate rows is available without rehashing. After
+    cleaning, ``update`` only rehashes rows whose values changed and drops
+    removed rows, so the hashing work is proportional to the changed rows.
+    """
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.keys, self.counts = np.unique(hashes.to_numpy(), return_counts=True)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(row_hashes(df))
+
+    @property
+    def duplicates(self):
+        """Rows identical to an earlier row."""
+        return int(len(self.hashes) - len(self.keys))
+
+    def relabel(self, index):
+        """Take new row labels, e.g. after the frame was reloaded from disk."""
+        self.hashes.index = index
+        return self
+
+    def _add(self, values):
+        keys, counts = np.unique(values, return_counts=True)
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        self.counts[positions[found]] += counts[found]
+        self.keys = np.insert(self.keys, positions[~found], keys[~found])
+        self.counts = np.insert(self.counts, positions[~found], counts[~found])
+
+    def _remove(self, values):
+        keys, counts = np.unique(values, return_counts=True)
+        positions = np.searchsorted(self.keys, keys)
+        self.counts[positions] -= counts
+        if (self.counts[positions] == 0).any():
+            keep = self.counts > 0
+            self.keys = self.keys[keep]
+            self.counts = self.counts[keep]
+
+    def drop(self, labels):
+        """Forget removed rows."""
+        self._remove(self.hashes.loc[labels].to_numpy())
+        self.hashes = self.hashes.drop(labels)
+
+    def rehash(self, rows):
+        """Refingerprint ``rows``, a frame of changed rows with their current values."""
+        if len(rows) == 0:
+            return
+        new = row_hashes(rows)
+        self._remove(self.hashes.loc[rows.index].to_numpy())
+        self._add(new.to_numpy())
+        self.hashes.loc[rows.index] = new.to_numpy()
+
+    def update(self, old, new, columns):
+        """Bring the index from ``old`` to ``new`` after cleaning touched ``columns``.
+
+        Rows missing from ``new`` are dropped. For each touched column the
+        values are compared, and only rows where one changed are rehashed.
+        """
+        dropped = old.index.difference(new.index)
+        if len(dropped):
+            self.drop(dropped)
+        changed = np.zeros(len(new), dtype=bool)
+        for col in columns:
+            changed |= _changed(old[col].loc[new.index] if len(dropped) else old[col], new[col])
+        self.rehash(new[changed])
+        return self
+
+
+def _changed(before, after):
+    if isinstance(before.dtype, pd.CategoricalDtype) and isinstance(after.dtype, pd.CategoricalDtype):
+        # Adding a category changes the dtype but not the values or their hashes
+        before, after = before.astype(object), after.astype(object)
+    elif before.dtype != after.dtype:
+        return np.ones(len(after), dtype=bool)
+    same = before.eq(after) | (before.isna() & after.isna())
+    return ~same.to_numpy(dtype=bool)
+
+
+def count_duplicates(chunks):
+    """Count rows identical to an earlier row using 64-bit row hashes."""
+    hashes = [row_hashes(chunk).to_numpy() for chunk in chunks]
+    if not hashes:
+        return 0
+    hashes = np.concatenate(hashes)
+    return int(len(hashes) - len(np.unique(hashes)))
+
+
+def _tokens(chunk, columns):
+    """``(row, token hash)`` pairs for every row of a chunk.
+
+    Text values contribute their lowercased words, other values their whole
+    string form; tokens are tagged with their column so equal values in
+    different columns do not match.
+    """
+    rows, hashes = [], []
+    positions = pd.RangeIndex(len(chunk))
+    for j, col in enumerate(columns):
+        series = chunk[col].set_axis(positions)
+        series = series[series.notna()]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+            tokens = series.astype(str)
+        else:
+            tokens = series.astype(str).str.lower().str.findall(r'\w+').explode().dropna()
+        if len(tokens) == 0:
+            continue
+        rows.append(tokens.index.to_numpy(dtype=np.int64))
+        hashes.append(pd.util.hash_array((f'{j}\x1f' + tokens).to_numpy(dtype=object)))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+    return np.concatenate(rows), np.concatenate(hashes) & np.uint64(0xFFFFFFFF)
+
+
+def minhash_signatures(rows, hashes, permutations, seed=0, block=4):
+    """MinHash signature per row from ``(row, token hash)`` pairs.
+
+    Returns ``(signatures, present)`` where ``signatures`` has one row of
+    ``permutations`` uint32 minima for each row with at least one token,
+    listed in ``present``.
+    """
+    rng = np.random.default_rng(seed)
+    # Keep a * h below 2 ** 63 so the universal hash never overflows
+    a = rng.integers(1, 2 ** 31, permutations, dtype=np.uint64)
+    b = rng.integers(0, 2 ** 31, permutations, dtype=np.uint64)
+    order = np.argsort(rows, kind='stable')
+    rows, hashes = rows[order], hashes[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+    signatures = np.empty((len(starts), permutations), dtype=np.uint32)
+    for start in range(0, permutations, block):
+        stop = min(start + block, permutations)
+        values = (a[start:stop, None] * hashes[None, :] + b[start:stop, None]) % np.uint64(MINHASH_PRIME)
+        if len(starts):
+            signatures[:, start:stop] = np.minimum.reduceat(values, starts, axis=1).T
+    return signatures, rows[starts]
+
+
+def _band_keys(signatures, band, rows_per_band):
+    part = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+    return pd.util.hash_pandas_object(pd.DataFrame(part), index=False).to_numpy()
+
+
+def near_duplicates(chunk_source, columns, threshold=NEAR_THRESHOLD,
+                    permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS, seed=0):
+    """Groups of rows whose token sets have Jaccard similarity ``threshold`` or more.
+
+    ``chunk_source`` is a callable returning a fresh iterator of chunks.
+    One pass builds a MinHash signature per row (``permutations`` uint32
+    values, so memory is about 4 bytes per permutation per row). Rows that
+    share any LSH band become candidates; a candidate is kept when its
+    signature agrees with the first row of its bucket on at least
+    ``threshold`` of the permutations, and kept pairs are joined into
+    groups. Rows with no values in ``columns`` are ignored.
+    """
+    signatures, present = [], []
+    offset = 0
+    for chunk in chunk_source():
+        rows, hashes = _tokens(chunk, columns)
+        chunk_signatures, chunk_rows = minhash_signatures(rows, hashes, permutations, seed)
+        signatures.append(chunk_signatures)
+        present.append(chunk_rows + offset)
+        offset += len(chunk)
+    signatures = np.vstack(signatures) if signatures else np.empty((0, permutations), dtype=np.uint32)
+    present = np.concatenate(present) if present else np.empty(0, dtype=np.int64)
+
+    rows_per_band = permutations // bands
+    left, right = [], []
+    for band in range(bands):
+        keys = _band_keys(signatures, band, rows_per_band)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        first = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        heads = np.repeat(order[first], np.diff(np.r_[first, len(order)]))
+        pairs = heads != order
+        left.append(heads[pairs])
+        right.append(order[pairs])
+    left = np.concatenate(left) if left else np.empty(0, dtype=np.int64)
+    right = np.concatenate(right) if right else np.empty(0, dtype=np.int64)
+    if len(left):
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        keep = similarity >= threshold
+        left, right = left[keep], right[keep]
+
+    n = len(signatures)
+    graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    sizes = np.bincount(labels, minlength=n) if n else np.empty(0, dtype=np.int64)
+    grouped = np.flatnonzero(sizes[labels] > 1) if n else np.empty(0, dtype=np.int64)
+    order = grouped[np.lexsort((grouped, -sizes[labels[grouped]]))]
+    groups = []
+    for label in pd.unique(labels[order])[:SAMPLE_GROUPS]:
+        members = present[labels == label]
+        groups.append({'size': int(len(members)), 'rows': members[:SAMPLE_GROUP_ROWS].tolist()})
+    return {
+        'columns': list(columns),
+        'threshold': threshold,
+        'rows_scanned': offset,
+        'rows_compared': int(n),
+        'groups': int((sizes > 1).sum()),
+        'duplicate_rows': int(len(grouped) - (sizes > 1).sum()),
+        'sample_groups': groups
+    }
+
+
+def find_near_duplicates(path, columns, threshold=NEAR_THRESHOLD):
+    """``near_duplicates`` over a stored dataset; runs in a worker process."""
+    return near_duplicates(lambda: iter_parts(path, columns), columns, threshold)
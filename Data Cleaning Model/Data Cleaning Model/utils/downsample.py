@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+
+def to_float(values):
+    """Return values as a float64 array, mapping datetimes to nanoseconds since the epoch."""
+    if isinstance(values, pd.Series):
+        if pd.api.types.is_datetime64_any_dtype(values.dtype) or pd.api.types.is_timedelta64_dtype(values.dtype):
+            values = values.astype('int64')
+        return values.to_numpy(dtype='float64')
+    return np.asarray(values, dtype='float64')
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of a line series.
+
+    ``x`` must be sorted. Returns the indices of at most ``threshold`` points
+    that best preserve the visual shape of the line; the first and last
+    points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = to_float(x)
+    y = to_float(y)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def _bin_index(values, bins, value_range=None):
+    lo, hi = value_range if value_range is not None else (values.min(), values.max())
+    if hi <= lo:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.clip(((values - lo) / (hi - lo) * bins).astype(np.int64), 0, bins - 1)
+
+
+def density_bins(df, x, y, width, height, color=None, cell_px=4, sparse=2):
+    """Reduce a scatter to at most one marker per screen cell and color group.
+
+    The plot area is divided into cells of ``cell_px`` pixels. Cells holding
+    more than ``sparse`` points collapse to a single marker at the points'
+    centroid with a ``count``; points in sparser cells, which are where the
+    outliers live, are kept at their exact positions with a count of 1.
+    Categorical ``color`` columns are binned per category, numeric ones are
+    averaged per cell. Returns a DataFrame with ``x``, ``y``, ``count`` and
+    optionally ``color`` columns.
+    """
+    columns = {'x': df[x], 'y': df[y]}
+    if color:
+        columns['color'] = df[color]
+    frame = pd.DataFrame(columns).dropna(subset=['x', 'y'])
+    nx = max(int(width) // cell_px, 1)
+    ny = max(int(height) // cell_px, 1)
+    frame['_bin'] = (_bin_index(to_float(frame['x']), nx) * ny
+                     + _bin_index(to_float(frame['y']), ny))
+
+    group_color = color and not pd.api.types.is_numeric_dtype(frame['color'])
+    keys = ['_bin', 'color'] if group_color else ['_bin']
+    sizes = frame.groupby(keys, sort=False, observed=True, dropna=False)['x'].transform('size')
+
+    raw = frame[sizes <= sparse].drop(columns='_bin')
+    raw['count'] = 1
+    aggregations = {'x': ('x', 'mean'), 'y': ('y', 'mean'), 'count': ('x', 'size')}
+    if color and not group_color:
+        aggregations['color'] = ('color', 'mean')
+    dense = (frame[sizes > sparse]
+             .groupby(keys, sort=False, observed=True, dropna=False)
+             .agg(**aggregations)
+             .reset_index()
+             .drop(columns='_bin'))
+    return pd.concat([raw, dense], ignore_index=True)
+
+
+def filter_range(df, column, value_range):
+    """Keep rows whose ``column`` lies within the inclusive ``value_range``."""
+    if not value_range:
+        return df
+    lo, hi = value_range
+    series = df[column]
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+    else:
+        series = pd.to_numeric(series, errors='coerce')
+        lo, hi = float(lo), float(hi)
+    return df[(series >= lo) & (series <= hi)]
+
+
+class GridDensity:
+    """Streaming density binning over a fixed plot range.
+
+    Points are counted into an ``nx`` x ``ny`` grid spanning ``x_range`` and
+    ``y_range``, keeping the centroid of each occupied cell. Points outside
+    the range are kept verbatim as outliers, up to ``max_outliers``. Memory
+    is bounded by the grid size regardless of how many points stream through.
+    """
+
+    def __init__(self, x_range, y_range, nx, ny, max_outliers=5000):
+        self.x_range = x_range
+        self.y_range = y_range
+        self.nx = nx
+        self.ny = ny
+        self.max_outliers = max_outliers
+        self.counts = np.zeros(nx * ny, dtype=np.int64)
+        self.x_sums = np.zeros(nx * ny)
+        self.y_sums = np.zeros(nx * ny)
+        self.outliers = []
+        self.outlier_count = 0
+
+    def update(self, x, y):
+        inside = ((x >= self.x_range[0]) & (x <= self.x_range[1])
+                  & (y >= self.y_range[0]) & (y <= self.y_range[1]))
+        cells = (_bin_index(x[inside], self.nx, self.x_range) * self.ny
+                 + _bin_index(y[inside], self.ny, self.y_range))
+        size = self.nx * self.ny
+        self.counts += np.bincount(cells, minlength=size)
+        self.x_sums += np.bincount(cells, weights=x[inside], minlength=size)
+        self.y_sums += np.bincount(cells, weights=y[inside], minlength=size)
+        outside = np.flatnonzero(~inside)
+        self.outlier_count += len(outside)
+        room = self.max_outliers - sum(len(block) for block in self.outliers)
+        if room > 0 and len(outside):
+            self.outliers.append(np.column_stack([x[outside[:room]], y[outside[:room]]]))
+
+    def result(self):
+        """A DataFrame of ``x``, ``y`` and ``count`` in the shape of ``density_bins``."""
+        occupied = np.flatnonzero(self.counts)
+        counts = self.counts[occupied]
+        dense = pd.DataFrame({'x': self.x_sums[occupied] / counts,
+                              'y': self.y_sums[occupied] / counts,
+                              'count': counts})
+        if not self.outliers:
+            return dense
+        outliers = np.vstack(self.outliers)
+        return pd.concat([dense, pd.DataFrame({'x': outliers[:, 0], 'y': outliers[:, 1], 'count': 1})],
+                         ignore_index=True)
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import pandas as pd
+from utils.ingest import META_FILE, write_chunks
+
+WORKBOOK_FILE = 'workbook.json'
+# Workbooks used this recently are never pruned, so a sheet being parsed or copied stays put
+MIN_IDLE_SECONDS = 600
+
+
+def file_digest(path, buffer_size=1024 * 1024):
+    """SHA-256 of a file's content, read in bounded blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(buffer_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def folder_size(path):
+    """Total size in bytes of the files under ``path``."""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def _is_xlsx(path):
+    return path.endswith(('.xlsx', '.xlsm'))
+
+
+def list_sheets(src_path):
+    """Sheet names of a workbook, without parsing any cells."""
+    if _is_xlsx(src_path):
+        import openpyxl
+        workbook = openpyxl.load_workbook(src_path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    with pd.ExcelFile(src_path) as workbook:
+        return list(workbook.sheet_names)
+
+
+def _header(row):
+    names = []
+    for i, value in enumerate(row):
+        name = f'Unnamed: {i}' if value is None else str(value)
+        base, n = name, 0
+        while name in names:
+            n += 1
+            name = f'{base}.{n}'
+        names.append(name)
+    return names
+
+
+def _frame(rows, names):
+    return pd.DataFrame.from_records(rows, columns=names).fillna(value=float('nan')).infer_objects()
+
+
+def _sheet_width(worksheet):
+    """Columns a read-only worksheet spans.
+
+    Sheets declaring their dimensions are read padded to that width; for
+    the rest the rows are scanned once for the last non-empty cell.
+    """
+    if worksheet.max_column is not None:
+        return worksheet.max_column
+    width = 0
+    for row in worksheet.iter_rows(values_only=True):
+        filled = [i for i, value in enumerate(row) if value is not None]
+        if filled:
+            width = max(width, filled[-1] + 1)
+    return width
+
+
+def iter_sheet_chunks(src_path, sheet, chunk_rows):
+    """Yield one sheet as DataFrames of at most ``chunk_rows`` rows.
+
+    ``.xlsx`` sheets are streamed with openpyxl in read-only mode, so only
+    one chunk of cell values is held at a time; the first row is the
+    header and blank rows are skipped. Columns without a header cell are
+    named ``Unnamed: <i>`` as pandas does, and a sheet with a header but
+    no rows still yields its columns. Legacy ``.xls`` files have no
+    streaming reader and are parsed whole, then sliced.
+    """
+    if not _is_xlsx(src_path):
+        df = pd.read_excel(src_path, sheet_name=sheet)
+        for start in range(0, max(len(df), 1), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(src_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet]
+        width = _sheet_width(worksheet)
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        names = [] if header is None else _header(header + (None,) * (width - len(header)))
+        batch, yielded = [], False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row[:len(names)] + (None,) * (len(names) - len(row)))
+            if len(batch) == chunk_rows:
+                yield _frame(batch, names)
+                batch, yielded = [], True
+        if batch or not yielded:
+            yield _frame(batch, names)
+    finally:
+        workbook.close()
+
+
+def cache_sheet(src_path, sheet, path, chunk_rows):
+    """Parse one sheet into Parquet parts under ``path``; runs in a worker process.
+
+    Parts are written to a temporary directory and renamed into place, so a
+    sheet is either fully cached or absent.
+    """
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    meta = write_chunks(iter_sheet_chunks(src_path, sheet, chunk_rows), tmp_path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another worker cached the same sheet first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return meta
+
+
+class WorkbookCache:
+    """Columnar cache of Excel workbooks keyed by the SHA-256 of their content.
+
+    Each workbook gets a directory holding the original file, its sheet
+    names and one directory of Parquet parts per cached sheet, in the
+    layout of ``utils.ingest``. Reopening a workbook or switching sheets
+    only reads Parquet. ``prune`` keeps the cache within ``disk_budget``
+    bytes by deleting the least recently used workbooks.
+    """
+
+    def __init__(self, cache_folder, disk_budget=None):
+        self.cache_folder = cache_folder
+        self.disk_budget = disk_budget
+        os.makedirs(cache_folder, exist_ok=True)
+
+    def workbook_path(self, digest):
+        return os.path.join(self.cache_folder, digest)
+
+    def sheet_path(self, digest, index):
+        return os.path.join(self.workbook_path(digest), f'sheet-{index:03d}')
+
+    def source_path(self, digest):
+        folder = self.workbook_path(digest)
+        for name in os.listdir(folder):
+            if name.startswith('source'):
+                return os.path.join(folder, name)
+        raise FileNotFoundError(digest)
+
+    def add(self, src_path):
+        """Move a spooled workbook into the cache; return ``(digest, sheet names)``."""
+        digest = file_digest(src_path)
+        folder = self.workbook_path(digest)
+        sheets = self.sheets(digest)
+        if sheets is not None:
+            os.remove(src_path)
+            self.touch(digest)
+            return digest, sheets
+        os.makedirs(folder, exist_ok=True)
+        extension = os.path.splitext(src_path)[1]
+        source = os.path.join(folder, f'source{extension}')
+        os.replace(src_path, source)
+        sheets = list_sheets(source)
+        with open(os.path.join(folder, WORKBOOK_FILE), 'w') as f:
+            json.dump({'sheets': sheets}, f)
+        return digest, sheets
+
+    def sheets(self, digest):
+        """Sheet names of a cached workbook, or None if it is not cached."""
+        try:
+            with open(os.path.join(self.workbook_path(digest), WORKBOOK_FILE)) as f:
+                return json.load(f)['sheets']
+        except (OSError, ValueError):
+            return None
+
+    def is_cached(self, digest, index):
+        return os.path.exists(os.path.join(self.sheet_path(digest, index), META_FILE))
+
+    def touch(self, digest):
+        """Mark a workbook as used; pruning removes the least recently used first."""
+        try:
+            os.utime(self.workbook_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def prune(self):
+        """Delete least recently used workbooks until the cache fits ``disk_budget``; return how many.
+
+        Workbooks used within ``MIN_IDLE_SECONDS`` are kept even over budget.
+        """
+        if self.disk_budget is None:
+            return 0
+        workbooks = []
+        for digest in os.listdir(self.cache_folder):
+            folder = self.workbook_path(digest)
+            try:
+                workbooks.append((os.path.getmtime(folder), folder_size(folder), folder))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in workbooks)
+        removed = 0
+        idle_before = time.time() - MIN_IDLE_SECONDS
+        for used, size, folder in sorted(workbooks):
+            if total <= self.disk_budget or used > idle_before:
+                break
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,146 @@
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import ipc
+
+# Format name -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'csv.zst': ('application/zstd', '.csv.zst'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'feather': ('application/vnd.apache.arrow.file', '.feather')
+}
+CSV_CODECS = {'csv.gz': 'gzip', 'csv.zst': 'zstd'}
+
+FILTER_HANDLERS = {
+    '==': lambda series, value: series == value,
+    '!=': lambda series, value: series != value,
+    '<': lambda series, value: series < value,
+    '<=': lambda series, value: series <= value,
+    '>': lambda series, value: series > value,
+    '>=': lambda series, value: series >= value,
+    'in': lambda series, value: series.isin(value),
+    'not_in': lambda series, value: ~series.isin(value),
+    'isnull': lambda series, value: series.isna(),
+    'notnull': lambda series, value: series.notna()
+}
+
+
+def validate_export(columns, available, filters, fmt):
+    """Check an export request against a dataset's columns, raising ValueError."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt in CSV_CODECS and not pa.Codec.is_available(CSV_CODECS[fmt]):
+        raise ValueError(f"Compression codec {CSV_CODECS[fmt]} is not available")
+    wanted = list(columns or []) + [f.get('column') for f in filters or []]
+    missing = [col for col in wanted if col not in available]
+    if missing:
+        raise ValueError(f"Unknown columns: {missing}")
+    for f in filters or []:
+        if f.get('op') not in FILTER_HANDLERS:
+            raise ValueError(f"Unsupported filter operator: {f.get('op')}")
+        if f['op'] in ('in', 'not_in') and not isinstance(f.get('value'), list):
+            raise ValueError(f"Filter {f['op']} needs a list value")
+
+
+def filter_chunks(chunks, filters, columns=None):
+    """Keep rows matching every filter, then project to ``columns``."""
+    for chunk in chunks:
+        if filters:
+            mask = pd.Series(True, index=chunk.index)
+            for f in filters:
+                mask &= FILTER_HANDLERS[f['op']](chunk[f['column']], f.get('value')).fillna(False)
+            chunk = chunk[mask.to_numpy(dtype=bool)]
+        yield chunk if columns is None else chunk[columns]
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands its bytes back to the caller after each chunk."""
+
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.buffer)
+        self.buffer = []
+        return data
+
+
+def _csv_writer(sink, codec):
+    if codec is None:
+        return sink
+    return pa.CompressedOutputStream(sink, codec)
+
+
+def _arrow_schema(schema):
+    """Arrow schema of an empty frame; object columns are written as strings.
+
+    An empty object column carries no values to infer a type from, and
+    object columns with mixed values are stringified by ``_to_table``.
+    """
+    arrow = pa.Schema.from_pandas(schema, preserve_index=False)
+    for i, field in enumerate(arrow):
+        if pa.types.is_null(field.type):
+            arrow = arrow.set(i, field.with_type(pa.string()))
+    return arrow
+
+
+def _to_table(chunk, schema):
+    try:
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Object columns with mixed values are written as strings, as in ingest
+        chunk = chunk.copy()
+        for col in chunk.select_dtypes(include=['object']).columns:
+            chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def stream_export(chunks, schema, fmt='csv'):
+    """Yield an export of ``chunks`` in ``fmt`` as a sequence of byte strings.
+
+    ``schema`` is an empty frame with the exported columns and their
+    dtypes, so the CSV header and the Parquet/Feather schema do not depend
+    on which rows survive filtering: an export with no matching rows is
+    still a valid file. Each chunk is encoded and its bytes yielded before
+    the next chunk is read, so only one chunk is held in memory. Parquet
+    writes one row group per non-empty chunk and Feather one record batch.
+    """
+    sink = _Sink()
+    schema = schema.rename(columns=str)
+    csv = fmt in ('csv', *CSV_CODECS)
+    if csv:
+        writer = _csv_writer(sink, CSV_CODECS.get(fmt))
+        writer.write(schema.to_csv(index=False).encode())
+    else:
+        arrow = _arrow_schema(schema)
+        writer = (pq.ParquetWriter(sink, arrow) if fmt == 'parquet'
+                  else ipc.new_file(sink, arrow, options=ipc.IpcWriteOptions(compression='lz4')))
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        chunk = chunk.rename(columns=str)
+        if csv:
+            writer.write(chunk.to_csv(index=False, header=False).encode())
+        else:
+            writer.write_table(_to_table(chunk, arrow))
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is not sink:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,187 @@
+import os
+import json
+import base64
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+META_FILE = '_meta.json'
+
+
+def spool_upload(file, path, buffer_size=1024 * 1024):
+    """Stream an uploaded file to disk without holding it in memory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file.save(path, buffer_size=buffer_size)
+    return path
+
+
+def _to_arrow(chunk):
+    """Convert a chunk to an Arrow table, stringifying mixed-type object columns."""
+    chunk = chunk.rename(columns=str)
+    try:
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        chunk = chunk.copy()
+        for col in chunk.select_dtypes(include=['object']).columns:
+            chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+
+
+def _unify(a, b):
+    """The narrowest Arrow type that holds values of both ``a`` and ``b``."""
+    if a.equals(b) or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_integer(a) and pa.types.is_integer(b):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (a, b)):
+        return pa.float64()
+    return pa.string()
+
+
+class _PartWriter:
+    """Write chunks as Parquet parts under ``path`` that all share one schema.
+
+    The schema is the first chunk's and later chunks are cast to it, so a
+    column is not ``int64`` in one part and ``object`` in the next just
+    because pandas inferred each chunk on its own. When a later chunk does
+    not fit (an integer column that turns up text further down a CSV), the
+    column is widened with ``_unify`` and the parts already written are
+    rewritten with the wider type. A column can only widen a few times, so
+    this rewrites each part a bounded number of times at most.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.schema = None
+        self.parts = []
+
+    def write(self, chunk):
+        table = _to_arrow(chunk)
+        if self.schema is None:
+            self.schema = table.schema
+        else:
+            wider = self.schema
+            for i, field in enumerate(self.schema):
+                wider = wider.set(i, field.with_type(_unify(field.type, table.schema.field(i).type)))
+            if not wider.equals(self.schema):
+                self.schema = wider
+                for part in self.parts:
+                    part_path = os.path.join(self.path, part['file'])
+                    pq.write_table(pq.read_table(part_path).cast(wider), part_path)
+            table = table.cast(self.schema)
+        filename = f'part-{len(self.parts):05d}.parquet'
+        pq.write_table(table, os.path.join(self.path, filename))
+        self.parts.append({'file': filename, 'rows': len(chunk)})
+
+    def close(self, columns):
+        return _write_meta(self.path, columns, self.parts, self.schema)
+
+
+def _write_meta(path, columns, parts, schema=None):
+    meta = {
+        'columns': columns,
+        'parts': parts,
+        'total_rows': sum(part['rows'] for part in parts)
+    }
+    if schema is not None:
+        # The Arrow schema every part was written with
+        meta['schema'] = base64.b64encode(schema.serialize().to_pybytes()).decode('ascii')
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def iter_csv_chunks(src_path, path, chunksize):
+    """Parse a CSV in bounded chunks, writing each to a Parquet part as it goes.
+
+    Yields every parsed chunk after it has been persisted so callers can
+    build previews or statistics without re-reading the file.
+    """
+    os.makedirs(path, exist_ok=True)
+    writer = _PartWriter(path)
+    columns = None
+    for chunk in pd.read_csv(src_path, chunksize=chunksize):
+        if columns is None:
+            columns = [str(c) for c in chunk.columns]
+        writer.write(chunk)
+        yield chunk
+    writer.close(columns or [])
+
+
+def write_chunks(chunks, path, columns=None):
+    """Write an iterable of DataFrame chunks to a directory of Parquet parts.
+
+    Chunks are written as they arrive, so only one is held in memory.
+    """
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    writer = _PartWriter(path)
+    for chunk in chunks:
+        if columns is None:
+            columns = [str(c) for c in chunk.columns]
+        writer.write(chunk)
+    return writer.close(columns or [])
+
+
+def write_dataset(df, path, chunksize):
+    """Write a DataFrame to a directory of Parquet parts."""
+    chunks = (df.iloc[start:start + chunksize] for start in range(0, max(len(df), 1), chunksize))
+    return write_chunks(chunks, path, [str(c) for c in df.columns])
+
+
+def read_schema(path):
+    """Return an empty DataFrame with a stored dataset's columns and dtypes."""
+    meta = read_meta(path)
+    if 'schema' in meta:
+        schema = pa.ipc.read_schema(pa.py_buffer(base64.b64decode(meta['schema'])))
+    elif meta['parts']:
+        # Datasets written before the schema was recorded
+        schema = pq.read_schema(os.path.join(path, meta['parts'][0]['file']))
+    else:
+        return pd.DataFrame(columns=meta['columns'])
+    return schema.empty_table().to_pandas()
+
+
+def iter_parts(path, columns=None):
+    """Yield the Parquet parts of a stored dataset one DataFrame at a time."""
+    for part in read_meta(path)['parts']:
+        yield pd.read_parquet(os.path.join(path, part['file']), columns=columns)
+
+
+def read_dataset(path, columns=None):
+    """Load a full dataset from its Parquet parts."""
+    frames = list(iter_parts(path, columns))
+    if not frames:
+        return pd.DataFrame(columns=columns or read_meta(path)['columns'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_rows(path, offset, limit, columns=None):
+    """Read rows [offset, offset + limit) touching only the parts that hold them."""
+    frames = []
+    start = 0
+    end = offset + limit
+    for part in read_meta(path)['parts']:
+        part_end = start + part['rows']
+        if part_end > offset and start < end:
+            frame = pd.read_parquet(os.path.join(path, part['file']), columns=columns)
+            frames.append(frame.iloc[max(offset - start, 0):end - start])
+        if part_end >= end:
+            break
+        start = part_end
+    if not frames:
+        return pd.DataFrame(columns=columns or read_meta(path)['columns'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def remove_dataset(path):
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,171 @@
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+FINISHED = {'done', 'failed', 'timeout', 'cancelled'}
+
+
+def _worker(conn, fn, args):
+    try:
+        conn.send(('done', fn(*args)))
+    except Exception as e:
+        conn.send(('failed', str(e)))
+    finally:
+        conn.close()
+
+
+class Job:
+    """A unit of work running in a separate process."""
+
+    def __init__(self, fn, args, timeout, key=None, on_done=None, kind='job', on_fail=None):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.timeout = timeout
+        self.key = key
+        self.on_done = on_done
+        self.on_fail = on_fail
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = threading.Event()
+        self.done = threading.Event()
+
+    def info(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished
+        }
+
+
+class JobManager:
+    """Runs jobs in at most ``max_workers`` worker processes at a time.
+
+    Every job gets its own process forked from a forkserver that has
+    ``preload`` modules already imported, so start-up is cheap and a job
+    that overruns its timeout or is cancelled can be terminated without
+    affecting the others. Jobs beyond ``max_workers`` wait in a queue.
+    Arguments and results cross the process boundary by pickling, so pass
+    file paths rather than DataFrames.
+
+    A job submitted with a ``key`` while another job with the same key is
+    still unfinished is not started; the existing job is returned instead.
+    ``on_done`` is called with the result when a job succeeds, before the
+    job reports ``done``, and ``on_fail`` with the job when it fails, times
+    out or is cancelled. ``kind`` labels what the job produces.
+    """
+
+    def __init__(self, max_workers, timeout, preload=(), max_jobs=256):
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._ctx = multiprocessing.get_context('forkserver')
+        self._ctx.set_forkserver_preload(list(preload))
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, timeout=None, key=None, on_done=None, kind='job', on_fail=None):
+        with self._lock:
+            if key is not None:
+                for existing in self._jobs.values():
+                    if existing.key == key and existing.status not in FINISHED:
+                        return existing
+            job = Job(fn, args, timeout or self.timeout, key, on_done, kind, on_fail)
+            self._jobs[job.job_id] = job
+            self._prune()
+        threading.Thread(target=self._supervise, args=(job,), daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_requested.set()
+        return job
+
+    def wait(self, job, seconds):
+        """Block for up to ``seconds`` until ``job`` finishes; return whether it did."""
+        return job.done.wait(seconds)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job_id]
+
+    def _finish(self, job, status, result=None, error=None):
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        callback, argument = (job.on_done, result) if status == 'done' else (job.on_fail, job)
+        if callback is not None:
+            try:
+                callback(argument)
+            except Exception as e:
+                logging.error(f"Job {job.job_id} completion callback failed: {str(e)}")
+        # Set last, so pollers only see a finished job once its callback has run
+        job.status = status
+        job.done.set()
+
+    def _supervise(self, job):
+        while not self._slots.acquire(timeout=0.25):
+            if job.cancel_requested.is_set():
+                self._finish(job, 'cancelled')
+                return
+        try:
+            if job.cancel_requested.is_set():
+                self._finish(job, 'cancelled')
+                return
+            self._run(job)
+        except Exception as e:
+            logging.error(f"Job {job.job_id} crashed: {str(e)}")
+            self._finish(job, 'failed', error=str(e))
+        finally:
+            self._slots.release()
+
+    def _run(self, job):
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_worker, args=(sender, job.fn, job.args), daemon=True)
+        process.start()
+        sender.close()
+        job.status = 'running'
+        job.started = time.time()
+        deadline = job.started + job.timeout
+        try:
+            while True:
+                if receiver.poll(0.1):
+                    status, payload = receiver.recv()
+                    if status == 'done':
+                        self._finish(job, 'done', result=payload)
+                    else:
+                        self._finish(job, 'failed', error=payload)
+                    return
+                if job.cancel_requested.is_set():
+                    process.terminate()
+                    self._finish(job, 'cancelled')
+                    return
+                if time.time() > deadline:
+                    process.terminate()
+                    self._finish(job, 'timeout', error=f'Job exceeded {job.timeout}s timeout')
+                    return
+                if not process.is_alive() and not receiver.poll():
+                    self._finish(job, 'failed', error=f'Worker exited with code {process.exitcode}')
+                    return
+        finally:
+            process.join()
+            receiver.close()
@@ -1,5 +1,7 @@
 import numpy as np
+import pandas as pd
 import json
+from datetime import date, datetime, timedelta
 
 class NumpyEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -16,11 +18,63 @@ class NumpyEncoder(json.JSONEncoder):
 def serialize_numpy(obj):
     """Convert numpy objects to Python native types."""
     if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'M':
+            return np.datetime_as_string(obj).tolist()
+        if obj.dtype.kind == 'm':
+            return obj.astype(str).tolist()
+        if obj.dtype == object and any(isinstance(v, (date, np.generic)) for v in obj.flat):
+            return [serialize_numpy(v) for v in obj.tolist()]
         return obj.tolist()
     elif isinstance(obj, (np.integer, np.floating, np.bool_)):
         return obj.item()
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    elif isinstance(obj, timedelta):
+        return str(obj)
     elif isinstance(obj, dict):
         return {k: serialize_numpy(v) for k, v in obj.items()}
     elif isinstance(obj, (list, tuple)):
         return [serialize_numpy(i) for i in obj]
     return obj
+
+def column_to_json(series):
+    """Convert a Series to a JSON-safe list in one vectorized pass.
+
+    NaN, NaT and +/-inf become None; datetimes and timedeltas become strings;
+    numpy scalars become native Python values.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype=object)
+    elif pd.api.types.is_float_dtype(series.dtype):
+        arr = series.to_numpy(dtype='float64', na_value=np.nan)
+        mask = ~np.isfinite(arr)
+        values = arr.astype(object)
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype) or pd.api.types.is_timedelta64_dtype(series.dtype):
+        mask = series.isna().to_numpy()
+        values = series.astype(str).to_numpy(dtype=object)
+    else:
+        arr = series.to_numpy(dtype=object)
+        mask = pd.isna(arr)
+        values = arr.copy()
+        # Object columns may still hold numpy scalars or Timestamps
+        special = np.fromiter((isinstance(v, (np.generic, pd.Timestamp)) for v in arr),
+                              dtype=bool, count=len(arr))
+        special &= ~mask
+        if special.any():
+            values[special] = [str(v) for v in arr[special]]
+        floats = np.fromiter((isinstance(v, float) for v in arr), dtype=bool, count=len(arr))
+        if floats.any():
+            mask |= floats & ~np.isfinite(np.where(floats, arr, 0.0).astype('float64'))
+    values[mask] = None
+    return values.tolist()
+
+def frame_to_columns(df):
+    """Convert a DataFrame to a JSON-safe mapping of column name -> list."""
+    return {str(col): column_to_json(df[col]) for col in df.columns}
+
+def frame_to_records(df):
+    """Convert a DataFrame to JSON-safe row dicts via columnar conversion."""
+    columns = frame_to_columns(df)
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
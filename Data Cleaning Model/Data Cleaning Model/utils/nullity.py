@@ -0,0 +1,80 @@
+import numpy as np
+
+# Number of set bits in every possible byte
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+
+def _popcount(packed, axis=0):
+    return _POPCOUNT[packed].sum(axis=axis)
+
+
+class NullitySummary:
+    """Row-count independent summary of where a dataset's values are missing.
+
+    Rows are split into ``blocks`` equal row buckets and the number of
+    missing cells is counted per bucket and column. Pairwise co-occurrence
+    of missing values is counted from a bit-packed nullity mask, eight rows
+    per byte, so the summary can be built from chunks in one pass with
+    memory bounded by ``blocks`` x columns + columns x columns.
+    """
+
+    def __init__(self, columns, total_rows, blocks=200):
+        self.columns = list(columns)
+        self.total_rows = total_rows
+        self.blocks = max(min(blocks, total_rows), 1)
+        width = len(self.columns)
+        self.block_missing = np.zeros((self.blocks, width), dtype=np.int64)
+        self.block_rows = np.zeros(self.blocks, dtype=np.int64)
+        self.both_missing = np.zeros((width, width), dtype=np.int64)
+        self.rows = 0
+
+    def update(self, chunk):
+        mask = chunk[self.columns].isna().to_numpy()
+        if len(mask) == 0:
+            return self
+        rows = np.arange(self.rows, self.rows + len(mask))
+        block = np.minimum(rows * self.blocks // max(self.total_rows, 1), self.blocks - 1)
+        starts = np.flatnonzero(np.r_[True, block[1:] != block[:-1]])
+        self.block_missing[block[starts]] += np.add.reduceat(mask, starts, axis=0, dtype=np.int64)
+        self.block_rows[block[starts]] += np.diff(np.r_[starts, len(mask)])
+
+        packed = np.packbits(mask, axis=0)
+        for i in np.flatnonzero(mask.any(axis=0)):
+            self.both_missing[i] += _popcount(packed & packed[:, i:i + 1])
+        self.rows += len(mask)
+        return self
+
+    @property
+    def missing(self):
+        return np.diag(self.both_missing)
+
+    def block_fractions(self):
+        """Fraction of missing cells per row bucket (rows) and column."""
+        return self.block_missing / np.maximum(self.block_rows, 1)[:, None]
+
+    def block_ranges(self):
+        """``(first_row, last_row)`` covered by each row bucket."""
+        ends = np.cumsum(self.block_rows)
+        return list(zip((ends - self.block_rows).tolist(), (ends - 1).tolist()))
+
+    def correlation(self):
+        """Phi coefficient between the nullity masks of every pair of columns.
+
+        Columns that are never or always missing have no defined correlation
+        and are NaN.
+        """
+        n = float(self.rows)
+        missing = self.missing.astype(np.float64)
+        present = n - missing
+        with np.errstate(divide='ignore', invalid='ignore'):
+            numerator = n * self.both_missing - np.outer(missing, missing)
+            denominator = np.sqrt(np.outer(missing * present, missing * present))
+            return numerator / denominator
+
+
+def summarize_nullity(chunks, columns, total_rows, blocks=200):
+    """Build a NullitySummary from an iterable of DataFrame chunks in row order."""
+    summary = NullitySummary(columns, total_rows, blocks)
+    for chunk in chunks:
+        summary.update(chunk)
+    return summary
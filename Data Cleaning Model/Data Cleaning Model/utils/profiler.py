@@ -0,0 +1,351 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+PARTITION_ROWS = 250000
+
+
+class Moments:
+    """Count, mean, variance, min and max merged with Chan's parallel Welford update."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.n = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch.
+
+    Level ``i`` holds items of weight ``2 ** i``. A level that grows past
+    ``k`` items is sorted and every other item is promoted to the next level.
+    Quantiles are exact while the sketch has seen at most ``k`` values.
+    """
+
+    def __init__(self, k=1024):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._offset = 0
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                keep = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                self._offset ^= 1
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[self._offset::2]])
+            level += 1
+
+    def quantile(self, q):
+        values = self.quantiles([q])
+        return None if values is None else float(values[0])
+
+    def quantiles(self, qs):
+        """Vectorized ``quantile`` for an array of ranks; None while the sketch is empty."""
+        return self._ranked(self.levels, qs)
+
+    def deviation_quantile(self, center, q):
+        """Quantile ``q`` of ``|x - center|`` over the values seen, from the sketch alone.
+
+        Each distance bound is a two-sided interval of values, so the rank
+        error is at most twice that of ``quantile``; exact while the sketch is.
+        """
+        values = self._ranked([np.abs(items - center) for items in self.levels], [q])
+        return None if values is None else float(values[0])
+
+    @staticmethod
+    def _ranked(levels, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if all(len(items) == 0 for items in levels):
+            return None
+        if all(len(items) == 0 for items in levels[1:]):
+            return np.quantile(levels[0], qs)
+        items = np.concatenate(levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[order][np.minimum(idx, len(items) - 1)]
+
+
+def _bit_length(x):
+    """Vectorized bit length of a uint64 array."""
+    x = x.copy()
+    length = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = (x >> np.uint64(shift)) > 0
+        length[mask] += shift
+        x[mask] >>= np.uint64(shift)
+    length += (x > 0).astype(np.uint8)
+    return length
+
+
+class DistinctCounter:
+    """HyperLogLog distinct counter that stays exact for small cardinalities.
+
+    Hashes are kept verbatim until more than ``exact_limit`` distinct values
+    have been seen, after which only the ``2 ** p`` HLL registers are used.
+    """
+
+    def __init__(self, p=14, exact_limit=10000):
+        self.p = p
+        self.exact_limit = exact_limit
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+        self.exact = np.empty(0, dtype=np.uint64)
+
+    def update(self, series):
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest).astype(np.int64) + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+        if self.exact is not None:
+            self._add_exact(np.unique(hashes))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact is not None and other.exact is not None:
+            self._add_exact(other.exact)
+        else:
+            self.exact = None
+
+    def _add_exact(self, hashes):
+        self.exact = np.union1d(self.exact, hashes)
+        if len(self.exact) > self.exact_limit:
+            self.exact = None
+
+    def count(self):
+        if self.exact is not None:
+            return int(len(self.exact))
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    """Misra-Gries frequent-value summary, exact while under ``capacity`` distinct values."""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, series):
+        for value, count in series.value_counts().items():
+            # Categoricals report every category, including unseen ones
+            if count:
+                self.counts[value] = self.counts.get(value, 0) + int(count)
+        self._trim()
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._trim()
+
+    def _trim(self):
+        if len(self.counts) <= self.capacity:
+            return
+        threshold = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {v: c - threshold for v, c in self.counts.items() if c > threshold}
+
+    def top(self, n):
+        return dict(sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n])
+
+
+def _common_dtype(a, b):
+    if a == b:
+        return a
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b) \
+            and not pd.api.types.is_bool_dtype(a) and not pd.api.types.is_bool_dtype(b):
+        return np.result_type(a, b)
+    return np.dtype('object')
+
+
+def _is_numeric(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _is_categorical(dtype):
+    return dtype == object or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+class ColumnProfile:
+    """Single-pass, mergeable statistics for one column."""
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.rows = 0
+        self.missing = 0
+        self.moments = Moments()
+        self.quantiles = QuantileSketch()
+        self.distinct = DistinctCounter()
+        self.heavy = HeavyHitters()
+
+    def update(self, series):
+        self.dtype = _common_dtype(self.dtype, series.dtype)
+        self.rows += len(series)
+        present = series.dropna()
+        self.missing += len(series) - len(present)
+        self.distinct.update(present)
+        if _is_numeric(series.dtype):
+            values = present.to_numpy(dtype=np.float64)
+            self.moments.update(values)
+            self.quantiles.update(values)
+        elif _is_categorical(series.dtype):
+            self.heavy.update(present)
+
+    def merge(self, other):
+        self.dtype = _common_dtype(self.dtype, other.dtype)
+        self.rows += other.rows
+        self.missing += other.missing
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.heavy.merge(other.heavy)
+
+    def numeric_stats(self):
+        q1 = self.quantiles.quantile(0.25)
+        q3 = self.quantiles.quantile(0.75)
+        return {
+            'mean': self.moments.mean,
+            'median': self.quantiles.quantile(0.5),
+            'std': self.moments.std,
+            'min': self.moments.min,
+            'max': self.moments.max,
+            'q1': q1,
+            'q3': q3,
+            'iqr': q3 - q1
+        }
+
+
+class DatasetProfile:
+    """Mergeable per-column profile of a dataset built from one or more chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, df):
+        self.rows += len(df)
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(df[col].dtype)
+            self.columns[col].update(df[col])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        return self
+
+    def retype(self, df):
+        """Take column dtypes from ``df``, e.g. after the frame has been compacted."""
+        for col, profile in self.columns.items():
+            if col in df.columns:
+                profile.dtype = df[col].dtype
+        return self
+
+    def to_analysis(self):
+        """Render the profile in the shape returned by ``analyze_columns``."""
+        numeric = [col for col, p in self.columns.items() if _is_numeric(p.dtype)]
+        categorical = [col for col, p in self.columns.items() if _is_categorical(p.dtype)]
+        analysis = {
+            'data_types': {col: str(p.dtype) for col, p in self.columns.items()},
+            'missing_values': {col: p.missing for col, p in self.columns.items()},
+            'unique_counts': {col: p.distinct.count() for col, p in self.columns.items()},
+            'numeric_columns': numeric,
+            'categorical_columns': categorical,
+            'column_stats': {}
+        }
+        for col in numeric:
+            profile = self.columns[col]
+            if profile.moments.n:
+                analysis['column_stats'][col] = profile.numeric_stats()
+        for col in categorical:
+            analysis['column_stats'][col] = {
+                'top_values': self.columns[col].heavy.top(5)
+            }
+        return analysis
+
+
+def profile_chunks(chunks):
+    """Profile an iterable of DataFrame chunks in a single pass."""
+    profile = DatasetProfile()
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def profile_stream(chunks, profile):
+    """Yield chunks unchanged while folding each one into ``profile``."""
+    for chunk in chunks:
+        profile.update(chunk)
+        yield chunk
+
+
+def profile_frame(df, partition_rows=PARTITION_ROWS, max_workers=None):
+    """Profile a DataFrame, splitting large frames into partitions profiled in parallel."""
+    if len(df) <= partition_rows:
+        return DatasetProfile().update(df)
+    partitions = [df.iloc[start:start + partition_rows] for start in range(0, len(df), partition_rows)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        profiles = list(executor.map(lambda part: DatasetProfile().update(part), partitions))
+    result = profiles[0]
+    for profile in profiles[1:]:
+        result.merge(profile)
+    return result
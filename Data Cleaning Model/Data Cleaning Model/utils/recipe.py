@@ -0,0 +1,228 @@
+import time
+import logging
+import pandas as pd
+from utils.ingest import iter_parts, write_chunks
+from utils.profiler import Moments, QuantileSketch, HeavyHitters, DatasetProfile, profile_stream
+
+RECIPE_OPERATIONS = {'fill_mean', 'fill_median', 'fill_mode', 'fill_value',
+                     'ffill', 'bfill', 'interpolate', 'remove_rows'}
+STAT_OPERATIONS = {'fill_mean', 'fill_median', 'fill_mode'}
+NUMERIC_OPERATIONS = {'fill_mean', 'fill_median', 'interpolate'}
+
+
+def _coerce(chunks, column):
+    for chunk in chunks:
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        yield chunk
+
+
+def _last_valid_position(series):
+    valid = series.notna().to_numpy().nonzero()[0]
+    return int(valid[-1]) if len(valid) else None
+
+
+def _fill_constant(chunks, column, value):
+    for chunk in chunks:
+        chunk[column] = chunk[column].fillna(value)
+        yield chunk
+
+
+def _ffill(chunks, column):
+    """Forward fill, carrying the last valid value across chunk boundaries."""
+    carry = None
+    for chunk in chunks:
+        series = chunk[column].ffill()
+        if carry is not None:
+            series = series.fillna(carry)
+        last = _last_valid_position(series)
+        if last is not None:
+            carry = series.iloc[last]
+        chunk[column] = series
+        yield chunk
+
+
+def _hold_back(chunks, column, fill):
+    """Run ``fill(series, anchor)`` over a chunk stream, holding back trailing gaps.
+
+    Rows after the last valid value of ``column`` cannot be filled until a
+    later chunk supplies the next valid value, so they are prepended to the
+    next chunk instead of being emitted. ``anchor`` is the last valid value
+    seen before the current chunk. Whatever is still held at the end is
+    flushed through ``fill`` with no further values. Memory is bounded by the
+    chunk size plus the longest run of missing values in ``column``.
+    """
+    pending = None
+    anchor = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk], ignore_index=True)
+        last = _last_valid_position(chunk[column])
+        if last is None:
+            pending = chunk
+            continue
+        ready = chunk.iloc[:last + 1].copy()
+        pending = chunk.iloc[last + 1:] if last + 1 < len(chunk) else None
+        ready[column] = fill(ready[column], anchor)
+        anchor = ready[column].iloc[-1]
+        yield ready
+    if pending is not None and len(pending):
+        pending = pending.copy()
+        pending[column] = fill(pending[column], anchor, final=True)
+        yield pending
+
+
+def _bfill_series(series, anchor, final=False):
+    return series.bfill()
+
+
+def _interpolate_series(series, anchor, final=False):
+    if anchor is None:
+        return series.interpolate(method='linear')
+    anchored = pd.concat([pd.Series([anchor], dtype=series.dtype), series], ignore_index=True)
+    return pd.Series(anchored.interpolate(method='linear').iloc[1:].to_numpy(), index=series.index)
+
+
+def _remove_rows(chunks, column):
+    for chunk in chunks:
+        yield chunk.dropna(subset=[column]).copy()
+
+
+class _StatCollector:
+    """Accumulates the statistic a fill operation needs while passing chunks through."""
+
+    def __init__(self, op):
+        self.op = op
+        if op['type'] == 'fill_mean':
+            self.sketch = Moments()
+        elif op['type'] == 'fill_median':
+            self.sketch = QuantileSketch(k=4096)
+        else:
+            self.sketch = HeavyHitters(capacity=1000)
+
+    def collect(self, chunks):
+        for chunk in chunks:
+            series = chunk[self.op['column']].dropna()
+            if self.op['type'] == 'fill_mode':
+                self.sketch.update(series)
+            else:
+                self.sketch.update(series.to_numpy(dtype='float64'))
+            yield chunk
+
+    def result(self):
+        if self.op['type'] == 'fill_mean':
+            if self.sketch.n == 0:
+                raise ValueError("Cannot calculate mean of non-numeric data")
+            return self.sketch.mean
+        if self.op['type'] == 'fill_median':
+            return self.sketch.quantile(0.5)
+        if not self.sketch.counts:
+            raise ValueError("Cannot calculate mode of an empty column")
+        top = max(self.sketch.counts.values())
+        candidates = [v for v, c in self.sketch.counts.items() if c == top]
+        try:
+            return min(candidates)
+        except TypeError:
+            return candidates[0]
+
+
+def _collectable(operations, stats):
+    """Indices of unresolved stat operations whose inputs are fully known this pass.
+
+    An unresolved fill leaves its column unknown for the rest of the pass, and
+    a ``remove_rows`` on an unknown column leaves every row unknown.
+    """
+    unknown = set()
+    rows_unknown = False
+    collect = []
+    for index, op in enumerate(operations):
+        column = op['column']
+        if op['type'] in STAT_OPERATIONS and index not in stats:
+            if not rows_unknown and column not in unknown:
+                collect.append(index)
+            unknown.add(column)
+        elif op['type'] == 'remove_rows' and (rows_unknown or column in unknown):
+            rows_unknown = True
+    return collect
+
+
+def _pipeline(chunks, operations, stats, collectors=None):
+    """Chain the streaming transform for each operation over ``chunks``."""
+    collectors = collectors or {}
+    last = max(collectors) if collectors else len(operations) - 1
+    chunks = (chunk.copy() for chunk in chunks)
+    for index, op in enumerate(operations[:last + 1]):
+        column = op['column']
+        if op['type'] in NUMERIC_OPERATIONS:
+            chunks = _coerce(chunks, column)
+        if index in collectors:
+            chunks = collectors[index].collect(chunks)
+        elif op['type'] in STAT_OPERATIONS:
+            if index in stats:
+                chunks = _fill_constant(chunks, column, stats[index])
+        elif op['type'] == 'fill_value':
+            chunks = _fill_constant(chunks, column, op['value'])
+        elif op['type'] == 'ffill':
+            chunks = _ffill(chunks, column)
+        elif op['type'] == 'bfill':
+            chunks = _hold_back(chunks, column, _bfill_series)
+        elif op['type'] == 'interpolate':
+            chunks = _hold_back(chunks, column, _interpolate_series)
+        elif op['type'] == 'remove_rows':
+            chunks = _remove_rows(chunks, column)
+    return chunks
+
+
+def resolve_statistics(chunk_source, operations):
+    """Compute the mean/median/mode each fill operation needs from streaming passes.
+
+    ``chunk_source`` is a callable returning a fresh iterator of chunks. Most
+    recipes resolve in one pass; a fill that depends on an earlier fill of the
+    same column (directly or through ``remove_rows``) needs another.
+    """
+    stats = {}
+    pending = [i for i, op in enumerate(operations) if op['type'] in STAT_OPERATIONS]
+    while len(stats) < len(pending):
+        collectors = {index: _StatCollector(operations[index])
+                      for index in _collectable(operations, stats)}
+        for _ in _pipeline(chunk_source(), operations, stats, collectors):
+            pass
+        for index, collector in collectors.items():
+            stats[index] = collector.result()
+        logging.info(f"Resolved recipe statistics for operations {sorted(collectors)}")
+    return stats
+
+
+def validate_recipe(operations, columns):
+    """Return a list of problems with a recipe, empty if it can be replayed."""
+    errors = []
+    for index, op in enumerate(operations):
+        if op.get('type') not in RECIPE_OPERATIONS:
+            errors.append({'index': index, 'error': f"Unsupported operation: {op.get('type')}"})
+        elif op.get('column') not in columns:
+            errors.append({'index': index, 'error': 'Column not found'})
+        elif op['type'] == 'fill_value' and op.get('value') is None:
+            errors.append({'index': index, 'error': 'No fill value provided'})
+    return errors
+
+
+def replay_recipe(chunk_source, operations):
+    """Replay a cleaning recipe over a chunked dataset in constant memory.
+
+    Returns ``(chunks, stats)`` where ``chunks`` lazily yields cleaned chunks
+    in input order, ready to be written out as a stream.
+    """
+    stats = resolve_statistics(chunk_source, operations)
+    return _pipeline(chunk_source(), operations, stats), stats
+
+
+def replay_to_path(source_path, operations, path):
+    """Replay a recipe over the Parquet parts at ``source_path`` into new parts at ``path``.
+
+    Runs inside a job worker process. Returns the profile of the cleaned
+    rows, the statistics resolved for each fill and the time taken.
+    """
+    start = time.perf_counter()
+    chunks, stats = replay_recipe(lambda: iter_parts(source_path), operations)
+    profile = DatasetProfile()
+    write_chunks(profile_stream(chunks, profile), path)
+    return {'profile': profile, 'stats': stats, 'seconds': time.perf_counter() - start}
@@ -0,0 +1,85 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.json_utils import serialize_numpy
+
+
+def once(fn):
+    """Wrap ``fn`` so concurrent callers share a single evaluation."""
+    lock = threading.Lock()
+    result = []
+
+    def wrapper():
+        with lock:
+            if not result:
+                result.append(fn())
+            return result[0]
+    return wrapper
+
+
+def describe_profile(profile):
+    """Render a DatasetProfile in the shape of ``DataFrame.describe().to_dict()``."""
+    stats = {}
+    for col, column in profile.columns.items():
+        if not column.moments.n:
+            continue
+        numeric = column.numeric_stats()
+        stats[col] = {
+            'count': column.rows - column.missing,
+            'mean': numeric['mean'],
+            'std': numeric['std'],
+            'min': numeric['min'],
+            '25%': numeric['q1'],
+            '50%': numeric['median'],
+            '75%': numeric['q3'],
+            'max': numeric['max']
+        }
+    return stats
+
+
+def run_sections(sections, max_workers=None):
+    """Run report sections concurrently, yielding ``(name, result, error)`` as each finishes.
+
+    ``sections`` maps a section name to a zero-argument callable. Sections
+    are yielded in completion order, so fast sections are not held back by
+    slow ones. Closing the generator cancels sections that have not started.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(sections))
+    futures = {executor.submit(fn): name for name, fn in sections.items()}
+    try:
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def encode_events(events, fmt='ndjson'):
+    """Encode ``run_sections`` output as NDJSON lines or Server-Sent Events.
+
+    A final ``done`` event reports how many sections failed and the total time.
+    """
+    start = time.perf_counter()
+    failed = 0
+    for name, result, error in events:
+        failed += error is not None
+        payload = {
+            'section': name,
+            'success': error is None,
+            'data': serialize_numpy(result),
+            'error': error,
+            'elapsed': round(time.perf_counter() - start, 3)
+        }
+        yield _encode(payload, fmt)
+    yield _encode({'section': 'done', 'success': failed == 0, 'failed': failed,
+                   'elapsed': round(time.perf_counter() - start, 3)}, fmt)
+
+
+def _encode(payload, fmt):
+    data = json.dumps(payload, default=str)
+    if fmt == 'sse':
+        return f"event: {payload['section']}\ndata: {data}\n\n"
+    return data + '\n'
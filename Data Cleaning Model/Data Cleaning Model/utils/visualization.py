@@ -1,32 +1,68 @@
 import pandas as pd
 import numpy as np
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from utils.ingest import read_dataset, read_meta, read_schema, iter_parts
+from utils.json_utils import serialize_numpy
+from vizpro_common.figures import figure_payload
+from utils.downsample import lttb, density_bins, filter_range, GridDensity
+from utils.nullity import summarize_nullity
+from utils.correlation import numeric_columns, frame_correlation, streaming_correlation
+from utils.clustering import fit_model, assign, evaluate_k, best_k
+from utils.anomalies import scan_anomalies, isolation_forest
+from utils.decomposition import fit_in_memory, fit_incremental, project_chunks, IN_MEMORY_CELLS
+
+# Scatter plots with more points than this are density-binned
+SCATTER_RAW_POINTS = 10000
+# Row buckets in the missing data matrix
+MISSING_MATRIX_BLOCKS = 200
+# Correlation heatmaps show at most this many columns
+CORRELATION_MAX_COLUMNS = 60
+CORRELATION_TOP_PAIRS = 10
+ANOMALY_CHUNK_ROWS = 250000
+# Multi-column anomaly charts show the columns with the most outliers
+ANOMALY_MAX_COLUMNS = 50
 
 def serialize_plot(fig):
-    """Helper function to properly serialize Plotly figures."""
+    """Serialize a Plotly figure once, with numeric trace arrays as typed arrays."""
     try:
-        return {
-            'data': fig.to_dict()['data'],
-            'layout': fig.to_dict()['layout']
-        }
+        return figure_payload(fig)
     except Exception as e:
         raise Exception(f"Error serializing plot: {str(e)}")
 
-def create_correlation_matrix(df):
+def create_correlation_matrix(df, method='pearson', precision='float64'):
     """Create a correlation matrix."""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    corr_matrix = df[numeric_cols].corr().round(4)
+    return plot_correlation(frame_correlation(df, method, precision))
+
+def plot_correlation(stats, max_columns=CORRELATION_MAX_COLUMNS):
+    """Plot CorrelationStats as a heatmap.
+
+    Wide datasets are narrowed to the ``max_columns`` columns taking part in
+    the strongest pairs, so the payload stays bounded. The strongest pairs
+    are listed in the layout's ``meta``.
+    """
+    top_pairs = stats.top_pairs(CORRELATION_TOP_PAIRS)
+    matrix = stats.matrix()
+    columns = stats.columns
+    if len(columns) > max_columns:
+        shown = []
+        for pair in stats.top_pairs(max_columns):
+            for col in (pair['column_1'], pair['column_2']):
+                if col not in shown and len(shown) < max_columns:
+                    shown.append(col)
+        index = [columns.index(col) for col in shown]
+        matrix = matrix[np.ix_(index, index)]
+        columns = shown
+    corr_matrix = pd.DataFrame(matrix, index=columns, columns=columns).round(4)
     
     fig = px.imshow(corr_matrix,
                     labels=dict(x="Features", y="Features", color="Correlation"),
                     aspect="auto")
     
     fig.update_layout(
+        meta={'columns': len(stats.columns), 'shown': len(columns), 'top_pairs': top_pairs},
         width=900,
         height=700,
         margin=dict(l=50, r=50, t=50, b=50),
@@ -40,14 +76,42 @@ def create_correlation_matrix(df):
     )
     return serialize_plot(fig)
 
-def create_scatter_plot(df, x_col, y_col, color_col=None):
-    """Create scatter plot data."""
-    fig = px.scatter(df, x=x_col, y=y_col, color=color_col,
-                    title=f"Scatter Plot: {x_col} vs {y_col}")
+def _plottable(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_any_dtype(series.dtype)
+
+def create_scatter_plot(df, x_col, y_col, color_col=None, width=900, height=600,
+                        x_range=None, y_range=None):
+    """Create scatter plot data.
+
+    Above SCATTER_RAW_POINTS points the scatter is density-binned to at most
+    one marker per few screen pixels, sized by how many points it stands
+    for, with points in sparse regions kept exactly. ``x_range`` and
+    ``y_range`` restrict the plot to a zoomed-in window.
+    """
+    df = filter_range(filter_range(df, x_col, x_range), y_col, y_range)
+    if color_col and isinstance(df[color_col].dtype, pd.CategoricalDtype):
+        # A zoomed-in window may not contain every category
+        df = df.assign(**{color_col: df[color_col].cat.remove_unused_categories()})
+    rows = len(df)
+    title = f"Scatter Plot: {x_col} vs {y_col}"
+    if rows <= SCATTER_RAW_POINTS:
+        fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=title)
+    elif _plottable(df[x_col]) and _plottable(df[y_col]):
+        binned = density_bins(df, x_col, y_col, width, height, color_col)
+        binned['size'] = 1 + np.log2(binned['count'])
+        fig = px.scatter(binned, x='x', y='y', color='color' if color_col else None,
+                         size='size', size_max=12, hover_data={'count': True, 'size': False},
+                         labels={'x': x_col, 'y': y_col, 'color': color_col},
+                         title=f"{title} ({rows:,} points in {len(binned):,} markers)")
+    else:
+        sample = df.sample(SCATTER_RAW_POINTS, random_state=0).sort_index()
+        fig = px.scatter(sample, x=x_col, y=y_col, color=color_col,
+                         title=f"{title} ({SCATTER_RAW_POINTS:,} of {rows:,} points)")
     
     fig.update_layout(
-        width=900,
-        height=600,
+        meta={'rows': rows, 'downsampled': rows > SCATTER_RAW_POINTS},
+        width=width,
+        height=height,
         margin=dict(l=40, r=40, t=60, b=40),
         showlegend=True,
         template="plotly_white",
@@ -60,26 +124,60 @@ def create_scatter_plot(df, x_col, y_col, color_col=None):
     )
     return serialize_plot(fig)
 
-def perform_pca_visualization(df):
-    """Perform PCA and return visualization data."""
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+def perform_pca_visualization(df, width=900, height=600):
+    """Perform PCA and return visualization data.
+
+    Wide data uses randomized SVD. The projection is density-binned once it
+    exceeds SCATTER_RAW_POINTS points.
+    """
+    numeric_cols = numeric_columns(df)
     if len(numeric_cols) < 2:
         raise ValueError("Need at least 2 numeric columns for PCA")
-    
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(df[numeric_cols])
-    
-    pca = PCA(n_components=2)
-    components = pca.fit_transform(scaled_data)
-    
-    fig = px.scatter(x=components[:, 0], y=components[:, 1],
-                    labels={'x': 'First Principal Component',
-                           'y': 'Second Principal Component'},
-                    title='PCA Visualization')
+
+    pca, components = fit_in_memory(df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan))
+    points = pd.DataFrame({'x': components[:, 0], 'y': components[:, 1]})
+    if len(points) > SCATTER_RAW_POINTS:
+        points = density_bins(points, 'x', 'y', width, height)
+    return _pca_figure(points, pca, len(components), width, height)
+
+def streaming_pca_visualization(chunk_source, columns, width=900, height=600):
+    """PCA over a chunked dataset with IncrementalPCA, in bounded memory.
+
+    The projection is binned into a fixed grid spanning four standard
+    deviations of each component; points outside it are kept as outliers.
+    """
+    if len(columns) < 2:
+        raise ValueError("Need at least 2 numeric columns for PCA")
+    scaler, pca = fit_incremental(chunk_source, columns)
+    spread = 4 * np.sqrt(pca.explained_variance_[:2])
+    grid = GridDensity((-spread[0], spread[0]), (-spread[1], spread[1]),
+                       max(width // 4, 1), max(height // 4, 1))
+    rows = 0
+    for projected in project_chunks(chunk_source, columns, scaler, pca):
+        grid.update(projected[:, 0], projected[:, 1])
+        rows += len(projected)
+    return _pca_figure(grid.result(), pca, rows, width, height)
+
+def _pca_figure(points, pca, rows, width, height):
+    ratios = pca.explained_variance_ratio_
+    labels = {'x': f'First Principal Component ({ratios[0]:.1%})',
+              'y': f'Second Principal Component ({ratios[1]:.1%})'}
+    if 'count' in points:
+        points = points.assign(size=1 + np.log2(points['count']))
+        fig = px.scatter(points, x='x', y='y', size='size', size_max=12,
+                         hover_data={'count': True, 'size': False}, labels=labels,
+                         title=f'PCA Visualization ({rows:,} points in {len(points):,} markers)')
+    else:
+        fig = px.scatter(points, x='x', y='y', labels=labels, title='PCA Visualization')
     
     fig.update_layout(
-        width=900,
-        height=600,
+        meta={
+            'rows': rows,
+            'explained_variance_ratio': ratios.tolist(),
+            'cumulative_variance_ratio': np.cumsum(ratios).tolist()
+        },
+        width=width,
+        height=height,
         margin=dict(l=40, r=40, t=60, b=40),
         template="plotly_white",
         title={
@@ -91,37 +189,118 @@ def perform_pca_visualization(df):
     )
     return serialize_plot(fig)
 
-def detect_anomalies(df, column):
-    """Detect and visualize anomalies using IQR method."""
-    Q1 = df[column].quantile(0.25)
-    Q3 = df[column].quantile(0.75)
-    IQR = Q3 - Q1
-    outlier_mask = (df[column] < (Q1 - 1.5 * IQR)) | (df[column] > (Q3 + 1.5 * IQR))
-    
-    fig = px.box(df, y=column, title=f"Anomaly Detection for {column}")
-    fig.add_scatter(x=df.index[outlier_mask], y=df[column][outlier_mask],
-                   mode='markers', name='Outliers', marker=dict(color='red'))
-    return fig
+def detect_anomalies(df, columns=None, multivariate=False):
+    """Detect and visualize anomalies in one or more numeric columns."""
+    columns = columns or numeric_columns(df)
+    chunks = lambda: (df.iloc[start:start + ANOMALY_CHUNK_ROWS] for start in range(0, len(df), ANOMALY_CHUNK_ROWS))
+    return scan_chunk_anomalies(chunks, columns, len(df), multivariate)
+
+def scan_chunk_anomalies(chunk_source, columns, total_rows, multivariate=False):
+    """Scan a chunked dataset for anomalies and plot the result compactly.
 
-def create_time_series(df, time_column, value_column):
-    """Create time series visualization."""
-    fig = px.line(df, x=time_column, y=value_column,
+    Every column is checked with the IQR and MAD rules from quantile
+    sketches; ``multivariate`` adds an isolation forest over a row sample.
+    One column is drawn as a box plot with its capped outliers, several as
+    outlier counts per column. Per-column results are in the layout's ``meta``.
+    """
+    if not columns:
+        raise ValueError("No numeric columns to scan for anomalies")
+    results = scan_anomalies(chunk_source, columns)
+    forest = isolation_forest(chunk_source, columns, total_rows) if multivariate else None
+
+    if len(columns) == 1:
+        column = columns[0]
+        result = results[column]
+        if result['q1'] is None:
+            raise ValueError(f"Column {column} has no numeric values")
+        outliers = result['iqr_outliers']
+        fig = go.Figure(go.Box(name=column, q1=[result['q1']], median=[result['median']], q3=[result['q3']],
+                               lowerfence=[outliers['lower']], upperfence=[outliers['upper']],
+                               boxpoints=False))
+        fig.add_scatter(x=[column] * len(outliers['values']), y=outliers['values'],
+                        customdata=outliers['rows'], mode='markers', name='Outliers',
+                        marker=dict(color='red'), hovertemplate='Row %{customdata}: %{y}<extra></extra>')
+        fig.update_layout(title=f"Anomaly Detection for {column} ({outliers['count']:,} outliers)")
+    else:
+        ranked = sorted(columns, key=lambda col: results[col]['iqr_outliers']['count'], reverse=True)
+        shown = ranked[:ANOMALY_MAX_COLUMNS]
+        fig = go.Figure([
+            go.Bar(name='IQR rule', x=shown, y=[results[col]['iqr_outliers']['count'] for col in shown]),
+            go.Bar(name='MAD rule', x=shown, y=[results[col]['mad_outliers']['count'] for col in shown])
+        ])
+        fig.update_layout(barmode='group', title='Outliers per Column', yaxis_title='Outlier rows')
+
+    fig.update_layout(
+        meta={'rows': total_rows, 'columns': results, 'isolation_forest': forest},
+        width=900,
+        height=600,
+        template='plotly_white'
+    )
+    return serialize_plot(fig)
+
+def create_time_series(df, time_column, value_column, width=900, x_range=None):
+    """Create time series visualization.
+
+    The series is sorted by time and reduced with LTTB to at most one point
+    per pixel of ``width``. ``x_range`` restricts it to a zoomed-in window.
+    """
+    series = pd.DataFrame({
+        time_column: df[time_column],
+        value_column: pd.to_numeric(df[value_column], errors='coerce')
+    })
+    if series[time_column].dtype == object:
+        parsed = pd.to_datetime(series[time_column], errors='coerce')
+        if parsed.notna().any():
+            series[time_column] = parsed
+    series = filter_range(series.dropna(), time_column, x_range)
+    if not series[time_column].is_monotonic_increasing:
+        series = series.sort_values(time_column, kind='stable')
+    rows = len(series)
+    if rows > width:
+        if _plottable(series[time_column]):
+            series = series.iloc[lttb(series[time_column], series[value_column], int(width))]
+        else:
+            series = series.iloc[np.linspace(0, rows - 1, int(width)).astype(np.int64)]
+    fig = px.line(series, x=time_column, y=value_column,
                   title=f"Time Series: {value_column} over {time_column}")
-    return fig
+    fig.update_layout(meta={'rows': rows, 'downsampled': len(series) < rows}, width=width)
+    return serialize_plot(fig)
 
-def create_missing_data_matrix(df):
+def create_missing_data_matrix(df, blocks=MISSING_MATRIX_BLOCKS):
     """Create missing data visualization."""
-    missing = df.isnull()
-    fig = px.imshow(missing,
-                    labels=dict(color="Missing"),
-                    title="Missing Data Matrix",
-                    aspect='auto')
+    return plot_nullity(summarize_nullity([df], list(df.columns), len(df), blocks))
+
+def plot_nullity(summary):
+    """Plot a NullitySummary as a row-bucket heatmap next to its nullity correlation.
+
+    The figure size depends only on the number of columns and row buckets,
+    not on the number of rows.
+    """
+    ranges = summary.block_ranges()
+    fractions = summary.block_fractions()
+    correlation = np.round(summary.correlation(), 4)
+    fig = make_subplots(rows=1, cols=2, column_widths=[0.55, 0.45], horizontal_spacing=0.12,
+                        subplot_titles=('Fraction Missing by Row Range', 'Nullity Correlation'))
+    fig.add_trace(go.Heatmap(
+        z=fractions, x=summary.columns, y=[f'{start}-{end}' for start, end in ranges],
+        zmin=0, zmax=1, colorscale='Blues', colorbar=dict(title='Missing', x=0.46),
+        hovertemplate='Rows %{y}<br>%{x}: %{z:.1%} missing<extra></extra>'
+    ), row=1, col=1)
+    fig.add_trace(go.Heatmap(
+        z=np.where(np.isnan(correlation), None, correlation).tolist(),
+        x=summary.columns, y=summary.columns,
+        zmin=-1, zmax=1, colorscale='RdBu', colorbar=dict(title='Correlation'),
+        hovertemplate='%{x} / %{y}: %{z}<extra></extra>'
+    ), row=1, col=2)
+    fig.update_yaxes(autorange='reversed')
     
     fig.update_layout(
+        meta={'rows': int(summary.rows), 'missing': dict(zip(summary.columns, summary.missing.tolist()))},
         width=1000,
         height=600,
         margin=dict(l=40, r=40, t=60, b=40),
         title={
+            'text': "Missing Data Matrix",
             'y':0.95,
             'x':0.5,
             'xanchor': 'center',
@@ -130,19 +309,105 @@ def create_missing_data_matrix(df):
     )
     return serialize_plot(fig)
 
-def create_cluster_visualization(df, columns, n_clusters=3):
-    """Create cluster visualization using K-means."""
-    data = df[columns]
-    kmeans = KMeans(n_clusters=n_clusters)
-    clusters = kmeans.fit_predict(data)
-    
+def create_cluster_visualization(df, columns, n_clusters=3, k_range=None, scale=True,
+                                 width=900, height=600):
+    """Create cluster visualization using K-means.
+
+    Columns are standardized unless ``scale`` is False. Large inputs are fit
+    with mini-batch k-means on a sample and every row is then assigned in
+    batches. ``n_clusters='auto'`` picks the k with the best silhouette
+    score from ``k_range`` (default 2-10); the inertia and silhouette of
+    each candidate are returned in the layout's ``meta``. The scatter is
+    density-binned per cluster once it exceeds SCATTER_RAW_POINTS points.
+    """
+    data = df[columns].apply(pd.to_numeric, errors='coerce').dropna()
+    if data.empty:
+        raise ValueError("No complete numeric rows in the selected columns")
+    values = data.to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(values) if scale else None
+    if scaler is not None:
+        values = scaler.transform(values)
+
+    scores = []
+    if k_range or n_clusters == 'auto':
+        low, high = k_range or (2, 10)
+        scores = evaluate_k(values, range(int(low), int(high) + 1))
+    if n_clusters == 'auto':
+        n_clusters = best_k(scores) or 3
+    model = fit_model(values, int(n_clusters))
+    clusters = assign(model, values)
+    centers = model.cluster_centers_
+    if scaler is not None:
+        centers = scaler.inverse_transform(centers)
+
+    x_col = columns[0]
+    y_col = columns[1] if len(columns) >= 2 else 'row'
+    points = pd.DataFrame({
+        x_col: data[x_col].to_numpy(),
+        y_col: data[y_col].to_numpy() if len(columns) >= 2 else data.index.to_numpy(),
+        'cluster': clusters.astype(str)
+    })
+    rows = len(points)
+    if rows <= SCATTER_RAW_POINTS:
+        fig = px.scatter(points, x=x_col, y=y_col, color='cluster', title="Cluster Visualization")
+    else:
+        binned = density_bins(points, x_col, y_col, width, height, 'cluster')
+        binned['size'] = 1 + np.log2(binned['count'])
+        fig = px.scatter(binned, x='x', y='y', color='color', size='size', size_max=12,
+                         hover_data={'count': True, 'size': False},
+                         labels={'x': x_col, 'y': y_col, 'color': 'cluster'},
+                         title=f"Cluster Visualization ({rows:,} points in {len(binned):,} markers)")
     if len(columns) >= 2:
-        fig = px.scatter(data, x=columns[0], y=columns[1],
-                        color=clusters, title="Cluster Visualization")
+        fig.add_scatter(x=centers[:, 0], y=centers[:, 1], mode='markers', name='Centroids',
+                        marker=dict(symbol='x', size=12, color='black'))
+
+    fig.update_layout(
+        meta={
+            'rows': rows,
+            'n_clusters': int(n_clusters),
+            'cluster_sizes': np.bincount(clusters, minlength=int(n_clusters)).tolist(),
+            'k_scores': scores
+        },
+        width=width,
+        height=height
+    )
+    return serialize_plot(fig)
+
+def run_visualization(path, viz_type, params):
+    """Build a heavy visualization from a dataset's Parquet parts.
+
+    Runs inside a job worker process, so the dataset is read from disk
+    rather than pickled across the process boundary.
+    """
+    if viz_type == 'correlation':
+        columns = numeric_columns(read_schema(path))
+        stats = streaming_correlation(lambda: iter_parts(path, columns), columns,
+                                      params.get('method', 'pearson'), params.get('precision', 'float64'))
+        result = plot_correlation(stats)
+    elif viz_type == 'pca':
+        columns = numeric_columns(read_schema(path))
+        width, height = params.get('width', 900), params.get('height', 600)
+        if read_meta(path)['total_rows'] * len(columns) <= IN_MEMORY_CELLS:
+            result = perform_pca_visualization(read_dataset(path, columns), width, height)
+        else:
+            result = streaming_pca_visualization(lambda: iter_parts(path, columns), columns, width, height)
+    elif viz_type == 'anomalies':
+        numeric = numeric_columns(read_schema(path))
+        columns = params.get('columns') or numeric
+        invalid = [col for col in columns if col not in numeric]
+        if invalid:
+            raise ValueError(f"Columns are not numeric: {', '.join(invalid)}")
+        result = scan_chunk_anomalies(lambda: iter_parts(path, columns), columns,
+                                      read_meta(path)['total_rows'], params.get('multivariate', False))
+    elif viz_type == 'cluster':
+        columns = params.get('columns', [])
+        result = create_cluster_visualization(read_dataset(path, columns), columns,
+                                              params.get('n_clusters', 3), params.get('k_range'),
+                                              params.get('scale', True),
+                                              params.get('width', 900), params.get('height', 600))
     else:
-        fig = px.scatter(data, x=columns[0], color=clusters,
-                        title="Cluster Visualization")
-    return fig
+        raise ValueError('Unsupported visualization type')
+    return serialize_numpy(result)
 
 def create_distribution_plot(df, column):
     """Create distribution plot for a numeric column."""
@@ -0,0 +1,176 @@
+import os
+import json
+import glob
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def cache_key(dataset_id, version, viz_type, params):
+    """Build the content address of a visualization result.
+
+    A dataset id and version identify one immutable snapshot of the data,
+    since every change to a dataset bumps its version. ``params`` are
+    canonicalized so that key order in the request does not matter.
+    """
+    canonical = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha256(f'{viz_type}\0{canonical}'.encode()).hexdigest()
+    return f'{dataset_id}/v{version}-{digest}'
+
+
+class ResultCache:
+    """Two-tier cache of JSON-serializable visualization results.
+
+    The memory tier is an LRU bounded by ``memory_budget`` bytes of encoded
+    JSON. Every entry is also written to ``cache_folder`` as one file per
+    key, grouped by dataset, so results survive eviction from memory and
+    can be dropped together when a dataset is removed. Storing a result
+    for a newer version of a dataset deletes the results of older versions.
+    The disk tier is bounded by ``disk_budget`` bytes: once it grows past
+    that, the least recently used files are deleted, which also clears
+    out results of datasets left behind by earlier runs.
+    """
+
+    def __init__(self, memory_budget, cache_folder, disk_budget=None):
+        self.memory_budget = memory_budget
+        self.cache_folder = cache_folder
+        self.disk_budget = disk_budget
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        os.makedirs(cache_folder, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+        if disk_budget is not None and self._disk_bytes > disk_budget:
+            self._prune_disk()
+
+    def _file(self, key):
+        return os.path.join(self.cache_folder, f'{key}.json')
+
+    def get(self, key):
+        """Return the cached result for ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry[0]
+        path = self._file(key)
+        try:
+            with open(path) as f:
+                encoded = f.read()
+            # The modification time orders files for pruning, so mark the use
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.counters['misses'] += 1
+            return None
+        value = json.loads(encoded)
+        with self._lock:
+            self.counters['disk_hits'] += 1
+            self._remember(key, value, len(encoded))
+        return value
+
+    def put(self, key, value):
+        encoded = json.dumps(value)
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._drop_stale_versions(key)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(encoded)
+        os.replace(tmp, path)
+        with self._lock:
+            self.counters['stores'] += 1
+            self._remember(key, value, len(encoded))
+            # Files removed since the last prune are still counted, so this may prune early, never late
+            self._disk_bytes += len(encoded)
+            over_budget = self.disk_budget is not None and self._disk_bytes > self.disk_budget
+        if over_budget:
+            self._prune_disk()
+        return value
+
+    def invalidate(self, dataset_id):
+        """Drop every cached result for a dataset."""
+        prefix = f'{dataset_id}/'
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._memory_bytes -= self._entries.pop(key)[1]
+        shutil.rmtree(os.path.join(self.cache_folder, dataset_id), ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = lookups - self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': round(hits / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'memory_budget': self.memory_budget,
+                'disk_bytes': self._disk_bytes,
+                'disk_budget': self.disk_budget
+            }
+
+    def _remember(self, key, value, size):
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)[1]
+        if size > self.memory_budget:
+            return
+        self._entries[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted
+
+    def _disk_files(self):
+        """``(mtime, size, path)`` of every result file on disk."""
+        files = []
+        for path in glob.glob(os.path.join(self.cache_folder, '*', '*.json')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _prune_disk(self):
+        """Delete the least recently used result files until the disk tier fits its budget."""
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            try:
+                # Drop the dataset's folder once its last result is gone
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def _drop_stale_versions(self, key):
+        dataset_id, version = _split_key(key)
+        for path in glob.glob(os.path.join(self.cache_folder, dataset_id, 'v*.json')):
+            if _split_key(f'{dataset_id}/{os.path.basename(path)}')[1] < version:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            stale = [k for k in self._entries
+                     if k.startswith(f'{dataset_id}/') and _split_key(k)[1] < version]
+            for k in stale:
+                self._memory_bytes -= self._entries.pop(k)[1]
+
+
+def _split_key(key):
+    """Return ``(dataset_id, version)`` for a cache key."""
+    dataset_id, name = key.split('/', 1)
+    return dataset_id, int(name[1:].split('-', 1)[0])
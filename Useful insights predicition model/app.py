@@ -1,31 +1,107 @@
-from flask import Flask, render_template, request, jsonify, send_file
+import os
+import sys
+
+# Modules shared with the other app live in vizpro_common at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template, request, jsonify, send_file, session
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 import plotly.express as px
-import plotly.utils
-import json
-import os
-import pickle
+import io
+import time
+from uuid import uuid4
 from datetime import datetime
 from werkzeug.utils import secure_filename
+from artifacts import ModelStore
+from vizpro_common.correlation import frame_correlation
+from vizpro_common.dtypes import column_nbytes, compact_frame, memory_summary
+from vizpro_common.figures import figure_payload, compress_response
+from predict import ModelCache
+from scoring import score_file
+from store import SessionStore
+from training import FINISHED as TRAINING_FINISHED, MODEL_TYPES, TrainingLimitError, TrainingQueue, train
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MODELS_FOLDER'] = 'models'
+app.config['SCORES_FOLDER'] = 'scores'  # batch scoring output
+app.config['SPILL_FOLDER'] = 'sessions'  # idle session datasets are spilled here as Parquet
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(32)
+app.config['DATASET_MEMORY_BUDGET'] = int(os.environ.get('DATASET_MEMORY_BUDGET', 1024 * 1024 * 1024))
+app.config['SESSION_TTL'] = 24 * 3600
+app.config['TRAINING_WORKERS'] = 2
+app.config['TRAINING_JOBS_PER_SESSION'] = 2  # unfinished training jobs one analyst may have
+app.config['TRAINING_MAX_PENDING'] = 16  # unfinished training jobs across all sessions
+app.config['PREDICT_CACHE_MODELS'] = 8  # model bundles kept loaded for /predict
+app.config['SCORE_WORKERS'] = os.cpu_count() or 1  # processes per batch scoring job
+app.config['SCORE_OUTPUT_TTL'] = 24 * 3600  # scoring output is kept this long, or until its job is dropped
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['CORRELATION_MAX_COLUMNS'] = 60  # wider heatmaps show only the most correlated columns
 
 # Create necessary folders if they don't exist
-for folder in [app.config['UPLOAD_FOLDER'], app.config['MODELS_FOLDER']]:
+for folder in [app.config['UPLOAD_FOLDER'], app.config['MODELS_FOLDER'], app.config['SPILL_FOLDER'],
+               app.config['SCORES_FOLDER']]:
     if not os.path.exists(folder):
         os.makedirs(folder)
 
-# Global variables to store data
-current_data = None
-trained_model = None
-model_filename = None
+# Trained models, indexed and deduplicated; whole-pickle models from older versions are indexed in place
+model_store = ModelStore(app.config['MODELS_FOLDER'])
+model_store.import_pickles()
+models = ModelCache(model_store, app.config['PREDICT_CACHE_MODELS'])
+
+def load_session_model(filename):
+    bundle = models.get(filename)
+    if bundle is None:
+        return None, 0
+    return bundle.model, model_store.get(filename)['size']
+
+# Each analyst's dataset and trained model, keyed by session
+sessions = SessionStore(app.config['DATASET_MEMORY_BUDGET'], app.config['SPILL_FOLDER'],
+                        load_session_model, ttl=app.config['SESSION_TTL'])
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def discard_job_files(job):
+    """Delete the upload and output of a scoring job dropped from the queue's history."""
+    if job.fn is run_scoring:
+        _, src_path, out_path, _ = job.args
+        remove_file(src_path)
+        remove_file(out_path)
+
+def prune_scores():
+    """Delete scoring output older than SCORE_OUTPUT_TTL, including output left by earlier runs."""
+    expired = time.time() - app.config['SCORE_OUTPUT_TTL']
+    for name in os.listdir(app.config['SCORES_FOLDER']):
+        path = os.path.join(app.config['SCORES_FOLDER'], name)
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+training = TrainingQueue(app.config['TRAINING_WORKERS'], app.config['TRAINING_JOBS_PER_SESSION'],
+                         app.config['TRAINING_MAX_PENDING'], on_discard=discard_job_files)
+prune_scores()
+
+def session_id():
+    """The caller's session id, kept in the signed session cookie.
+
+    Ids are only ever issued here, so a client cannot pick another
+    session's id to read its data and models or to open new sessions at will;
+    API clients keep the cookie between requests.
+    """
+    if 'sid' not in session:
+        session['sid'] = uuid4().hex
+    return session['sid']
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
 
 @app.route('/')
 def index():
@@ -33,7 +109,6 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    global current_data
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'})
     
@@ -42,12 +117,19 @@ def upload_file():
         return jsonify({'error': 'No selected file'})
     
     if file and file.filename.endswith('.csv'):
+        sid = session_id()
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f'{sid}-{filename}')
         file.save(filepath)
         
-        # Read and analyze the data
-        current_data = pd.read_csv(filepath)
+        # Read the data with compact dtypes; dates and free text stay as they are
+        # since training one-hot encodes every non-numeric column
+        try:
+            current_data, memory_report = compact_frame(pd.read_csv(filepath), arrow_strings=False,
+                                                        parse_dates=False)
+        finally:
+            os.remove(filepath)
+        sessions.set_data(sid, current_data, memory_report)
         
         # Generate basic statistics
         stats = {
@@ -65,6 +147,7 @@ def upload_file():
 
 @app.route('/preview', methods=['GET'])
 def preview_data():
+    current_data, _ = sessions.get_data(session_id())
     if current_data is None:
         return jsonify({'error': 'No data uploaded'})
     
@@ -73,24 +156,52 @@ def preview_data():
 
 @app.route('/analyze', methods=['GET'])
 def analyze_data():
+    current_data, _ = sessions.get_data(session_id())
     if current_data is None:
         return jsonify({'error': 'No data uploaded'})
     
+    method = request.args.get('method', 'pearson')
+    precision = request.args.get('precision', 'float64')
+    if method not in ('pearson', 'spearman') or precision not in ('float32', 'float64'):
+        return jsonify({'error': 'Unsupported correlation method or precision'})
+    
     # Enhanced data analysis
     analysis = {
         'numerical_columns': current_data.select_dtypes(include=[np.number]).columns.tolist(),
-        'categorical_columns': current_data.select_dtypes(include=['object']).columns.tolist(),
+        'categorical_columns': current_data.select_dtypes(include=['object', 'category']).columns.tolist(),
         'missing_values': current_data.isnull().sum().to_dict(),
         'summary_stats': current_data.describe().to_dict(),
-        'correlation_matrix': current_data.select_dtypes(include=[np.number]).corr().to_dict(),
+        'correlation_matrix': frame_correlation(current_data, method, precision).frame().to_dict(),
         'unique_values': {col: current_data[col].nunique() for col in current_data.columns}
     }
     
     return jsonify(analysis)
 
+@app.route('/memory', methods=['GET'])
+def memory_usage():
+    current_data, memory_report = sessions.get_data(session_id())
+    if current_data is None:
+        return jsonify({'error': 'No data uploaded'})
+    
+    columns = {col: dict(entry) for col, entry in memory_report.items()}
+    for col in current_data.columns:
+        entry = columns.setdefault(str(col), {})
+        entry['dtype'] = str(current_data[col].dtype)
+        entry['bytes'] = column_nbytes(current_data[col])
+    
+    return jsonify({
+        'compaction': memory_summary(memory_report),
+        'memory_bytes': int(current_data.memory_usage(index=True, deep=True).sum()),
+        'columns': columns,
+        'sessions': sessions.stats()
+    })
+
 @app.route('/train', methods=['POST'])
 def train_model():
-    global trained_model, model_filename, current_data
+    sid = session_id()
+    current_data, _ = sessions.get_data(sid)
+    if current_data is None:
+        return jsonify({'error': 'No data uploaded'})
     
     data = request.json
     target_column = data.get('target_column')
@@ -98,128 +209,194 @@ def train_model():
     
     if target_column not in current_data.columns:
         return jsonify({'error': 'Invalid target column'})
-    
-    # Prepare data
-    X = current_data.drop(columns=[target_column])
-    y = current_data[target_column]
-    
-    # Handle categorical variables
-    X = pd.get_dummies(X)
-    
-    # Split data with 80-20 ratio
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Calculate split sizes
-    split_info = {
-        'train_size': len(X_train),
-        'test_size': len(X_test),
-        'train_percentage': 80,
-        'test_percentage': 20
-    }
-    
-    # Select and train model
-    if model_type == 'linear_regression':
-        model = LinearRegression()
-    elif model_type == 'logistic_regression':
-        model = LogisticRegression()
-    elif model_type == 'random_forest_classifier':
-        model = RandomForestClassifier(n_estimators=100)
-    elif model_type == 'random_forest_regressor':
-        model = RandomForestRegressor(n_estimators=100)
-    else:
+    if model_type not in MODEL_TYPES:
         return jsonify({'error': 'Invalid model type'})
     
-    model.fit(X_train, y_train)
-    trained_model = model
+    # Fitting runs on the training pool; the client polls /jobs/<job_id> for progress and the result
+    try:
+        job = training.submit(sid, run_training, sid, current_data, target_column, model_type)
+    except TrainingLimitError as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'pending': True, **job.info()}), 202
+
+def run_training(job, sid, current_data, target_column, model_type):
+    # The session prefix keeps models trained in the same second by different analysts apart
+    model, entry, result = train(job, current_data, target_column, model_type, model_store,
+                                 name_suffix=f'_{sid[:8]}', owner=sid)
+    sessions.set_model(sid, model, entry['filename'], entry['size'])
+    return result
+
+@app.route('/score', methods=['POST'])
+def score():
+    """Score an uploaded CSV ``file`` against ``model_filename`` as a background job.
+
+    The job's result reports throughput; the predictions, one row per
+    input row in input order, are downloaded from ``/jobs/<job_id>/output``.
+    """
+    sid = session_id()
+    file = request.files.get('file')
+    if file is None or not file.filename.endswith('.csv'):
+        return jsonify({'error': 'Upload a CSV file to score'}), 400
+    filename = request.form.get('model_filename', '')
+    if model_store.get(filename) is None:
+        return jsonify({'error': 'Model not found'}), 404
     
-    # Save the model
+    src_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{sid}-score-{uuid4().hex[:8]}.csv')
+    file.save(src_path)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    model_filename = f'model_{model_type}_{timestamp}.pkl'
-    model_path = os.path.join(app.config['MODELS_FOLDER'], model_filename)
+    out_path = os.path.join(app.config['SCORES_FOLDER'], f'scores_{timestamp}_{uuid4().hex[:8]}.csv')
+    probabilities = request.form.get('probabilities', '').lower() in ('1', 'true')
+    prune_scores()
+    try:
+        job = training.submit(sid, run_scoring, filename, src_path, out_path, probabilities)
+    except TrainingLimitError as e:
+        remove_file(src_path)
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'pending': True, **job.info()}), 202
+
+def run_scoring(job, model_filename, src_path, out_path, probabilities):
+    try:
+        job.report('scoring', rows_scored=0)
+        return score_file(app.config['MODELS_FOLDER'], model_filename, src_path, out_path,
+                          app.config['SCORE_WORKERS'],
+                          probabilities=probabilities,
+                          progress=lambda rows: job.report('scoring', rows_scored=rows))
+    except Exception:
+        remove_file(out_path)
+        raise
+    finally:
+        remove_file(src_path)
+
+@app.route('/jobs/<job_id>/output')
+def job_output(job_id):
+    job = training.get(job_id)
+    if job is None or job.session_id != session_id() or job.status != 'done' or 'output' not in job.result \
+            or not os.path.exists(job.result['output']):
+        return jsonify({'error': 'Output not found'}), 404
+    return send_file(os.path.abspath(job.result['output']), as_attachment=True, download_name=os.path.basename(job.result['output']))
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    job = training.get(job_id)
+    # Jobs are private to the session that submitted them
+    if job is None or job.session_id != session_id():
+        return jsonify({'error': 'Job not found'}), 404
+    if request.method == 'DELETE':
+        training.cancel(job_id)
+        training.wait(job, 1)
     
-    with open(model_path, 'wb') as f:
-        pickle.dump({
-            'model': model,
-            'feature_names': X.columns.tolist(),
-            'target_column': target_column,
-            'model_type': model_type,
-            'split_info': split_info
-        }, f)
+    response = job.info()
+    if job.status == 'done':
+        response.update(job.result)
+    elif job.status not in TRAINING_FINISHED:
+        response['pending'] = True
+    elif job.error is None:
+        response['error'] = f'Training {job.status}'
+    return jsonify(response)
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Score a batch of rows with a saved model.
+
+    Rows come as JSON (``{"rows": [{...}, ...]}`` or ``{"columns": [...],
+    "data": [[...], ...]}``), as a CSV request body (``Content-Type:
+    text/csv``) or as an uploaded CSV ``file``. The model is
+    ``model_filename`` from the JSON body or query string, defaulting to
+    the session's last trained model. ``probabilities`` adds class
+    probabilities for classifiers.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = data.get('model_filename') or request.args.get('model_filename')
+    if not filename:
+        _, filename = sessions.get_model(session_id())
+    bundle = models.get(filename) if filename else None
+    if bundle is None:
+        return jsonify({'error': 'Model not found'}), 404
     
-    # Calculate performance metrics
-    train_score = model.score(X_train, y_train)
-    test_score = model.score(X_test, y_test)
+    try:
+        if 'file' in request.files:
+            rows = bundle.aligner.read_csv(request.files['file'].read())
+        elif request.mimetype == 'text/csv':
+            rows = bundle.aligner.read_csv(request.get_data())
+        elif 'rows' in data:
+            rows = pd.DataFrame.from_records(data['rows'])
+        elif 'data' in data:
+            rows = pd.DataFrame(data['data'], columns=data.get('columns'))
+        else:
+            return jsonify({'error': 'No rows to predict'}), 400
+    except (ValueError, TypeError, pd.errors.ParserError) as e:
+        return jsonify({'error': f'Could not read rows: {str(e)}'}), 400
     
-    y_train_pred = model.predict(X_train)
-    y_test_pred = model.predict(X_test)
+    missing = bundle.aligner.missing(rows.columns)
+    if missing:
+        return jsonify({'error': 'Missing feature columns', 'missing_features': missing}), 400
+    probabilities = str(data.get('probabilities', request.args.get('probabilities', ''))).lower() in ('1', 'true')
+    result = bundle.predict(rows, probabilities)
     
-    metrics = {
-        'train_score': train_score,
-        'test_score': test_score,
-        'split_info': split_info
+    response = {
+        'model_filename': bundle.filename,
+        'model_type': bundle.model_type,
+        'target_column': bundle.target_column,
+        'rows': len(rows),
+        'predictions': result['predictions'].tolist()
     }
-    
-    # Add specific metrics based on model type
-    if model_type in ['linear_regression', 'random_forest_regressor']:
-        from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-        metrics.update({
-            'train_mse': mean_squared_error(y_train, y_train_pred),
-            'test_mse': mean_squared_error(y_test, y_test_pred),
-            'train_mae': mean_absolute_error(y_train, y_train_pred),
-            'test_mae': mean_absolute_error(y_test, y_test_pred),
-            'train_r2': r2_score(y_train, y_train_pred),
-            'test_r2': r2_score(y_test, y_test_pred)
-        })
-    else:  # Classification metrics
-        from sklearn.metrics import precision_score, recall_score, f1_score, confusion_matrix
-        try:
-            metrics.update({
-                'train_precision': precision_score(y_train, y_train_pred, average='weighted'),
-                'test_precision': precision_score(y_test, y_test_pred, average='weighted'),
-                'train_recall': recall_score(y_train, y_train_pred, average='weighted'),
-                'test_recall': recall_score(y_test, y_test_pred, average='weighted'),
-                'train_f1': f1_score(y_train, y_train_pred, average='weighted'),
-                'test_f1': f1_score(y_test, y_test_pred, average='weighted'),
-                'confusion_matrix': confusion_matrix(y_test, y_test_pred).tolist()
-            })
-        except:
-            # Fallback for non-binary/multiclass cases
-            metrics.update({
-                'train_accuracy': train_score,
-                'test_accuracy': test_score
-            })
-    
-    # Get feature importance
-    feature_importance = None
-    if hasattr(model, 'feature_importances_'):
-        feature_importance = dict(zip(X.columns, model.feature_importances_))
-    elif hasattr(model, 'coef_'):
-        if len(model.coef_.shape) == 1:
-            feature_importance = dict(zip(X.columns, abs(model.coef_)))
-        else:
-            # For multiclass, take average of absolute coefficients
-            feature_importance = dict(zip(X.columns, abs(model.coef_).mean(axis=0)))
-    
+    if 'probabilities' in result:
+        response['classes'] = result['classes'].tolist()
+        response['probabilities'] = result['probabilities'].tolist()
+    return jsonify(response)
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    """Saved models, newest first, from the model store index.
+
+    Filter with ``model_type`` and ``target_column``; page with ``limit``
+    and ``offset``.
+    """
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
     return jsonify({
-        'model_type': model_type,
-        'metrics': metrics,
-        'feature_importance': feature_importance,
-        'model_filename': model_filename
+        'models': model_store.list(request.args.get('model_type'), request.args.get('target_column'),
+                                   limit, offset),
+        'store': model_store.stats(),
+        'cache': models.stats()
     })
 
+@app.route('/models/<filename>', methods=['GET', 'DELETE'])
+def model_entry(filename):
+    entry = model_store.get(filename)
+    if entry is None:
+        return jsonify({'error': 'Model not found'}), 404
+    if request.method == 'DELETE':
+        # Only the session that trained a model may delete it; imported models have no owner
+        if not model_store.remove(filename, owner=session_id()):
+            return jsonify({'error': 'Only the session that trained this model may delete it'}), 403
+        return jsonify({'removed': filename})
+    return jsonify(entry)
+
 @app.route('/download_model/<filename>')
 def download_model(filename):
-    if not filename or not os.path.exists(os.path.join(app.config['MODELS_FOLDER'], filename)):
-        return jsonify({'error': 'Model not found'})
+    if not filename or model_store.get(filename) is None:
+        # Older whole-pickle models the store could not import are sent as they are
+        path = model_store.pickle_path(filename)
+        if path is None:
+            return jsonify({'error': 'Model not found'})
+        return send_file(os.path.abspath(path), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=filename)
     
+    # Models are stored split into a pickle and raw array buffers; downloads get the classic single pickle
     return send_file(
-        os.path.join(app.config['MODELS_FOLDER'], filename),
+        io.BytesIO(model_store.export(filename)),
+        mimetype='application/octet-stream',
         as_attachment=True,
         download_name=filename
     )
 
 @app.route('/visualize', methods=['GET'])
 def visualize_data():
+    current_data, _ = sessions.get_data(session_id())
     if current_data is None:
         return jsonify({'error': 'No data uploaded'})
     
@@ -249,12 +426,21 @@ def visualize_data():
         )
         visualizations['distribution'].append({
             'name': col,
-            'plot': json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+            'plot': figure_payload(fig)
         })
     
+    # Correlation statistics are accumulated once and shared by the heatmap and insights
+    correlation_stats = frame_correlation(current_data) if len(numerical_cols) > 1 else None
+    
     # Correlation matrix
-    if len(numerical_cols) > 1:
-        correlation = current_data[numerical_cols].corr()
+    if correlation_stats is not None:
+        correlation = correlation_stats.frame()
+        max_columns = app.config['CORRELATION_MAX_COLUMNS']
+        if len(correlation) > max_columns:
+            shown = []
+            for pair in correlation_stats.top_pairs(max_columns):
+                shown.extend(col for col in (pair['column_1'], pair['column_2']) if col not in shown)
+            correlation = correlation.loc[shown[:max_columns], shown[:max_columns]]
         fig = px.imshow(
             correlation,
             title='Feature Correlation Matrix',
@@ -267,7 +453,7 @@ def visualize_data():
             font={'color': '#ffffff'},
             margin=dict(l=20, r=20, t=40, b=20)
         )
-        visualizations['correlation'] = json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+        visualizations['correlation'] = figure_payload(fig)
     
     # Scatter plots for feature relationships
     if len(numerical_cols) > 1:
@@ -289,23 +475,20 @@ def visualize_data():
             )
             visualizations['feature_relationships'].append({
                 'name': f'{col1} vs {col2}',
-                'plot': json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
+                'plot': figure_payload(fig)
             })
     
     # Add insights
     insights = []
     
     # Correlation insights
-    if len(numerical_cols) > 1:
-        correlation = current_data[numerical_cols].corr()
-        np.fill_diagonal(correlation.values, 0)
-        strongest_corr = np.abs(correlation).unstack().sort_values(ascending=False)[:5]
-        for (col1, col2), corr_value in strongest_corr.items():
-            if col1 != col2:
-                insights.append({
-                    'type': 'correlation',
-                    'text': f'Strong {("positive" if corr_value > 0 else "negative")} correlation ({corr_value:.2f}) between {col1} and {col2}'
-                })
+    if correlation_stats is not None:
+        for pair in correlation_stats.top_pairs(5):
+            corr_value = pair['correlation']
+            insights.append({
+                'type': 'correlation',
+                'text': f'Strong {("positive" if corr_value > 0 else "negative")} correlation ({corr_value:.2f}) between {pair["column_1"]} and {pair["column_2"]}'
+            })
     
     return jsonify({
         'visualizations': visualizations,
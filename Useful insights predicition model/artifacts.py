@@ -0,0 +1,282 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import pickle
+import shutil
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+INDEX_FILE = 'index.sqlite'
+BLOBS_FOLDER = 'blobs'
+PAYLOAD_FILE = 'bundle.pkl.z'
+BUFFERS_FILE = 'buffers.bin'
+LAYOUT_FILE = 'layout.json'
+# Arrays at least this large are stored raw, outside the compressed pickle, and read from a memory map on load
+MMAP_MIN_BYTES = 64 * 1024
+BUFFER_ALIGN = 64
+COMPRESS_LEVEL = 6
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS models (
+    filename TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    model_type TEXT,
+    target_column TEXT,
+    feature_names TEXT,
+    n_features INTEGER,
+    metrics TEXT,
+    size INTEGER,
+    created REAL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS models_created ON models (created);
+CREATE INDEX IF NOT EXISTS models_digest ON models (digest);
+'''
+LIST_COLUMNS = ['filename', 'digest', 'model_type', 'target_column', 'n_features', 'metrics', 'size', 'created']
+
+
+def serialize(bundle):
+    """Pickle ``bundle`` with large array buffers kept out of band.
+
+    Returns ``(payload, buffers)``: the pickle stream, holding small
+    arrays inline, and the raw buffers of arrays of ``MMAP_MIN_BYTES`` or
+    more, in the order ``pickle.loads`` expects them.
+    """
+    buffers = []
+
+    def keep_inline(buffer):
+        if buffer.raw().nbytes < MMAP_MIN_BYTES:
+            return True
+        buffers.append(buffer.raw())
+        return False
+
+    return pickle.dumps(bundle, protocol=5, buffer_callback=keep_inline), buffers
+
+
+def _row(columns, values):
+    entry = dict(zip(columns, values))
+    for key in ('metrics', 'feature_names'):
+        if entry.get(key) is not None:
+            entry[key] = json.loads(entry[key])
+    return entry
+
+
+class ModelStore:
+    """Content-addressed store of trained model bundles with a SQLite index.
+
+    Each saved bundle is split into a zlib-compressed pickle stream and a
+    file of raw array buffers (see ``serialize``), stored under
+    ``blobs/<sha256>`` so identical bundles are kept once. The index maps
+    model filenames to their blob with the metadata listings need (type,
+    target, features, metrics, size, created), so listing and lookups are
+    index queries rather than scans of the folder. Loading maps the buffer
+    file into memory: arrays a model keeps as plain numpy attributes (such
+    as linear model coefficients) stay read-only views of the mapping,
+    paged in on use and shared through the page cache between processes.
+    scikit-learn trees copy their node arrays when unpickled, so forests
+    are always loaded fully into each process's own memory.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.index_path = os.path.join(folder, INDEX_FILE)
+        os.makedirs(os.path.join(folder, BLOBS_FOLDER), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+            # Indexes written before models had owners
+            if 'owner' not in [row[1] for row in db.execute('PRAGMA table_info(models)')]:
+                db.execute('ALTER TABLE models ADD COLUMN owner TEXT')
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def blob_path(self, digest):
+        return os.path.join(self.folder, BLOBS_FOLDER, digest)
+
+    def _write_blob(self, digest, payload, buffers):
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            return
+        tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        os.makedirs(tmp_path)
+        layout, offset = [], 0
+        with open(os.path.join(tmp_path, BUFFERS_FILE), 'wb') as f:
+            for buffer in buffers:
+                padding = -offset % BUFFER_ALIGN
+                f.write(b'\0' * padding)
+                offset += padding
+                f.write(buffer)
+                layout.append([offset, buffer.nbytes])
+                offset += buffer.nbytes
+        with open(os.path.join(tmp_path, PAYLOAD_FILE), 'wb') as f:
+            f.write(zlib.compress(payload, COMPRESS_LEVEL))
+        with open(os.path.join(tmp_path, LAYOUT_FILE), 'w') as f:
+            json.dump({'buffers': layout}, f)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another writer stored the same bundle first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _blob_size(self, digest):
+        path = self.blob_path(digest)
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    def save(self, filename, bundle, metrics=None, created=None, owner=None):
+        """Store ``bundle`` (the dict ``/train`` builds) as ``filename``; return its index entry.
+
+        ``owner`` is the session that trained the model, the only one
+        allowed to remove it; it is kept out of the entries returned.
+        """
+        payload, buffers = serialize(bundle)
+        digest = hashlib.sha256(payload)
+        for buffer in buffers:
+            digest.update(buffer)
+        digest = digest.hexdigest()
+        self._write_blob(digest, payload, buffers)
+        entry = {
+            'filename': filename,
+            'digest': digest,
+            'model_type': bundle.get('model_type'),
+            'target_column': bundle.get('target_column'),
+            'feature_names': list(bundle.get('feature_names', [])),
+            'n_features': len(bundle.get('feature_names', [])),
+            'metrics': metrics,
+            'size': self._blob_size(digest),
+            'created': created or time.time()
+        }
+        with self._lock, self._connect() as db:
+            db.execute(
+                'INSERT OR REPLACE INTO models (filename, digest, model_type, target_column, feature_names, '
+                'n_features, metrics, size, created, owner) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (filename, digest, entry['model_type'], entry['target_column'],
+                 json.dumps(entry['feature_names']), entry['n_features'],
+                 json.dumps(metrics, default=float) if metrics is not None else None,
+                 entry['size'], entry['created'], owner))
+        return entry
+
+    def get(self, filename):
+        """Index entry for ``filename``, with its feature names, or None."""
+        columns = LIST_COLUMNS + ['feature_names']
+        with self._connect() as db:
+            row = db.execute(f"SELECT {', '.join(columns)} FROM models WHERE filename = ?",
+                             (filename,)).fetchone()
+        return _row(columns, row) if row is not None else None
+
+    def list(self, model_type=None, target_column=None, limit=100, offset=0):
+        """Newest first, optionally filtered by model type and target column."""
+        where, params = [], []
+        if model_type:
+            where.append('model_type = ?')
+            params.append(model_type)
+        if target_column:
+            where.append('target_column = ?')
+            params.append(target_column)
+        query = f"SELECT {', '.join(LIST_COLUMNS)} FROM models"
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY created DESC LIMIT ? OFFSET ?'
+        with self._connect() as db:
+            rows = db.execute(query, params + [limit, offset]).fetchall()
+        return [_row(LIST_COLUMNS, row) for row in rows]
+
+    def stats(self):
+        with self._connect() as db:
+            models, blobs, stored = db.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT digest), '
+                '(SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM models)) FROM models'
+            ).fetchone()
+        return {'models': models, 'distinct_models': blobs, 'stored_bytes': stored}
+
+    def load_digest(self, digest, mmap_buffers=True):
+        """Unpickle a stored bundle, with large arrays read from a memory map unless ``mmap_buffers`` is False.
+
+        Objects that copy their arrays while unpickling, like
+        scikit-learn trees, end up with private copies either way.
+        """
+        path = self.blob_path(digest)
+        with open(os.path.join(path, LAYOUT_FILE)) as f:
+            layout = json.load(f)['buffers']
+        with open(os.path.join(path, PAYLOAD_FILE), 'rb') as f:
+            payload = zlib.decompress(f.read())
+        buffers = []
+        if layout:
+            with open(os.path.join(path, BUFFERS_FILE), 'rb') as f:
+                if mmap_buffers:
+                    # The mapping stays open for as long as the arrays viewing it are alive
+                    data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                else:
+                    data = memoryview(bytearray(f.read()))
+            buffers = [data[start:start + size] for start, size in layout]
+        return pickle.loads(payload, buffers=buffers)
+
+    def load(self, filename, mmap_buffers=True):
+        entry = self.get(filename)
+        if entry is None:
+            raise KeyError(filename)
+        return self.load_digest(entry['digest'], mmap_buffers)
+
+    def export(self, filename):
+        """The bundle as a plain pickle, for downloading and loading elsewhere."""
+        return pickle.dumps(self.load(filename, mmap_buffers=False))
+
+    def remove(self, filename, owner=None):
+        """Drop ``filename`` from the index, and its blob once no other model shares it.
+
+        With ``owner``, only a model saved by that owner is removed.
+        Returns whether a model was removed.
+        """
+        with self._lock, self._connect() as db:
+            row = db.execute('SELECT digest, owner FROM models WHERE filename = ?', (filename,)).fetchone()
+            if row is None or (owner is not None and row[1] != owner):
+                return False
+            digest = row[0]
+            db.execute('DELETE FROM models WHERE filename = ?', (filename,))
+            shared = db.execute('SELECT 1 FROM models WHERE digest = ? LIMIT 1', (digest,)).fetchone()
+        if shared is None:
+            shutil.rmtree(self.blob_path(digest), ignore_errors=True)
+        return True
+
+    def pickle_path(self, filename):
+        """Path of a whole-pickle ``filename`` in the folder, or None if there is none."""
+        if os.path.basename(filename) != filename or not filename.endswith('.pkl'):
+            return None
+        path = os.path.join(self.folder, filename)
+        return path if os.path.isfile(path) else None
+
+    def import_pickles(self):
+        """Index whole-pickle ``*.pkl`` models in the folder the store lacks; return how many.
+
+        The files are left in place, so importing again, or from several
+        processes starting at once, only repeats work; a file that cannot
+        be unpickled stays where it is for ``pickle_path`` to serve.
+        """
+        with self._connect() as db:
+            indexed = {row[0] for row in db.execute('SELECT filename FROM models')}
+        imported = 0
+        for name in sorted(os.listdir(self.folder)):
+            path = self.pickle_path(name)
+            if path is None or name in indexed:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    bundle = pickle.load(f)
+                self.save(name, bundle, created=os.path.getmtime(path))
+            except Exception as e:
+                logging.error(f"Could not import model {name}: {str(e)}")
+                continue
+            imported += 1
+        return imported
@@ -0,0 +1,157 @@
+import io
+import copy
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Rows encoded and predicted at a time, bounding the feature matrix
+PREDICT_BATCH_ROWS = 65536
+
+
+class FeatureAligner:
+    """Encodes raw rows into a model's training feature layout.
+
+    Training one-hot encodes every non-numeric column with
+    ``pd.get_dummies``, producing ``<column>_<value>`` features. The
+    aligner keeps a precomputed map from feature name to column index
+    and writes each incoming column straight into its position in a
+    float matrix: numeric columns are copied, non-numeric values are
+    looked up once per distinct value and set as ones. Features with no
+    matching input (categories unseen in a batch) stay zero, as
+    ``get_dummies`` would leave them.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self._encoded = {}
+
+    def is_encoded(self, column):
+        """Whether ``column`` was one-hot encoded in training."""
+        encoded = self._encoded.get(column)
+        if encoded is None:
+            prefix = f'{column}_'
+            encoded = column not in self.index and any(name.startswith(prefix) for name in self.feature_names)
+            self._encoded[column] = encoded
+        return encoded
+
+    def missing(self, columns):
+        """Features that cannot be produced from input ``columns``."""
+        prefixes = tuple(f'{col}_' for col in columns)
+        return [name for name in self.feature_names
+                if name not in columns and not name.startswith(prefixes)]
+
+    def input_columns(self, columns):
+        """Split input ``columns`` into ``(numeric, categorical)`` ones the features use.
+
+        Columns named like a feature are numeric; columns whose name
+        prefixes one-hot features are categorical and should be read as
+        strings, so every chunk of a file encodes them the same way.
+        """
+        numeric = [col for col in columns if col in self.index]
+        categorical = [col for col in columns if self.is_encoded(col)]
+        return numeric, categorical
+
+    def read_csv(self, data):
+        """Read CSV bytes with the one-hot encoded columns as strings."""
+        header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+        _, categorical = self.input_columns(header)
+        return pd.read_csv(io.BytesIO(data), dtype={col: str for col in categorical})
+
+    def transform(self, df):
+        X = np.zeros((len(df), len(self.feature_names)), dtype=np.float64)
+        for col in df.columns:
+            series = df[col]
+            position = self.index.get(col)
+            if position is not None:
+                X[:, position] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                continue
+            if not self.is_encoded(col):
+                # Columns the model does not use (e.g. the target) are ignored
+                continue
+            # Values are looked up by their string form, as get_dummies named them,
+            # so a categorical column that arrives numeric still finds its features
+            codes, uniques = pd.factorize(series)
+            if len(uniques) == 0:
+                continue
+            lookup = np.array([self.index.get(f'{col}_{value}', -1) for value in uniques], dtype=np.int64)
+            rows = np.flatnonzero(codes >= 0)
+            positions = lookup[codes[rows]]
+            known = positions >= 0
+            X[rows[known], positions[known]] = 1.0
+        # Keep the training feature names so scikit-learn checks the layout without warning
+        return pd.DataFrame(X, columns=self.feature_names, copy=False)
+
+
+class ModelBundle:
+    """A saved model with the feature layout it was trained on."""
+
+    def __init__(self, filename, bundle):
+        self.filename = filename
+        self.model = bundle['model']
+        self.target_column = bundle.get('target_column')
+        self.model_type = bundle.get('model_type')
+        self.aligner = FeatureAligner(bundle['feature_names'])
+
+    @classmethod
+    def load(cls, store, filename):
+        return cls(filename, store.load(filename))
+
+    def predict(self, df, probabilities=False, batch_rows=PREDICT_BATCH_ROWS):
+        """Predictions for ``df``, and class probabilities when asked and available."""
+        predictions, probas = [], []
+        with_proba = probabilities and hasattr(self.model, 'predict_proba')
+        for start in range(0, len(df), batch_rows):
+            X = self.aligner.transform(df.iloc[start:start + batch_rows])
+            predictions.append(self.model.predict(X))
+            if with_proba:
+                probas.append(self.model.predict_proba(X))
+        result = {'predictions': np.concatenate(predictions) if predictions else np.empty(0)}
+        if with_proba:
+            result['classes'] = self.model.classes_
+            result['probabilities'] = np.vstack(probas) if probas else np.empty((0, len(self.model.classes_)))
+        return result
+
+
+class ModelCache:
+    """Thread-safe LRU cache of model bundles loaded from a ``ModelStore``.
+
+    Bundles are keyed by content digest, so models saved under several
+    names share one loaded copy; at most ``max_models`` stay loaded.
+    Returns None for names the store does not know.
+    """
+
+    def __init__(self, store, max_models):
+        self.store = store
+        self.max_models = max_models
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        entry = self.store.get(filename)
+        if entry is None:
+            return None
+        digest = entry['digest']
+        with self._lock:
+            cached = self._bundles.get(digest)
+            if cached is not None:
+                self._bundles.move_to_end(digest)
+                if cached.filename == filename:
+                    return cached
+                # Same content saved under another name: share the loaded model
+                bundle = copy.copy(cached)
+                bundle.filename = filename
+                return bundle
+        bundle = ModelBundle(filename, self.store.load_digest(digest))
+        with self._lock:
+            self._bundles[digest] = bundle
+            self._bundles.move_to_end(digest)
+            while len(self._bundles) > self.max_models:
+                self._bundles.popitem(last=False)
+        return bundle
+
+    def stats(self):
+        with self._lock:
+            return {'loaded': [bundle.filename for bundle in self._bundles.values()],
+                    'max_models': self.max_models}
@@ -0,0 +1,127 @@
+import os
+import gzip
+import time
+import argparse
+import multiprocessing
+from collections import deque
+import pandas as pd
+from artifacts import ModelStore
+from predict import ModelBundle
+
+SCORE_CHUNK_ROWS = 100000
+# Chunks in flight per worker; bounds memory to a few chunks however large the input
+CHUNKS_PER_WORKER = 2
+
+# The model loaded once in each scoring process
+_bundle = None
+
+
+def _load_model(models_folder, model_filename):
+    global _bundle
+    _bundle = ModelBundle.load(ModelStore(models_folder), model_filename)
+
+
+def _score_chunk(chunk, probabilities):
+    """Score one chunk in a worker; returns ``(rows, csv text)`` without a header."""
+    result = _bundle.predict(chunk, probabilities)
+    out = pd.DataFrame({'prediction': result['predictions']})
+    if 'probabilities' in result:
+        for i, cls in enumerate(result['classes']):
+            out[f'proba_{cls}'] = result['probabilities'][:, i]
+    return len(out), out.to_csv(index=False, header=False)
+
+
+def output_columns(bundle, probabilities):
+    columns = ['prediction']
+    if probabilities and hasattr(bundle.model, 'predict_proba'):
+        columns += [f'proba_{cls}' for cls in bundle.model.classes_]
+    return columns
+
+
+def _open_output(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', compresslevel=6, newline='')
+    return open(path, 'w', newline='')
+
+
+def score_file(models_folder, model_filename, src_path, out_path, workers=None,
+               chunk_rows=SCORE_CHUNK_ROWS, probabilities=False, progress=None):
+    """Score a CSV against a saved model into a CSV of predictions, in input order.
+
+    The input is read in chunks of ``chunk_rows`` with only the columns
+    the model uses, categorical ones as strings. Chunks are scored by a
+    pool of ``workers`` processes, each loading the model once from the
+    store in ``models_folder`` (forests are copied into every worker's
+    memory, so budget one model per worker), with at most
+    ``CHUNKS_PER_WORKER`` chunks per worker in flight; results are written
+    in submission order as they complete. Output ending in ``.gz`` is
+    gzip-compressed. ``progress`` is called with the rows written so far.
+    Returns throughput statistics.
+    """
+    started = time.time()
+    bundle = ModelBundle.load(ModelStore(models_folder), model_filename)
+    header = pd.read_csv(src_path, nrows=0).columns
+    missing = bundle.aligner.missing(header)
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    numeric, categorical = bundle.aligner.input_columns(header)
+    workers = workers or os.cpu_count() or 1
+
+    rows = chunks = 0
+    ctx = multiprocessing.get_context('forkserver')
+    # Workers only need this module, not the web app that may be __main__
+    ctx.set_forkserver_preload(['scoring'])
+    with ctx.Pool(workers, initializer=_load_model, initargs=(models_folder, model_filename)) as pool, \
+            _open_output(out_path) as out:
+        out.write(','.join(output_columns(bundle, probabilities)) + '\n')
+        pending = deque()
+
+        def write_next():
+            nonlocal rows, chunks
+            n, text = pending.popleft().get()
+            out.write(text)
+            rows += n
+            chunks += 1
+            if progress is not None:
+                progress(rows)
+
+        reader = pd.read_csv(src_path, usecols=numeric + categorical,
+                             dtype={col: str for col in categorical}, chunksize=chunk_rows)
+        for chunk in reader:
+            pending.append(pool.apply_async(_score_chunk, (chunk, probabilities)))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                write_next()
+        while pending:
+            write_next()
+
+    seconds = time.time() - started
+    return {
+        'model_filename': bundle.filename,
+        'rows': rows,
+        'chunks': chunks,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else None,
+        'output': out_path
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV file against a model saved by the insights app.')
+    parser.add_argument('model', help='model filename, as listed by /models')
+    parser.add_argument('input', help='CSV file to score')
+    parser.add_argument('output', help='CSV file for the predictions (.gz to compress)')
+    parser.add_argument('--models-folder', default='models', help='model store folder (default: models)')
+    parser.add_argument('--workers', type=int, default=None, help='scoring processes (default: CPU count)')
+    parser.add_argument('--chunk-rows', type=int, default=SCORE_CHUNK_ROWS, help='rows per chunk')
+    parser.add_argument('--probabilities', action='store_true', help='add class probability columns')
+    args = parser.parse_args()
+
+    stats = score_file(args.models_folder, args.model, args.input, args.output, args.workers, args.chunk_rows,
+                       args.probabilities, progress=lambda rows: print(f'\r{rows:,} rows scored', end='', flush=True))
+    print(f"\nScored {stats['rows']:,} rows in {stats['seconds']}s "
+          f"({stats['rows_per_second']:,} rows/s) with {stats['workers']} workers -> {stats['output']}")
+
+
+if __name__ == '__main__':
+    main()
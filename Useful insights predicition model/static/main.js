@@ -47,6 +47,21 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function hideLoading() {
         loadingOverlay.style.display = 'none';
+        loadingOverlay.querySelector('p').textContent = 'Processing...';
+    }
+
+    // Poll a training job until it finishes, showing its progress under the loader
+    async function pollJob(jobId, interval = 1000) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, interval));
+            const response = await fetch(`/jobs/${jobId}`);
+            const result = await response.json();
+            if (!result.pending) return result;
+            const progress = result.progress || {};
+            loadingOverlay.querySelector('p').textContent = progress.trees_total
+                ? `Training... ${progress.trees_built}/${progress.trees_total} trees`
+                : `Training... (${progress.stage || result.status})`;
+        }
     }
 
     function showToast(message, type = 'info') {
@@ -161,6 +176,7 @@ document.addEventListener('DOMContentLoaded', function() {
             })
         })
         .then(response => response.json())
+        .then(data => data.pending ? pollJob(data.job_id) : data)
         .then(data => {
             if (data.error) {
                 showToast(data.error, 'error');
@@ -0,0 +1,190 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from pyarrow.lib import ArrowException
+
+
+def frame_nbytes(df):
+    """Return the in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def write_parquet(df, path):
+    """Write a frame to Parquet, stringifying object columns Arrow cannot type."""
+    try:
+        df.to_parquet(path, index=False)
+    except (ValueError, TypeError, ArrowException):
+        df = df.copy()
+        for col in df.select_dtypes(include=['object']).columns:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        df.to_parquet(path, index=False)
+
+
+class Session:
+    """One analyst's dataset and trained model.
+
+    The frame lives in memory (``df``), in a Parquet file under the
+    session's spill folder (``path``), or both. The model is kept in memory
+    (``model``) and can always be reloaded from the model store by name
+    (``model_filename``).
+    """
+
+    def __init__(self, session_id, folder):
+        self.session_id = session_id
+        self.folder = folder
+        self.df = None
+        self.path = None
+        self.nbytes = 0
+        self.memory_report = None
+        self.model = None
+        self.model_filename = None
+        self.model_nbytes = 0
+        self.version = 0
+        self.last_access = time.time()
+
+    @property
+    def has_data(self):
+        return self.df is not None or self.path is not None
+
+    @property
+    def memory_bytes(self):
+        return self.nbytes + self.model_nbytes
+
+
+class SessionStore:
+    """Thread-safe LRU store of per-session datasets and models under a memory budget.
+
+    Once the in-memory frames and models exceed ``memory_budget`` bytes,
+    the least recently used sessions are unloaded: frames are spilled to
+    Parquet under ``spill_folder`` and models are dropped, to be reloaded
+    with ``load_model(model_filename)`` on demand. The most recently used session is never
+    unloaded. Sessions idle for longer than ``ttl`` seconds are removed.
+
+    Reads hand out references to the current frame and model; writers swap
+    in new objects instead of mutating, so a request holding a frame keeps
+    a consistent view while another request replaces it.
+    """
+
+    def __init__(self, memory_budget, spill_folder, load_model, ttl=24 * 3600):
+        self.memory_budget = memory_budget
+        self.spill_folder = spill_folder
+        self.load_model = load_model
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _session(self, session_id, create=True):
+        session = self._sessions.get(session_id)
+        if session is None:
+            # Only writes open a session, so reads from new visitors leave nothing behind
+            if not create:
+                return None
+            session = Session(session_id, os.path.join(self.spill_folder, session_id))
+            self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        session.last_access = time.time()
+        return session
+
+    def get_data(self, session_id):
+        """Return ``(df, memory_report)`` for a session, reloading a spilled frame; ``(None, None)`` if empty."""
+        with self._lock:
+            self._expire()
+            session = self._session(session_id, create=False)
+            if session is None:
+                return None, None
+            if session.df is None and session.path is not None:
+                session.df = pd.read_parquet(session.path)
+                session.nbytes = frame_nbytes(session.df)
+                self._evict()
+            return session.df, session.memory_report
+
+    def set_data(self, session_id, df, memory_report=None):
+        """Replace a session's dataset; its previous spill file is discarded."""
+        with self._lock:
+            session = self._session(session_id)
+            if session.path is not None and os.path.exists(session.path):
+                os.remove(session.path)
+            session.df = df
+            session.path = None
+            session.nbytes = frame_nbytes(df)
+            session.memory_report = memory_report
+            session.version += 1
+            self._evict()
+            return session.version
+
+    def get_model(self, session_id):
+        """Return ``(model, model_filename)``, reloading an unloaded model."""
+        with self._lock:
+            session = self._session(session_id, create=False)
+            if session is None:
+                return None, None
+            if session.model is None and session.model_filename is not None:
+                session.model, session.model_nbytes = self.load_model(session.model_filename)
+                self._evict()
+            return session.model, session.model_filename
+
+    def set_model(self, session_id, model, model_filename, model_nbytes):
+        """Record a session's trained model, saved under ``model_filename``.
+
+        ``model_nbytes`` (its stored size) stands in for its memory footprint.
+        """
+        with self._lock:
+            session = self._session(session_id)
+            session.model = model
+            session.model_filename = model_filename
+            session.model_nbytes = model_nbytes
+            self._evict()
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        shutil.rmtree(session.folder, ignore_errors=True)
+        return True
+
+    def memory_bytes(self):
+        with self._lock:
+            return sum(s.memory_bytes for s in self._sessions.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'loaded': sum(1 for s in self._sessions.values() if s.df is not None),
+                'memory_bytes': self.memory_bytes(),
+                'memory_budget': self.memory_budget
+            }
+
+    def _evict(self):
+        total = self.memory_bytes()
+        for session in list(self._sessions.values())[:-1]:
+            if total <= self.memory_budget:
+                break
+            total -= session.memory_bytes
+            self._unload(session)
+
+    def _unload(self, session):
+        if session.df is not None and session.path is None:
+            os.makedirs(session.folder, exist_ok=True)
+            path = os.path.join(session.folder, f'data-v{session.version}.parquet')
+            write_parquet(session.df, path)
+            session.path = path
+        session.df = None
+        session.nbytes = 0
+        if session.model_filename is not None:
+            session.model = None
+            session.model_nbytes = 0
+        logging.info(f"Unloaded session {session.session_id} to {session.folder}")
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for session_id, session in list(self._sessions.items()):
+            if session.last_access >= cutoff:
+                break
+            del self._sessions[session_id]
+            shutil.rmtree(session.folder, ignore_errors=True)
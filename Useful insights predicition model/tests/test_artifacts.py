@@ -0,0 +1,110 @@
+import io
+import os
+import time
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from artifacts import MMAP_MIN_BYTES, ModelStore
+
+
+def _train(client):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.random(100), 'g': rng.choice(['a', 'b'], 100)})
+    df['y'] = (df['x'] > 0.5).astype(int)
+    client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'train.csv')})
+    job = client.post('/train', json={'target_column': 'y', 'model_type': 'logistic_regression'}).get_json()
+    while client.get(f"/jobs/{job['job_id']}").get_json().get('pending'):
+        time.sleep(0.05)
+    return client.get(f"/jobs/{job['job_id']}").get_json()['model_filename']
+
+
+def _bundle():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((500, 4)), columns=list('abcd'))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, X['a'] > 0.5)
+    return X, {'model': model, 'feature_names': list(X.columns), 'target_column': 'y',
+               'model_type': 'random_forest_classifier', 'weights': np.arange(MMAP_MIN_BYTES, dtype=np.float64)}
+
+
+def test_round_trip_keeps_the_model_and_large_arrays(tmp_path):
+    X, bundle = _bundle()
+    store = ModelStore(str(tmp_path))
+    entry = store.save('m.pkl', bundle, metrics={'score': np.float64(0.5)})
+    assert store.get('m.pkl')['metrics'] == {'score': 0.5} and entry['n_features'] == 4
+    for mmap_buffers in (True, False):
+        loaded = store.load('m.pkl', mmap_buffers)
+        np.testing.assert_array_equal(loaded['model'].predict(X), bundle['model'].predict(X))
+        np.testing.assert_array_equal(loaded['weights'], bundle['weights'])
+    assert not store.load('m.pkl')['weights'].flags.writeable
+    assert pickle.loads(store.export('m.pkl'))['feature_names'] == list('abcd')
+
+
+def test_identical_bundles_share_one_blob(tmp_path):
+    _, bundle = _bundle()
+    store = ModelStore(str(tmp_path))
+    first = store.save('one.pkl', bundle, created=1)
+    second = store.save('two.pkl', bundle, created=2)
+    assert first['digest'] == second['digest']
+    assert os.listdir(tmp_path / 'blobs') == [first['digest']]
+    assert store.stats() == {'models': 2, 'distinct_models': 1, 'stored_bytes': first['size']}
+    assert [entry['filename'] for entry in store.list(model_type='random_forest_classifier')] == ['two.pkl', 'one.pkl']
+    # The blob goes only with the last model using it
+    assert store.remove('one.pkl') and os.path.exists(store.blob_path(first['digest']))
+    assert store.remove('two.pkl') and not os.path.exists(store.blob_path(first['digest']))
+
+
+def test_only_the_owner_removes_a_model(tmp_path):
+    store = ModelStore(str(tmp_path))
+    store.save('a.pkl', {'model': None, 'feature_names': ['x']}, owner='alice')
+    store.save('legacy.pkl', {'model': None, 'feature_names': ['x']})
+    assert 'owner' not in store.get('a.pkl')
+    assert not store.remove('a.pkl', owner='bob')
+    assert not store.remove('legacy.pkl', owner='bob')
+    assert store.remove('a.pkl', owner='alice')
+    assert store.get('a.pkl') is None and store.get('legacy.pkl') is not None
+
+
+def test_delete_route_checks_the_session(app_module):
+    owner, other = app_module.app.test_client(), app_module.app.test_client()
+    filename = _train(owner)
+    assert other.delete(f'/models/{filename}').status_code == 403
+    assert other.get(f'/models/{filename}').status_code == 200
+    assert owner.delete(f'/models/{filename}').status_code == 200
+    assert other.get(f'/models/{filename}').status_code == 404
+
+
+def test_model_routes(app_module):
+    client = app_module.app.test_client()
+    filename = _train(client)
+    assert filename in [entry['filename'] for entry in client.get('/models').get_json()['models']]
+    assert client.get(f'/models/{filename}').get_json()['target_column'] == 'y'
+    bundle = pickle.loads(client.get(f'/download_model/{filename}').data)
+    assert bundle['feature_names'] == ['x', 'g_a', 'g_b']
+    assert client.delete(f'/models/{filename}').status_code == 200
+    assert client.get(f'/models/{filename}').status_code == 404
+
+
+def test_import_pickles_leaves_files_and_is_idempotent(tmp_path):
+    with open(tmp_path / 'old.pkl', 'wb') as f:
+        pickle.dump({'model': None, 'feature_names': ['x', 'y'], 'model_type': 'linear_regression'}, f)
+    (tmp_path / 'broken.pkl').write_bytes(b'not a pickle')
+    store = ModelStore(str(tmp_path))
+    assert store.import_pickles() == 1
+    assert store.import_pickles() == 0
+    assert (tmp_path / 'old.pkl').exists() and (tmp_path / 'broken.pkl').exists()
+    assert store.get('old.pkl')['feature_names'] == ['x', 'y']
+    assert store.get('broken.pkl') is None and store.pickle_path('broken.pkl') is not None
+    assert store.pickle_path('../old.pkl') is None and store.pickle_path('index.sqlite') is None
+
+
+def test_download_serves_unimported_pickles(app_module):
+    client = app_module.app.test_client()
+    path = os.path.join(app_module.app.config['MODELS_FOLDER'], 'unreadable.pkl')
+    with open(path, 'wb') as f:
+        f.write(b'legacy bytes')
+    try:
+        assert client.get('/download_model/unreadable.pkl').data == b'legacy bytes'
+        assert 'error' in client.get('/download_model/missing.pkl').get_json()
+    finally:
+        os.remove(path)
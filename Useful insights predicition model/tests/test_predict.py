@@ -0,0 +1,80 @@
+import io
+import time
+import numpy as np
+import pandas as pd
+from artifacts import ModelStore
+from predict import FeatureAligner, ModelCache
+
+
+def _frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'x': rng.random(n),
+        'g': rng.choice(['a', 'b', 'c'], n),
+        'm': rng.choice(['12', '7', 'abc'], n),
+        'k': rng.integers(0, 5, n)
+    })
+
+
+def test_transform_matches_get_dummies():
+    df = _frame()
+    expected = pd.get_dummies(df).astype(float)
+    aligner = FeatureAligner(expected.columns)
+    # A batch missing some categories and with columns in another order
+    batch = df[df['g'] != 'c'][['m', 'k', 'g', 'x']]
+    result = aligner.transform(batch)
+    reference = pd.get_dummies(batch).reindex(columns=expected.columns, fill_value=0).astype(float)
+    np.testing.assert_array_equal(result.to_numpy(), reference.to_numpy())
+
+
+def test_numeric_looking_categories_are_encoded():
+    aligner = FeatureAligner(['x', 'm_12', 'm_7', 'm_abc'])
+    result = aligner.transform(pd.DataFrame({'x': [0.5, 0.5], 'm': [12, 7]}))
+    np.testing.assert_array_equal(result.to_numpy(), [[0.5, 1, 0, 0], [0.5, 0, 1, 0]])
+
+
+def test_input_columns_and_missing():
+    aligner = FeatureAligner(['x', 'm_12', 'm_abc'])
+    assert aligner.input_columns(['x', 'm', 'target']) == (['x'], ['m'])
+    assert aligner.missing(['m']) == ['x']
+
+
+def test_model_cache_shares_models_saved_under_several_names(tmp_path):
+    store = ModelStore(str(tmp_path))
+    for i in range(3):
+        store.save(f'{i}.pkl', {'model': i, 'feature_names': ['x']})
+    store.save('copy.pkl', {'model': 0, 'feature_names': ['x']})
+    cache = ModelCache(store, 2)
+    first = cache.get('0.pkl')
+    assert cache.get('0.pkl') is first
+    shared = cache.get('copy.pkl')
+    assert shared.model == first.model and shared.filename == 'copy.pkl'
+    cache.get('1.pkl')
+    cache.get('0.pkl')
+    cache.get('2.pkl')
+    assert cache.stats()['loaded'] == ['0.pkl', '2.pkl']
+    assert cache.get('missing.pkl') is None
+
+
+def test_csv_and_json_predictions_agree(app_module):
+    client = app_module.app.test_client()
+    df = _frame(400)
+    df['y'] = ((df['m'] == '12') | (df['x'] > 0.8)).astype(int)
+    upload = client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'train.csv')})
+    assert 'error' not in upload.get_json()
+    job = client.post('/train', json={'target_column': 'y', 'model_type': 'logistic_regression'}).get_json()
+    while client.get(f"/jobs/{job['job_id']}").get_json().get('pending'):
+        time.sleep(0.05)
+    filename = client.get(f"/jobs/{job['job_id']}").get_json()['model_filename']
+
+    rows = pd.DataFrame({'x': [0.1, 0.1, 0.1], 'g': ['a', 'a', 'a'], 'k': [1, 1, 1], 'm': ['12', '7', '12']})
+    as_json = client.post('/predict', json={'model_filename': filename, 'probabilities': True,
+                                            'rows': rows.to_dict('records')}).get_json()
+    as_csv = client.post('/predict', data=rows.to_csv(index=False), content_type='text/csv',
+                         query_string={'model_filename': filename, 'probabilities': 'true'}).get_json()
+    assert as_csv['predictions'] == as_json['predictions']
+    np.testing.assert_allclose(as_csv['probabilities'], as_json['probabilities'])
+    # Numeric-looking categories in the CSV still change the outcome, so they were not dropped
+    assert as_json['probabilities'][0] != as_json['probabilities'][1]
+    missing = client.post('/predict', json={'model_filename': filename, 'rows': [{'x': 0.1}]})
+    assert missing.status_code == 400
@@ -0,0 +1,66 @@
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from artifacts import ModelStore
+from scoring import score_file
+
+
+def test_prune_scores_removes_expired_output(app_module):
+    folder = app_module.app.config['SCORES_FOLDER']
+    old, new = os.path.join(folder, 'old.csv'), os.path.join(folder, 'new.csv')
+    for path in (old, new):
+        with open(path, 'w') as f:
+            f.write('prediction\n')
+    expired = time.time() - app_module.app.config['SCORE_OUTPUT_TTL'] - 60
+    os.utime(old, (expired, expired))
+    app_module.prune_scores()
+    assert not os.path.exists(old) and os.path.exists(new)
+    os.remove(new)
+
+
+def test_score_file_keeps_input_order(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.random(1000), 'g': rng.choice(['a', 'b', '7'], 1000)})
+    X = pd.get_dummies(df)
+    model = LinearRegression().fit(X, df['x'] * 3 + (df['g'] == '7'))
+    ModelStore(str(tmp_path / 'models')).save('m.pkl', {'model': model, 'feature_names': list(X.columns)})
+    df.to_csv(tmp_path / 'in.csv', index=False)
+
+    stats = score_file(str(tmp_path / 'models'), 'm.pkl', str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv.gz'),
+                       workers=2, chunk_rows=37)
+    assert stats['rows'] == 1000 and stats['chunks'] == 28
+    scored = pd.read_csv(tmp_path / 'out.csv.gz')
+    np.testing.assert_allclose(scored['prediction'], model.predict(X))
+
+
+def _wait(client, job_id):
+    body = client.get(f'/jobs/{job_id}').get_json()
+    while body.get('pending'):
+        time.sleep(0.05)
+        body = client.get(f'/jobs/{job_id}').get_json()
+    return body
+
+
+def test_score_route_matches_predict(app_module):
+    client = app_module.app.test_client()
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'x': rng.random(300), 'g': rng.choice(['a', 'b'], 300)})
+    df['y'] = ((df['x'] > 0.5) ^ (df['g'] == 'b')).astype(int)
+    client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'train.csv')})
+    job = client.post('/train', json={'target_column': 'y', 'model_type': 'random_forest_classifier'}).get_json()
+    filename = _wait(client, job['job_id'])['model_filename']
+
+    rows = df[['x', 'g']]
+    job = client.post('/score', data={'model_filename': filename, 'probabilities': 'true',
+                                      'file': (io.BytesIO(rows.to_csv(index=False).encode()), 'rows.csv')})
+    assert _wait(client, job.get_json()['job_id'])['rows'] == 300
+    scored = pd.read_csv(io.BytesIO(client.get(f"/jobs/{job.get_json()['job_id']}/output").data))
+    expected = client.post('/predict', json={'model_filename': filename, 'probabilities': True,
+                                             'rows': rows.to_dict('records')}).get_json()
+    assert scored['prediction'].tolist() == expected['predictions']
+    np.testing.assert_allclose(scored[['proba_0', 'proba_1']], expected['probabilities'])
+    assert client.post('/score', data={'model_filename': 'missing.pkl',
+                                       'file': (io.BytesIO(b'x\n1\n'), 'rows.csv')}).status_code == 404
@@ -0,0 +1,81 @@
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from store import SessionStore, frame_nbytes
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'x': rng.random(1000), 'g': rng.choice(['a', 'b'], 1000)})
+
+
+def test_least_recently_used_sessions_spill_and_reload(tmp_path):
+    frames = {sid: _frame(i) for i, sid in enumerate(['a', 'b', 'c'])}
+    store = SessionStore(2 * frame_nbytes(frames['a']) + 1, str(tmp_path), load_model=None)
+    for sid, df in frames.items():
+        store.set_data(sid, df)
+    assert store.stats()['loaded'] == 2
+    assert os.listdir(tmp_path / 'a') == ['data-v1.parquet']
+    assert store.memory_bytes() <= store.memory_budget
+
+    df, _ = store.get_data('a')
+    pd.testing.assert_frame_equal(df, frames['a'])
+    # Reloading 'a' made 'b' the least recently used session
+    assert store.stats()['loaded'] == 2 and os.path.exists(tmp_path / 'b')
+
+
+def test_models_are_dropped_and_reloaded_by_name(tmp_path):
+    loads = []
+
+    def load_model(filename):
+        loads.append(filename)
+        return f'model:{filename}', 100
+
+    store = SessionStore(150, str(tmp_path), load_model)
+    store.set_model('a', 'model:a.pkl', 'a.pkl', 100)
+    store.set_model('b', 'model:b.pkl', 'b.pkl', 100)
+    assert loads == []
+    assert store.get_model('a') == ('model:a.pkl', 'a.pkl')
+    assert loads == ['a.pkl']
+
+
+def test_replacing_data_discards_the_spill_file(tmp_path):
+    store = SessionStore(0, str(tmp_path), load_model=None)
+    store.set_data('a', _frame(0))
+    store.set_data('b', _frame(1))
+    assert os.listdir(tmp_path / 'a') == ['data-v1.parquet']
+    store.set_data('a', _frame(2))
+    assert os.listdir(tmp_path / 'a') == []
+
+
+def test_idle_sessions_expire(tmp_path):
+    store = SessionStore(0, str(tmp_path), load_model=None, ttl=60)
+    store.set_data('old', _frame(0))
+    store.set_data('new', _frame(1))
+    store._sessions['old'].last_access = time.time() - 120
+    assert store.get_data('new')[0] is not None
+    assert store.stats()['sessions'] == 1 and not os.path.exists(tmp_path / 'old')
+
+
+def test_sessions_keep_their_own_data(app_module):
+    first, second = app_module.app.test_client(), app_module.app.test_client()
+    for client, value in ((first, 1), (second, 2)):
+        client.post('/upload', data={'file': (io.BytesIO(f'x\n{value}\n'.encode()), 'd.csv')})
+    assert first.get('/preview').get_json() == [{'x': 1}]
+    assert second.get('/preview').get_json() == [{'x': 2}]
+    assert 'error' in app_module.app.test_client().get('/preview').get_json()
+
+
+def test_session_ids_come_only_from_the_signed_cookie(app_module):
+    owner, other = app_module.app.test_client(), app_module.app.test_client()
+    owner.post('/upload', data={'file': (io.BytesIO(b'x\n1\n'), 'd.csv')})
+    with owner.session_transaction() as cookie:
+        sid = cookie['sid']
+    assert 'error' in other.get('/preview', headers={'X-Session-ID': sid}).get_json()
+    # Reads without a session do not open one
+    sessions = app_module.sessions.stats()['sessions']
+    other.get('/preview')
+    other.get('/analyze')
+    assert app_module.sessions.stats()['sessions'] == sessions
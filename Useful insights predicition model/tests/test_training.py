@@ -0,0 +1,86 @@
+import io
+import time
+import threading
+import pytest
+import pandas as pd
+from training import TrainingLimitError, TrainingQueue
+
+
+def _blocking(release):
+    def run(job):
+        while not release.wait(0.01):
+            job.report('waiting')
+        return 'finished'
+    return run
+
+
+def test_limits_per_session_and_overall():
+    release = threading.Event()
+    queue = TrainingQueue(max_workers=1, max_per_session=2, max_pending=3)
+    try:
+        queue.submit('a', _blocking(release))
+        queue.submit('a', _blocking(release))
+        with pytest.raises(TrainingLimitError):
+            queue.submit('a', _blocking(release))
+        queue.submit('b', _blocking(release))
+        with pytest.raises(TrainingLimitError):
+            queue.submit('c', _blocking(release))
+    finally:
+        release.set()
+
+
+def test_cancelled_queued_job_finishes_at_once_and_frees_its_slot():
+    release = threading.Event()
+    started = []
+    queue = TrainingQueue(max_workers=1, max_per_session=2, max_pending=2)
+    try:
+        running = queue.submit('a', _blocking(release))
+        queued = queue.submit('a', lambda job: started.append(job))
+        queue.cancel(queued.job_id)
+        assert queued.status == 'cancelled' and queued.done.is_set()
+        # The cancelled job no longer counts against the session limit
+        queue.submit('a', _blocking(release))
+    finally:
+        release.set()
+    assert queue.wait(running, 5) and running.status == 'done' and running.result == 'finished'
+    assert started == [] and queued.started is None
+
+
+def test_running_job_stops_at_its_next_report():
+    release = threading.Event()
+    queue = TrainingQueue(max_workers=1, max_per_session=1, max_pending=1)
+    job = queue.submit('a', _blocking(release))
+    while job.status != 'running':
+        queue.wait(job, 0.01)
+    queue.cancel(job.job_id)
+    assert queue.wait(job, 5) and job.status == 'cancelled'
+
+
+def test_failed_job_records_its_error():
+    queue = TrainingQueue(max_workers=1, max_per_session=1, max_pending=1)
+    job = queue.submit('a', lambda job: 1 / 0)
+    assert queue.wait(job, 5) and job.status == 'failed' and 'division' in job.error
+
+
+def test_dropped_jobs_are_handed_to_on_discard():
+    discarded = []
+    queue = TrainingQueue(max_workers=1, max_per_session=1, max_pending=1, max_jobs=2, on_discard=discarded.append)
+    jobs = []
+    for _ in range(4):
+        jobs.append(queue.submit('a', lambda job: None))
+        queue.wait(jobs[-1], 5)
+    assert discarded == jobs[:2]
+    assert queue.get(jobs[0].job_id) is None and queue.get(jobs[3].job_id) is jobs[3]
+
+
+def test_train_runs_as_a_job(app_module):
+    client = app_module.app.test_client()
+    df = pd.DataFrame({'x': range(60), 'y': [i % 2 for i in range(60)]})
+    client.post('/upload', data={'file': (io.BytesIO(df.to_csv(index=False).encode()), 'train.csv')})
+    job = client.post('/train', json={'target_column': 'y', 'model_type': 'logistic_regression'}).get_json()
+    body = client.get(f"/jobs/{job['job_id']}").get_json()
+    while body.get('pending'):
+        time.sleep(0.05)
+        body = client.get(f"/jobs/{job['job_id']}").get_json()
+    assert body['status'] == 'done' and body['model_filename'].endswith('.pkl')
+    assert client.get('/jobs/missing').status_code == 404
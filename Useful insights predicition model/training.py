@@ -0,0 +1,270 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+FINISHED = {'done', 'failed', 'cancelled'}
+# Forests are grown this many trees at a time so progress and cancellation are checked in between
+FOREST_BATCH_TREES = 10
+
+MODEL_TYPES = {
+    'linear_regression': lambda: LinearRegression(),
+    'logistic_regression': lambda: LogisticRegression(),
+    'random_forest_classifier': lambda: RandomForestClassifier(n_estimators=100),
+    'random_forest_regressor': lambda: RandomForestRegressor(n_estimators=100)
+}
+
+
+class Cancelled(Exception):
+    pass
+
+
+class TrainingLimitError(Exception):
+    """Raised when a training job would exceed the queue or per-session limits."""
+
+
+class TrainingJob:
+    """A training run queued for one session."""
+
+    def __init__(self, session_id, fn, args):
+        self.job_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.fn = fn
+        self.args = args
+        self.status = 'queued'
+        self.progress = {'stage': 'queued'}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = threading.Event()
+        self.done = threading.Event()
+
+    def report(self, stage, **progress):
+        """Record progress and stop the run if cancellation was requested."""
+        if self.cancel_requested.is_set():
+            raise Cancelled()
+        self.progress = {'stage': stage, **progress}
+
+    def info(self):
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished
+        }
+
+
+class TrainingQueue:
+    """Runs training and scoring jobs on a pool of ``max_workers`` threads.
+
+    At most ``max_pending`` jobs may be unfinished at once, and at most
+    ``max_per_session`` of them for one session; ``submit`` raises
+    ``TrainingLimitError`` beyond that. Jobs are called as
+    ``fn(job, *args)``. Cancelling a queued job finishes it at once, so
+    it no longer counts against the limits and never starts; a running
+    one stops cooperatively at its next ``job.report``. Only the newest
+    ``max_jobs`` finished jobs are kept; ``on_discard`` is called with each
+    older one as it is dropped, to clean up its files.
+    """
+
+    def __init__(self, max_workers, max_per_session, max_pending, max_jobs=256, on_discard=None):
+        self.max_per_session = max_per_session
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.on_discard = on_discard
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='training')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, fn, *args):
+        with self._lock:
+            pending = [job for job in self._jobs.values() if job.status not in FINISHED]
+            if len(pending) >= self.max_pending:
+                raise TrainingLimitError('Training queue is full, try again later')
+            if sum(1 for job in pending if job.session_id == session_id) >= self.max_per_session:
+                raise TrainingLimitError(f'At most {self.max_per_session} jobs may run per session')
+            job = TrainingJob(session_id, fn, args)
+            self._jobs[job.job_id] = job
+            discarded = self._prune()
+        if self.on_discard is not None:
+            for old in discarded:
+                self.on_discard(old)
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_requested.set()
+            if job.status == 'queued':
+                self._finish(job, 'cancelled')
+        return job
+
+    def wait(self, job, seconds):
+        """Block for up to ``seconds`` until ``job`` finishes; return whether it did."""
+        return job.done.wait(seconds)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        return [self._jobs.pop(job_id) for job_id in finished[:max(len(self._jobs) - self.max_jobs, 0)]]
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        job.done.set()
+
+    def _run(self, job):
+        with self._lock:
+            if job.status in FINISHED:
+                # Cancelled while queued
+                return
+            job.status = 'running'
+            job.started = time.time()
+        try:
+            result = job.fn(job, *job.args)
+        except Cancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            logging.error(f"Training job {job.job_id} failed: {str(e)}")
+            self._finish(job, 'failed', error=str(e))
+        else:
+            self._finish(job, 'done', result=result)
+
+
+def fit_model(model, X_train, y_train, job):
+    """Fit ``model``, growing forests in batches of ``FOREST_BATCH_TREES`` trees."""
+    if isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+        total = model.n_estimators
+        model.set_params(warm_start=True)
+        for built in range(0, total, FOREST_BATCH_TREES):
+            job.report('fitting', trees_built=built, trees_total=total)
+            model.set_params(n_estimators=min(built + FOREST_BATCH_TREES, total))
+            model.fit(X_train, y_train)
+        model.set_params(warm_start=False)
+        job.report('fitting', trees_built=total, trees_total=total)
+        return model
+    job.report('fitting')
+    return model.fit(X_train, y_train)
+
+
+def train(job, df, target_column, model_type, store, name_suffix='', owner=None):
+    """Fit, score and save a model on ``df`` into the ``ModelStore``, owned by ``owner``.
+
+    Returns ``(model, entry, result)`` where ``entry`` is the model's store
+    index entry and ``result`` holds the metrics and feature importance
+    sent to the client.
+    """
+    job.report('preparing')
+    # Prepare data
+    X = df.drop(columns=[target_column])
+    y = df[target_column]
+
+    # Handle categorical variables
+    X = pd.get_dummies(X)
+
+    # Split data with 80-20 ratio
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Calculate split sizes
+    split_info = {
+        'train_size': len(X_train),
+        'test_size': len(X_test),
+        'train_percentage': 80,
+        'test_percentage': 20
+    }
+
+    model = fit_model(MODEL_TYPES[model_type](), X_train, y_train, job)
+
+    # Calculate performance metrics
+    job.report('evaluating')
+    train_score = model.score(X_train, y_train)
+    test_score = model.score(X_test, y_test)
+
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+
+    metrics = {
+        'train_score': train_score,
+        'test_score': test_score,
+        'split_info': split_info
+    }
+
+    # Add specific metrics based on model type
+    if model_type in ['linear_regression', 'random_forest_regressor']:
+        from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+        metrics.update({
+            'train_mse': mean_squared_error(y_train, y_train_pred),
+            'test_mse': mean_squared_error(y_test, y_test_pred),
+            'train_mae': mean_absolute_error(y_train, y_train_pred),
+            'test_mae': mean_absolute_error(y_test, y_test_pred),
+            'train_r2': r2_score(y_train, y_train_pred),
+            'test_r2': r2_score(y_test, y_test_pred)
+        })
+    else:  # Classification metrics
+        from sklearn.metrics import precision_score, recall_score, f1_score, confusion_matrix
+        try:
+            metrics.update({
+                'train_precision': precision_score(y_train, y_train_pred, average='weighted'),
+                'test_precision': precision_score(y_test, y_test_pred, average='weighted'),
+                'train_recall': recall_score(y_train, y_train_pred, average='weighted'),
+                'test_recall': recall_score(y_test, y_test_pred, average='weighted'),
+                'train_f1': f1_score(y_train, y_train_pred, average='weighted'),
+                'test_f1': f1_score(y_test, y_test_pred, average='weighted'),
+                'confusion_matrix': confusion_matrix(y_test, y_test_pred).tolist()
+            })
+        except:
+            # Fallback for non-binary/multiclass cases
+            metrics.update({
+                'train_accuracy': train_score,
+                'test_accuracy': test_score
+            })
+
+    # Get feature importance
+    feature_importance = None
+    if hasattr(model, 'feature_importances_'):
+        feature_importance = dict(zip(X.columns, model.feature_importances_))
+    elif hasattr(model, 'coef_'):
+        if len(model.coef_.shape) == 1:
+            feature_importance = dict(zip(X.columns, abs(model.coef_)))
+        else:
+            # For multiclass, take average of absolute coefficients
+            feature_importance = dict(zip(X.columns, abs(model.coef_).mean(axis=0)))
+
+    # Save the model last, so a cancelled run leaves no file behind
+    job.report('saving')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    model_filename = f'model_{model_type}_{timestamp}{name_suffix}.pkl'
+    entry = store.save(model_filename, {
+        'model': model,
+        'feature_names': X.columns.tolist(),
+        'target_column': target_column,
+        'model_type': model_type,
+        'split_info': split_info
+    }, metrics=metrics, owner=owner)
+
+    return model, entry, {
+        'model_type': model_type,
+        'metrics': metrics,
+        'feature_importance': feature_importance,
+        'model_filename': model_filename
+    }
@@ -0,0 +1,5 @@
+"""Modules shared by the Data Cleaning and Useful Insights apps.
+
+Both apps put the repository root on ``sys.path`` at startup so these
+can be imported as ``vizpro_common.<module>``.
+"""
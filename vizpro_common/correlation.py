@@ -0,0 +1,148 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+BLOCK_COLUMNS = 256
+
+
+def numeric_columns(df):
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)]
+
+
+def _blocked_product(a, b, block, symmetric=False):
+    """``a.T @ b`` computed one column block pair at a time.
+
+    Keeping each product to ``block`` x ``block`` keeps the operands in
+    cache; for symmetric products only the upper triangle of blocks is
+    computed and mirrored.
+    """
+    width = a.shape[1]
+    out = np.empty((width, b.shape[1]), dtype=np.float64)
+    for i in range(0, width, block):
+        for j in range(i if symmetric else 0, b.shape[1], block):
+            part = a[:, i:i + block].T @ b[:, j:j + block]
+            out[i:i + block, j:j + block] = part
+            if symmetric and j != i:
+                out[j:j + block, i:i + block] = part.T
+    return out
+
+
+class CorrelationStats:
+    """Sufficient statistics for pairwise-complete Pearson correlation.
+
+    For every column pair ``(i, j)`` this keeps the number of rows where
+    both are present and, over those rows, the sum and sum of squares of
+    column ``i`` and the sum of products. Chunks are folded in one at a
+    time, so memory is bounded by the number of columns squared rather than
+    the number of rows. Values are shifted by the first chunk's column means
+    to keep the sums well conditioned. ``dtype`` is the precision of the
+    per-chunk matrix products; totals are always accumulated in float64.
+    """
+
+    def __init__(self, columns, dtype=np.float64, block=BLOCK_COLUMNS):
+        self.columns = list(columns)
+        self.dtype = np.dtype(dtype)
+        self.block = block
+        width = len(self.columns)
+        self.shift = None
+        self.rows = 0
+        self.counts = np.zeros((width, width))
+        self.sums = np.zeros((width, width))
+        self.squares = np.zeros((width, width))
+        self.products = np.zeros((width, width))
+
+    def update(self, values):
+        """Fold in a 2-D array of rows x ``columns``; NaN and inf count as missing."""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        present = np.isfinite(values)
+        if self.shift is None:
+            totals = np.where(present, values, 0).sum(axis=0)
+            self.shift = totals / np.maximum(present.sum(axis=0), 1)
+        values = np.where(present, values - self.shift, 0).astype(self.dtype, copy=False)
+        self.rows += len(values)
+        self.products += _blocked_product(values, values, self.block, symmetric=True)
+        if present.all():
+            self.counts += len(values)
+            self.sums += values.sum(axis=0, dtype=np.float64)[:, None]
+            self.squares += (values.astype(np.float64) ** 2).sum(axis=0)[:, None]
+        else:
+            mask = present.astype(self.dtype)
+            self.counts += _blocked_product(mask, mask, self.block, symmetric=True)
+            self.sums += _blocked_product(values, mask, self.block)
+            self.squares += _blocked_product(values * values, mask, self.block)
+        return self
+
+    def update_frame(self, df):
+        return self.update(df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def rows_block(self, start, stop):
+        """Correlation of columns ``start:stop`` against every column."""
+        n = self.counts[start:stop]
+        sx = self.sums[start:stop]
+        sy = self.sums[:, start:stop].T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self.products[start:stop] - sx * sy / n
+            var_x = self.squares[start:stop] - sx * sx / n
+            var_y = self.squares[:, start:stop].T - sy * sy / n
+            r = cov / np.sqrt(var_x * var_y)
+        r[(n < 2) | ~(var_x > 0) | ~(var_y > 0)] = np.nan
+        return np.clip(r, -1, 1)
+
+    def matrix(self):
+        width = len(self.columns)
+        if width == 0:
+            return np.empty((0, 0))
+        return np.vstack([self.rows_block(i, min(i + self.block, width))
+                          for i in range(0, width, self.block)])
+
+    def frame(self):
+        return pd.DataFrame(self.matrix(), index=self.columns, columns=self.columns)
+
+    def top_pairs(self, k=5):
+        """The ``k`` column pairs with the strongest absolute correlation.
+
+        Works one row block at a time, keeping only each block's best ``k``
+        candidates, so the full set of pairs is never sorted.
+        """
+        width = len(self.columns)
+        best = []
+        for start in range(0, width, self.block):
+            stop = min(start + self.block, width)
+            r = self.rows_block(start, stop)
+            rows, cols = np.indices(r.shape)
+            upper = cols > rows + start
+            strength = np.where(upper & ~np.isnan(r), np.abs(r), -1).ravel()
+            take = min(k, len(strength))
+            if take == 0:
+                continue
+            for flat in np.argpartition(strength, -take)[-take:]:
+                if strength[flat] < 0:
+                    continue
+                i, j = divmod(int(flat), width)
+                candidate = (float(strength[flat]), start + i, j, float(r.flat[flat]))
+                if len(best) < k:
+                    heapq.heappush(best, candidate)
+                else:
+                    heapq.heappushpop(best, candidate)
+        return [{'column_1': self.columns[i], 'column_2': self.columns[j], 'correlation': value}
+                for _, i, j, value in sorted(best, reverse=True)]
+
+
+def frame_correlation(df, method='pearson', dtype=np.float64, columns=None):
+    """CorrelationStats for the numeric columns of an in-memory DataFrame.
+
+    Spearman ranks each column over all of its values before pairs with a
+    missing side are dropped, which differs slightly from pandas when
+    columns have missing values.
+    """
+    columns = numeric_columns(df) if columns is None else columns
+    data = df[columns]
+    if method == 'spearman':
+        data = data.rank()
+    elif method != 'pearson':
+        raise ValueError(f'Unsupported correlation method: {method}')
+    return CorrelationStats(columns, dtype).update_frame(data)
+
@@ -0,0 +1,99 @@
+import re
+import numpy as np
+import pandas as pd
+
+# String columns with at most this fraction of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+DATE_SAMPLE_ROWS = 100
+DATE_PATTERN = re.compile(r'^(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4})([ T]|$)')
+
+
+def column_nbytes(series):
+    """In-memory size of a Series' values, counting Python object payloads."""
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _all_strings(values):
+    return all(isinstance(v, str) for v in values)
+
+
+def _parse_dates(series, present):
+    if not all(DATE_PATTERN.match(v) for v in present.iloc[:DATE_SAMPLE_ROWS]):
+        return None
+    try:
+        parsed = pd.to_datetime(series, errors='coerce')
+    except (ValueError, TypeError, OverflowError):
+        return None
+    # Accept only when every value parsed with the format inferred from the first
+    return parsed if parsed.notna().sum() == len(present) else None
+
+
+def compact_column(series, arrow_strings=True, parse_dates=True):
+    """Return ``series`` in the smallest dtype that keeps every value.
+
+    Integers are downcast to the narrowest signed type; floats become
+    float32 only when that is exact. All-string object columns are parsed
+    as datetimes if every value is a date, else become categoricals when
+    low-cardinality, else Arrow-backed strings. Mixed object columns are
+    left alone.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(dtype) and dtype == np.float64:
+        narrow = series.astype(np.float32)
+        same = (narrow.to_numpy(dtype=np.float64) == series.to_numpy()) | series.isna().to_numpy()
+        return narrow if same.all() else series
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == 'python' and arrow_strings:
+        # Parquet round trips restore Arrow strings with Python storage
+        return series.astype('string[pyarrow]')
+    if dtype != object:
+        return series
+    present = series.dropna()
+    if present.empty or not _all_strings(present):
+        return series
+    if parse_dates:
+        parsed = _parse_dates(series, present)
+        if parsed is not None:
+            return parsed
+    if present.nunique() <= CATEGORY_MAX_RATIO * len(present):
+        return series.astype('category')
+    if arrow_strings:
+        return series.astype('string[pyarrow]')
+    return series
+
+
+def compact_frame(df, arrow_strings=True, parse_dates=True):
+    """Compact every column of ``df`` in place, one column at a time.
+
+    Returns ``(df, report)`` where ``report`` maps each column to its dtype
+    and byte size before and after.
+    """
+    report = {}
+    for col in df.columns:
+        before = df[col]
+        after = compact_column(before, arrow_strings, parse_dates)
+        size = column_nbytes(before)
+        report[str(col)] = {
+            'dtype_before': str(before.dtype),
+            'dtype_after': str(after.dtype),
+            'bytes_before': size,
+            'bytes_after': size if after is before else column_nbytes(after)
+        }
+        if after is not before:
+            df[col] = after
+    return df, report
+
+
+def memory_summary(report):
+    """Totals for a ``compact_frame`` report."""
+    before = sum(c['bytes_before'] for c in report.values())
+    after = sum(c['bytes_after'] for c in report.values())
+    return {
+        'bytes_before': before,
+        'bytes_after': after,
+        'saved_bytes': before - after,
+        'ratio': round(before / after, 2) if after else None
+    }
@@ -0,0 +1,125 @@
+import gzip
+import base64
+from datetime import date, datetime, timedelta
+import numpy as np
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Numeric arrays shorter than this stay plain lists
+MIN_TYPED_ARRAY = 16
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+COMPRESS_MIMETYPES = {'application/json'}
+
+# numpy dtype -> Plotly.js typed array dtype; 64-bit integers have no typed array
+TYPED_ARRAY_DTYPES = {
+    'float64': 'f8', 'float32': 'f4',
+    'int32': 'i4', 'int16': 'i2', 'int8': 'i1',
+    'uint32': 'u4', 'uint16': 'u2', 'uint8': 'u1'
+}
+
+
+def typed_array(values):
+    """Encode a numeric array as a Plotly.js base64 typed array.
+
+    64-bit integers are narrowed to int32 when they fit, float64 otherwise.
+    Two-dimensional arrays (heatmap ``z``) keep their shape.
+    """
+    if values.dtype.kind in 'iu' and values.dtype.itemsize == 8:
+        info = np.iinfo(np.int32)
+        fits = values.size == 0 or (values.min() >= info.min and values.max() <= info.max)
+        values = values.astype(np.int32 if fits else np.float64)
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+    encoded = {'dtype': TYPED_ARRAY_DTYPES[values.dtype.name],
+               'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        encoded['shape'] = ','.join(str(n) for n in values.shape)
+    return encoded
+
+
+def _numeric(values):
+    return values.dtype.kind in 'iuf' and values.ndim <= 2 and values.size >= MIN_TYPED_ARRAY
+
+
+def to_native(obj):
+    """Convert numpy and datetime values to JSON-native Python values."""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'M':
+            return np.datetime_as_string(obj).tolist()
+        if obj.dtype.kind == 'm':
+            return obj.astype(str).tolist()
+        if obj.dtype == object:
+            return [to_native(v) for v in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, (np.integer, np.floating, np.bool_)):
+        return obj.item()
+    if isinstance(obj, np.datetime64):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return str(obj)
+    if isinstance(obj, dict):
+        return {k: to_native(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_native(v) for v in obj]
+    return obj
+
+
+def encode_arrays(obj):
+    """Like ``to_native``, but numeric arrays become base64 typed arrays."""
+    if isinstance(obj, np.ndarray) and _numeric(obj):
+        return typed_array(obj)
+    if isinstance(obj, (list, tuple)) and obj and all(isinstance(row, (list, tuple, np.ndarray)) for row in obj):
+        # Nested lists (heatmap z) become one 2-D typed array when rectangular and
+        # numeric, plain lists otherwise; rows are never encoded one by one
+        try:
+            values = np.asarray(obj)
+        except ValueError:
+            values = None
+        if values is not None and values.ndim == 2 and _numeric(values):
+            return typed_array(values)
+        return to_native(obj)
+    if isinstance(obj, (list, tuple)) and len(obj) >= MIN_TYPED_ARRAY \
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in obj):
+        return typed_array(np.asarray(obj))
+    if isinstance(obj, dict):
+        return {k: encode_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [encode_arrays(v) for v in obj]
+    return to_native(obj)
+
+
+def figure_payload(fig):
+    """A Plotly figure as a JSON-ready ``{'data', 'layout'}`` dict.
+
+    The figure is converted to a dict once; numeric trace arrays are sent
+    as typed arrays, which Plotly.js 2.28+ decodes natively, and the layout
+    as plain values.
+    """
+    figure = fig.to_dict()
+    return {'data': encode_arrays(figure['data']), 'layout': to_native(figure['layout'])}
+
+
+def compress_response(response, accept_encoding):
+    """Compress a JSON response body with brotli or gzip if the client accepts it.
+
+    Streamed responses and small bodies are left alone.
+    """
+    if response.direct_passthrough or response.is_streamed \
+            or response.mimetype not in COMPRESS_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+    encoding = 'br' if brotli is not None and 'br' in accepted else 'gzip' if 'gzip' in accepted else None
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(brotli.compress(body, quality=5) if encoding == 'br' else gzip.compress(body, 6))
+    response.headers['Content-Encoding'] = encoding
+    return response